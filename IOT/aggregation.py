@@ -0,0 +1,150 @@
+# aggregation.py
+import math
+import time
+
+METRICS = ('co2', 'pm25', 'co', 'temperature', 'humidity')
+MODES = ('none', 'window', 'deadband', 'window+deadband')
+STATS = ('min', 'max', 'mean', 'last')
+
+
+class EdgeAggregator:
+    """
+    Reduce locally sampled readings to the rows worth uploading.
+
+    Modes:
+
+    - ``none``: every reading is uploaded
+    - ``window``: one row per ``window_seconds`` (aligned to the clock so
+      devices share window boundaries). Each metric is reported as its
+      configured statistic; by default pollutants use the window max so
+      short peaks survive, and climate uses the mean.
+    - ``deadband``: a reading is uploaded only if some metric moved by
+      more than its deadband since the last uploaded row
+    - ``window+deadband``: window rows, skipped when nothing moved
+
+    In the deadband modes, a row still goes out after ``max_silence_seconds``
+    so the dashboard can tell a quiet device from a dead one.
+    """
+
+    def __init__(self, mode='none', window_seconds=300, stats=None, deadband=None,
+                 max_silence_seconds=900, clock=time.time):
+        if mode not in MODES:
+            raise ValueError(f"Unknown aggregation mode '{mode}'. Expected one of {MODES}")
+        stats = {'co2': 'max', 'pm25': 'max', 'co': 'max',
+                 'temperature': 'mean', 'humidity': 'mean', **(stats or {})}
+        for metric, stat in stats.items():
+            if stat not in STATS:
+                raise ValueError(f"Unknown statistic '{stat}' for {metric}. Expected one of {STATS}")
+
+        self.mode = mode
+        self.window_seconds = window_seconds
+        self.stats = stats
+        self.deadband = dict(deadband or {})
+        self.max_silence_seconds = max_silence_seconds
+        self.clock = clock
+
+        self.samples_in = 0
+        self.rows_out = 0
+        self._window_end = None
+        self._window = None
+        self._window_reading = None
+        self._last_sent = None
+        self._last_sent_at = None
+
+    @classmethod
+    def from_config(cls, config=None):
+        """Build an aggregator from an EDGE_AGGREGATION-style dict"""
+        config = config or {}
+        return cls(
+            mode=config.get('mode', 'none'),
+            window_seconds=config.get('window_seconds', 300),
+            stats=config.get('stats'),
+            deadband=config.get('deadband'),
+            max_silence_seconds=config.get('max_silence_seconds', 900)
+        )
+
+    @property
+    def enabled(self):
+        return self.mode != 'none'
+
+    def add(self, reading, now=None):
+        """
+        Feed one reading
+
+        Args:
+            reading (dict): Reading as built by SensorHandler.build_reading()
+            now (float): Unix time of the reading, defaults to the clock
+
+        Returns:
+            list: Readings to upload now (often empty)
+        """
+        self.samples_in += 1
+        if self.mode == 'none':
+            return self._emit(reading, now)
+        if self.mode == 'deadband':
+            return self._emit(reading, now) if self._changed(reading, now) else []
+
+        now = self.clock() if now is None else now
+        rows = []
+        if self._window is not None and now >= self._window_end:
+            rows = self.flush(now)
+        if self._window is None:
+            self._window_end = (math.floor(now / self.window_seconds) + 1) * self.window_seconds
+            self._window = {metric: [math.inf, -math.inf, 0.0, 0, None] for metric in METRICS}
+            self._window_reading = None
+
+        for metric in METRICS:
+            value = reading.get(metric)
+            if value is None:
+                continue
+            acc = self._window[metric]
+            acc[0] = min(acc[0], value)
+            acc[1] = max(acc[1], value)
+            acc[2] += value
+            acc[3] += 1
+            acc[4] = value
+        self._window_reading = reading
+        return rows
+
+    def flush(self, now=None):
+        """Close the current window (e.g. on shutdown) and return its row, if any"""
+        if self._window is None or self._window_reading is None:
+            self._window = None
+            return []
+
+        row = dict(self._window_reading)
+        for metric, (low, high, total, count, last) in self._window.items():
+            if not count:
+                continue
+            values = {'min': low, 'max': high, 'mean': total / count, 'last': last}
+            row[metric] = values[self.stats.get(metric, 'mean')]
+        self._window = None
+
+        if self.mode == 'window+deadband' and not self._changed(row, now):
+            return []
+        return self._emit(row, now)
+
+    def _changed(self, reading, now):
+        """Whether a row moved past the deadband (or the device has been silent too long)"""
+        if self._last_sent is None:
+            return True
+        now = self.clock() if now is None else now
+        if now - self._last_sent_at >= self.max_silence_seconds:
+            return True
+        for metric in METRICS:
+            value, previous = reading.get(metric), self._last_sent.get(metric)
+            if value is None or previous is None:
+                continue
+            if abs(value - previous) > self.deadband.get(metric, 0.0):
+                return True
+        return False
+
+    def _emit(self, reading, now):
+        self._last_sent = reading
+        self._last_sent_at = self.clock() if now is None else now
+        self.rows_out += 1
+        return [reading]
+
+    def reduction(self):
+        """Readings in per row uploaded so far"""
+        return self.samples_in / self.rows_out if self.rows_out else float('inf')
@@ -0,0 +1,177 @@
+# alerts.py
+import logging
+
+import numpy as np
+
+from config import ALERT_LEVELS, load_settings
+
+logger = logging.getLogger(__name__)
+
+NORMAL, WARNING, CRITICAL = range(len(ALERT_LEVELS))
+
+
+def _run_lengths(cond, starts, carry):
+    """
+    Length of the run of consecutive True values ending at each row
+
+    Runs restart at group starts, where ``carry`` (the run length left
+    over from the previous batch, one value per row) is added on.
+    """
+    idx = np.arange(cond.size)
+    # Anchor = index just before the current run began
+    marker = np.where(~cond, idx, np.where(starts, idx - 1, -1))
+    anchor = np.maximum.accumulate(marker)
+    runs = idx - anchor
+    group_start = np.maximum.accumulate(np.where(starts, idx, 0))
+    continued = cond & (anchor == group_start - 1)
+    return runs + np.where(continued, carry, 0)
+
+
+def _hold(set_mask, reset_mask, starts, initial):
+    """Schmitt trigger: 1 after a set event, 0 after a reset, otherwise hold (per group)"""
+    idx = np.arange(set_mask.size)
+    event = set_mask | reset_mask
+    value = np.where(event, set_mask, initial).astype(np.int8)
+    last = np.maximum.accumulate(np.where(event | starts, idx, 0))
+    return value[last]
+
+
+class AlertEngine:
+    """
+    Classify blocks of readings against SENSOR_THRESHOLDS in one pass.
+
+    Readings come in column form (one NumPy array per metric, plus the
+    device each row belongs to) so thousands of readings from a backfill or
+    a multi-device gateway are classified with a handful of array
+    operations per metric instead of a function call per value.
+
+    Two mechanisms keep alerts from flapping at a threshold:
+
+    - hysteresis: a level is entered at its threshold but only left once
+      the value is back inside it by the metric's margin
+    - debounce: entering or leaving a level takes ``debounce`` consecutive
+      readings that agree
+
+    Both are per device and per metric, and the state carries over from
+    one evaluate() call to the next, so streaming single readings and
+    backfilling whole days give the same result. Rows of one device must
+    be in time order.
+    """
+
+    def __init__(self, thresholds=None, hysteresis=None, debounce=None, environment=None):
+        """
+        Args:
+            thresholds (ThresholdTable): Defaults to the environment's settings
+            hysteresis (dict): Metric -> margin, in the metric's units
+            debounce (int): Consecutive readings needed to change level
+        """
+        settings = load_settings(environment)
+        alert_config = settings.get('ALERT_CONFIG', {})
+        self.thresholds = thresholds or settings.thresholds
+        hysteresis = alert_config.get('hysteresis', {}) if hysteresis is None else hysteresis
+        self.debounce = max(1, alert_config.get('debounce_samples', 1) if debounce is None else debounce)
+        self.margins = np.array([hysteresis.get(name, 0.0) for name in self.thresholds.names],
+                                dtype=np.float64)
+        # (device, metric) -> int array [state >= warning, state >= critical,
+        #                                set runs x2, reset runs x2]
+        self._state = {}
+
+    def classify(self, block):
+        """
+        Raw alert levels, without hysteresis or debounce
+
+        Args:
+            block (dict): Metric -> array of values
+
+        Returns:
+            dict: Metric -> int8 array of levels (0 normal, 1 warning, 2 critical)
+        """
+        return {
+            metric: self._levels(self.thresholds.index[metric], np.asarray(values, dtype=np.float64))
+            for metric, values in block.items() if metric in self.thresholds.index
+        }
+
+    def _levels(self, i, values, margin=0.0):
+        t = self.thresholds
+        critical = (values < t.critical_low[i] + margin) | (values >= t.critical_high[i] - margin)
+        warning = (values < t.warning_low[i] + margin) | (values >= t.warning_high[i] - margin)
+        return np.where(critical, CRITICAL, np.where(warning, WARNING, NORMAL)).astype(np.int8)
+
+    def evaluate(self, block, device_ids=None):
+        """
+        Alert levels with hysteresis and debounce applied
+
+        Args:
+            block (dict): Metric -> array of values, all the same length
+            device_ids: Device per row (scalar or array); rows of one device in time order
+
+        Returns:
+            dict: Metric -> int8 array of levels, in input row order
+        """
+        metrics = [metric for metric in block if metric in self.thresholds.index]
+        if not metrics:
+            return {}
+        n = len(block[metrics[0]])
+        if n == 0:
+            return {metric: np.empty(0, dtype=np.int8) for metric in metrics}
+
+        devices = np.broadcast_to(np.asarray('' if device_ids is None else device_ids), (n,))
+        names, codes = np.unique(devices, return_inverse=True)
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        starts = np.ones(n, dtype=bool)
+        starts[1:] = codes[1:] != codes[:-1]
+        # Last row of each device, where its state is saved
+        ends = np.append(np.flatnonzero(starts)[1:] - 1, n - 1)
+
+        results = {}
+        for metric in metrics:
+            i = self.thresholds.index[metric]
+            values = np.asarray(block[metric], dtype=np.float64)[order]
+            finite = np.isfinite(values)
+            enter = self._levels(i, values)
+            leave = self._levels(i, values, self.margins[i])
+
+            # Per-device state from the previous call, spread over each device's rows
+            carried = np.array([self._state.get((name, metric), np.zeros(6, dtype=np.int64))
+                                for name in names])[codes]
+
+            level = np.zeros(n, dtype=np.int8)
+            saved = np.empty((len(names), 6), dtype=np.int64)
+            for k, threshold in enumerate((WARNING, CRITICAL)):
+                # Missing values neither raise nor clear an alert
+                set_runs = _run_lengths(finite & (enter >= threshold), starts, carried[:, 2 + k])
+                reset_runs = _run_lengths(finite & (leave < threshold), starts, carried[:, 4 + k])
+                state = _hold(set_runs >= self.debounce, reset_runs >= self.debounce,
+                              starts, carried[:, k])
+                level += state
+                saved[:, k] = state[ends]
+                saved[:, 2 + k] = set_runs[ends]
+                saved[:, 4 + k] = reset_runs[ends]
+
+            for name, row in zip(names, saved):
+                self._state[(name, metric)] = row
+
+            results[metric] = np.empty(n, dtype=np.int8)
+            results[metric][order] = level
+
+        return results
+
+    def evaluate_reading(self, reading, device_id=None):
+        """evaluate() for one reading dict, returning metric -> level name"""
+        block = {metric: [reading[metric]] for metric in self.thresholds.names if metric in reading}
+        return {metric: ALERT_LEVELS[levels[0]]
+                for metric, levels in self.evaluate(block, device_id).items()}
+
+    def reset(self, device_id=None):
+        """Forget hysteresis/debounce state for one device, or all devices"""
+        if device_id is None:
+            self._state.clear()
+        else:
+            for key in [key for key in self._state if key[0] == device_id]:
+                del self._state[key]
+
+
+def level_names(levels):
+    """Map an array of level codes to their names"""
+    return np.asarray(ALERT_LEVELS)[levels]
@@ -0,0 +1,271 @@
+# benchmark.py
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, UTC
+
+import numpy as np
+
+# Metric -> direction; only these are checked against a baseline
+TRACKED = {
+    'median_us': 'lower',
+    'per_item_us': 'lower',
+    'p50_ms': 'lower',
+    'p99_ms': 'lower',
+    'cycles_per_s': 'higher'
+}
+
+
+def measure(fn, repeat=50, number=100, warmup=1):
+    """
+    Time ``fn()`` and summarise per-call latency
+
+    Args:
+        fn: Zero-argument callable
+        repeat (int): Timed rounds; percentiles are taken over rounds
+        number (int): Calls per round, so fast functions aren't dominated by timer overhead
+        warmup (int): Untimed rounds first (lookup tables, caches, allocations)
+
+    Returns:
+        dict: calls, median_us, p99_us, min_us
+    """
+    for _ in range(warmup * number):
+        fn()
+
+    rounds = np.empty(repeat, dtype=np.float64)
+    for i in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds[i] = (time.perf_counter() - start) / number
+
+    return {
+        'calls': repeat * number,
+        'median_us': round(float(np.median(rounds)) * 1e6, 3),
+        'p99_us': round(float(np.percentile(rounds, 99)) * 1e6, 3),
+        'min_us': round(float(rounds.min()) * 1e6, 3)
+    }
+
+
+def environment_info():
+    """What a result depends on besides the code: interpreter, libraries, machine, commit"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit
+    }
+
+
+def bench_conversions(settings, repeat=50, seed=0):
+    """ADC -> physical unit conversions in the MQ7, MQ135 and GP2Y1014AU drivers"""
+    from sensors.mq7 import MQ7
+    from sensors.mq135 import MQ135
+    from sensors.gp2y1014au import GP2Y1014AU
+
+    rng = np.random.default_rng(seed)
+    oversampling = settings.get('ADC_OVERSAMPLING', {})
+    drivers = {
+        'mq7': MQ7(32, settings.sensor_params('mq7'), sampling=oversampling.get('mq7')),
+        'mq135': MQ135(35, settings.sensor_params('mq135'), sampling=oversampling.get('mq135')),
+        'gp2y1014au': GP2Y1014AU(34, sampling=oversampling.get('gp2y1014au'))
+    }
+
+    results = {}
+    for name, driver in drivers.items():
+        formula = driver.to_density if name == 'gp2y1014au' else driver.to_ppm
+        lookup = driver.lookup_density if name == 'gp2y1014au' else driver.lookup_ppm
+        read = driver.read if name == 'gp2y1014au' else driver.read_sensor
+        code = float(rng.integers(100, 4000))
+        burst = rng.integers(100, 4000, driver.sampler.samples).astype(np.float64)
+
+        results[f'conversion.{name}.formula_scalar'] = measure(lambda: formula(code), repeat)
+        results[f'conversion.{name}.lookup_scalar'] = measure(lambda: lookup(code), repeat)
+        for label, convert in (('formula', formula), ('lookup', lookup)):
+            result = measure(lambda: driver.sampler.reduce(convert(burst)), repeat)
+            result['per_item_us'] = round(result['median_us'] / burst.size, 4)
+            result['samples'] = int(burst.size)
+            results[f'conversion.{name}.{label}_burst'] = result
+
+        # Whole read against the mock ADC (the dust sensor's LED timing included)
+        number = 2 if name == 'gp2y1014au' else 20
+        results[f'conversion.{name}.read'] = measure(read, max(5, repeat // 5), number)
+
+    return results
+
+
+def bench_handler_cycle(cycles=200, dht_warmup=0.0, latency=0.0, seed=0, environment=None):
+    """
+    Time SensorHandler's read -> validate -> queue -> upload cycle against a
+    local Supabase stand-in, with the sensors fed by the fleet simulator
+    """
+    from local_queue import LocalQueue, QueueDrainer
+    from sensor_handler import SensorHandler
+    from simulator import FleetModel, Simulator
+    from supabase_standin import SupabaseStandIn
+    from uploader import SupabaseUploader
+
+    standin = SupabaseStandIn(latency=latency).start()
+    workdir = tempfile.TemporaryDirectory(prefix='airis-bench-')
+    uploader = SupabaseUploader(standin.url, 'benchmark', max_attempts=1)
+    # Not started: drain() below uploads inline, as send_to_supabase() does without a drainer thread
+    drainer = QueueDrainer(LocalQueue(os.path.join(workdir.name, 'queue.db')), uploader.send_batch,
+                           batch_size=uploader.max_batch_size)
+
+    handler = SensorHandler('BENCH_00001', drainer=drainer, environment=environment)
+    Simulator(FleetModel(1, seed), dht_warmup=dht_warmup).attach(handler, 0)
+
+    stages = {stage: np.empty(cycles) for stage in ('read', 'build', 'validate', 'queue', 'upload', 'total')}
+    sensors = {name: np.empty(cycles) for name in handler.SENSOR_READERS}
+    failed = 0
+    started = time.perf_counter()
+    try:
+        for i in range(cycles):
+            t0 = time.perf_counter()
+            reading = handler.read_sensors()
+            t1 = time.perf_counter()
+            if reading is None:
+                failed += 1
+                reading = handler.build_reading({metric: 0.0 for metric in
+                                                 ('co2', 'pm25', 'co', 'temperature', 'humidity')})
+            validated = handler.validate_sensor_data(reading)
+            t2 = time.perf_counter()
+            handler.queue_reading(validated)
+            t3 = time.perf_counter()
+            drainer.drain()
+            t4 = time.perf_counter()
+
+            # read_sensors() = parallel sensor reads + assembling the reading (incl. alerts)
+            read = handler.read_pipeline.last_cycle_time
+            stages['read'][i] = read
+            stages['build'][i] = max(0.0, t1 - t0 - read)
+            stages['validate'][i] = t2 - t1
+            stages['queue'][i] = t3 - t2
+            stages['upload'][i] = t4 - t3
+            stages['total'][i] = t4 - t0
+            for name in sensors:
+                sensors[name][i] = handler.read_pipeline.latencies.get(name, np.nan)
+        elapsed = time.perf_counter() - started
+    finally:
+        handler.read_pipeline.shutdown()
+        handler.queue.close()
+        uploader.close()
+        standin.stop()
+        workdir.cleanup()
+
+    def summary(values):
+        values = values[np.isfinite(values)] * 1000
+        return {
+            'p50_ms': round(float(np.percentile(values, 50)), 3),
+            'p99_ms': round(float(np.percentile(values, 99)), 3),
+            'max_ms': round(float(values.max()), 3)
+        }
+
+    results = {f'handler.{stage}': summary(values) for stage, values in stages.items()}
+    results.update({f'handler.read.{name}': summary(values) for name, values in sensors.items()})
+    results['handler.total'].update({
+        'cycles': cycles,
+        'failed_reads': failed,
+        'cycles_per_s': round(cycles / elapsed, 1),
+        'rows_received': standin.stats()['rows']
+    })
+    return results
+
+
+def run_benchmarks(cycles=200, repeat=50, dht_warmup=0.0, latency=0.0, seed=0, environment=None,
+                   only=None):
+    """Run the suite and return the JSON-serialisable report"""
+    from config import load_settings
+
+    settings = load_settings(environment)
+    results = {}
+    if only in (None, 'conversions'):
+        results.update(bench_conversions(settings, repeat, seed))
+    if only in (None, 'handler'):
+        results.update(bench_handler_cycle(cycles, dht_warmup, latency, seed, environment))
+
+    return {
+        'suite': 'iot',
+        'created_at': datetime.now(UTC).isoformat(),
+        'environment': environment_info(),
+        'parameters': {'cycles': cycles, 'repeat': repeat, 'dht_warmup': dht_warmup,
+                       'latency': latency, 'seed': seed, 'settings_environment': settings.environment},
+        'results': results
+    }
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Tracked metrics that got worse than the baseline by more than ``tolerance``
+
+    Returns:
+        list: (benchmark, metric, baseline value, current value) per regression
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        for metric, direction in TRACKED.items():
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old if direction == 'lower' else (old - new) / old
+            if change > tolerance:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark sensor conversions and the SensorHandler upload cycle"
+    )
+    parser.add_argument('--only', choices=('conversions', 'handler'))
+    parser.add_argument('--cycles', type=int, default=200, help="Handler cycles to time")
+    parser.add_argument('--repeat', type=int, default=50, help="Timed rounds per conversion benchmark")
+    parser.add_argument('--dht-warmup', type=float, default=0.0,
+                        help="DHT22 warm-up per read (the real driver waits 0.2 s)")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Stand-in response delay")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--environment', help="Settings profile (DEVICE_CONFIGURATIONS key)")
+    parser.add_argument('--json', help="Write the report to this file")
+    parser.add_argument('--compare', help="Baseline report; exit 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed slowdown before a metric counts as a regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    from log_setup import setup_logging
+    setup_logging({'log_level': 'WARNING', 'log_file': 'benchmark.log'}, quiet=True)
+
+    report = run_benchmarks(cycles=args.cycles, repeat=args.repeat, dht_warmup=args.dht_warmup,
+                            latency=args.latency_ms / 1000, seed=args.seed,
+                            environment=args.environment, only=args.only)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.json:
+        with open(args.json, 'w') as f:
+            f.write(output + '\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old} -> {new}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
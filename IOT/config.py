@@ -1,7 +1,13 @@
 import os
+import json
 import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
+
+import numpy as np
 from dotenv import load_dotenv
-from typing import Dict, Any
 
 # Load environment variables
 load_dotenv()
@@ -28,15 +34,8 @@ MAX_RETRIES = 3        # maximum number of retry attempts for failed readings
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 LOG_FILE = os.getenv('LOG_FILE', 'sensor_logs.txt')
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL.upper()),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+# Handlers are installed once by log_setup.setup_logging() (which also
+# honours LOG_LEVEL/LOG_FILE); importing config no longer adds its own
 logger = logging.getLogger(__name__)
 
 # Device Configuration
@@ -101,64 +100,301 @@ SENSOR_THRESHOLDS: Dict[str, Dict[str, Any]] = {
     }
 }
 
-def validate_sensor_reading(sensor_type: str, value: float) -> bool:
+# Alert flapping control (alerts.AlertEngine)
+ALERT_CONFIG: Dict[str, Any] = {
+    # Back inside a threshold by this margin before an alert clears
+    'hysteresis': {
+        'co2': 50,
+        'pm25': 2,
+        'co': 2,
+        'temperature': 0.5,
+        'humidity': 2
+    },
+    'debounce_samples': 2  # Consecutive readings needed to change alert level
+}
+
+# Environment variables that override a top-level setting directly
+ENV_OVERRIDES = {
+    'DEVICE_ID': 'DEVICE_ID',
+    'DEVICE_LOCATION': 'DEVICE_LOCATION',
+    'SAMPLING_INTERVAL': 'SAMPLING_INTERVAL',
+    'SUPABASE_URL': 'SUPABASE_URL',
+    'SUPABASE_ANON_KEY': 'SUPABASE_KEY',
+    'LOG_LEVEL': 'LOG_LEVEL',
+    'LOG_FILE': 'LOG_FILE'
+}
+
+# Nested overrides: AIRIS__SENSOR_THRESHOLDS__CO2__MAX=1200 (values parsed as JSON if possible)
+ENV_PREFIX = 'AIRIS__'
+
+# Selects the DEVICE_CONFIGURATIONS profile when no environment is passed
+ENVIRONMENT_VARIABLE = 'AIRIS_ENVIRONMENT'
+
+ALERT_LEVELS = ('normal', 'warning', 'critical')
+
+# Base layer: the defaults defined above, captured before anything is merged in
+_DEFAULTS = {
+    name: value for name, value in globals().items()
+    if name.isupper() and not name.startswith('_') and name not in (
+        'ENV_OVERRIDES', 'ENV_PREFIX', 'ENVIRONMENT_VARIABLE', 'ALERT_LEVELS'
+    )
+}
+
+
+def deep_merge(base: Mapping, override: Mapping) -> Dict[str, Any]:
+    """Recursively merge ``override`` into a copy of ``base``; dicts merge, anything else replaces"""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, Mapping) and isinstance(merged.get(key), Mapping):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def freeze(value: Any) -> Any:
+    """Read-only view of nested dicts/lists"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def _parse_env_value(value: str) -> Any:
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _local_layer() -> Dict[str, Any]:
+    """Module-level settings from local_config.py, if present"""
+    try:
+        import local_config
+    except ImportError:
+        return {}
+    return {
+        name: value for name, value in vars(local_config).items()
+        if name.isupper() and not name.startswith('_')
+    }
+
+
+def _env_layer(environ: Mapping[str, str]) -> Dict[str, Any]:
+    layer: Dict[str, Any] = {}
+    for variable, name in ENV_OVERRIDES.items():
+        if variable in environ:
+            layer[name] = _parse_env_value(environ[variable])
+
+    for variable, value in environ.items():
+        if not variable.startswith(ENV_PREFIX):
+            continue
+        path = variable[len(ENV_PREFIX):].split('__')
+        # Top-level names are upper case, nested keys lower case like the dicts above
+        keys = [path[0].upper()] + [key.lower() for key in path[1:]]
+        node = layer
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = _parse_env_value(value)
+    return layer
+
+
+@dataclass(frozen=True)
+class ThresholdTable:
+    """
+    SENSOR_THRESHOLDS compiled into flat arrays, one slot per sensor type.
+
+    Single-level alerts (value >= threshold) and low/high ranges are both
+    stored as [low, high) bounds so one comparison pair classifies any
+    sensor. Arrays are read-only and line up with ``names`` for
+    vectorized use; ``rows`` holds the same numbers as Python floats for
+    fast scalar lookups.
+    """
+    names: Tuple[str, ...]
+    index: Mapping[str, int]
+    minimum: np.ndarray
+    maximum: np.ndarray
+    warning_low: np.ndarray
+    warning_high: np.ndarray
+    critical_low: np.ndarray
+    critical_high: np.ndarray
+    rows: Tuple[Tuple[float, ...], ...] = field(repr=False)
+
+    @classmethod
+    def compile(cls, thresholds: Mapping[str, Mapping[str, Any]]) -> 'ThresholdTable':
+        names = tuple(thresholds)
+        columns = np.empty((6, len(names)), dtype=np.float64)
+        for i, name in enumerate(names):
+            spec = thresholds[name]
+            levels = spec.get('alert_level', {})
+            columns[0, i] = spec.get('min', -np.inf)
+            columns[1, i] = spec.get('max', np.inf)
+            for row, level in ((2, 'warning'), (4, 'critical')):
+                bound = levels.get(level, np.inf)
+                if isinstance(bound, Mapping):
+                    # value < low or value > high; store high as an inclusive bound
+                    columns[row, i] = bound.get('low', -np.inf)
+                    columns[row + 1, i] = np.nextafter(bound.get('high', np.inf), np.inf)
+                else:
+                    columns[row, i] = -np.inf
+                    columns[row + 1, i] = bound
+
+        columns.setflags(write=False)
+        return cls(
+            names=names,
+            index=MappingProxyType({name: i for i, name in enumerate(names)}),
+            minimum=columns[0],
+            maximum=columns[1],
+            warning_low=columns[2],
+            warning_high=columns[3],
+            critical_low=columns[4],
+            critical_high=columns[5],
+            rows=tuple(tuple(float(v) for v in columns[:, i]) for i in range(len(names)))
+        )
+
+    def bounds(self, sensor_type: str) -> Optional[Tuple[float, float]]:
+        """(min, max) valid range for a sensor type, or None if unknown"""
+        i = self.index.get(sensor_type)
+        if i is None:
+            return None
+        return self.rows[i][0], self.rows[i][1]
+
+    def is_valid(self, sensor_type: str, value: float) -> bool:
+        i = self.index.get(sensor_type)
+        if i is None:
+            return True
+        row = self.rows[i]
+        return row[0] <= value <= row[1]
+
+    def alert_level(self, sensor_type: str, value: float) -> str:
+        i = self.index.get(sensor_type)
+        if i is None:
+            return 'normal'
+        _, _, warning_low, warning_high, critical_low, critical_high = self.rows[i]
+        if value < critical_low or value >= critical_high:
+            return 'critical'
+        if value < warning_low or value >= warning_high:
+            return 'warning'
+        return 'normal'
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Effective configuration: defaults, then local_config.py, then the
+    environment profile from DEVICE_CONFIGURATIONS, then environment
+    variables. Built once per environment by load_settings() and read-only.
+    """
+    environment: Optional[str]
+    device_id: str
+    device_location: str
+    sampling_interval: float
+    sensor_calibration: Mapping[str, Mapping[str, float]]
+    sensor_thresholds: Mapping[str, Mapping[str, Any]]
+    thresholds: ThresholdTable
+    values: Mapping[str, Any] = field(repr=False)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Any other merged top-level setting, e.g. settings.get('NETWORK_CONFIG', {})"""
+        return self.values.get(name, default)
+
+    def sensor_params(self, sensor: str) -> Dict[str, Any]:
+        """Driver params (MQ7/MQ135) for the configured calibration"""
+        calibration = self.sensor_calibration[sensor]
+        return {
+            'A': calibration['slope'],
+            'B': calibration['intercept'],
+            'RATIO_CLEAN_AIR': calibration['r0'],
+            'VOLTAGE_RESOLUTION': 5,
+            'ADC_BIT_RESOLUTION': int(self.values.get('ADC_WIDTH', 4095)).bit_length()
+        }
+
+
+def build_settings(environment: Optional[str] = None,
+                   environ: Optional[Mapping[str, str]] = None) -> Settings:
+    """Merge all layers into a new Settings (uncached, see load_settings)"""
+    environ = os.environ if environ is None else environ
+    merged = deep_merge(_DEFAULTS, _local_layer())
+
+    environment = environment or environ.get(ENVIRONMENT_VARIABLE) or None
+    if environment is not None:
+        profiles = merged.get('DEVICE_CONFIGURATIONS', {})
+        if environment not in profiles:
+            raise ValueError(f"Unknown environment '{environment}'. Expected one of {sorted(profiles)}")
+        merged = deep_merge(merged, profiles[environment])
+
+    merged = deep_merge(merged, _env_layer(environ))
+    values = freeze(merged)
+    return Settings(
+        environment=environment,
+        device_id=values['DEVICE_ID'],
+        device_location=values['DEVICE_LOCATION'],
+        sampling_interval=float(values['SAMPLING_INTERVAL']),
+        sensor_calibration=values['SENSOR_CALIBRATION'],
+        sensor_thresholds=values['SENSOR_THRESHOLDS'],
+        thresholds=ThresholdTable.compile(values['SENSOR_THRESHOLDS']),
+        values=values
+    )
+
+
+@lru_cache(maxsize=None)
+def load_settings(environment: Optional[str] = None) -> Settings:
+    """Settings for an environment profile (None: AIRIS_ENVIRONMENT or base), built once"""
+    return build_settings(environment)
+
+
+def reload_settings() -> None:
+    """Drop cached settings so the next load_settings() re-reads every layer"""
+    load_settings.cache_clear()
+
+
+def load_environment_config(environment: str = 'default') -> Mapping[str, Any]:
+    """
+    Load configuration based on environment context
+
+    Args:
+        environment (str): Environment identifier
+
+    Returns:
+        Mapping: Effective settings for the environment, merged over the base config
+    """
+    profiles = load_settings().get('DEVICE_CONFIGURATIONS', {})
+    return load_settings(environment if environment in profiles else None).values
+
+
+def validate_sensor_reading(sensor_type: str, value: float, environment: Optional[str] = None) -> bool:
     """
     Validate sensor reading against defined thresholds
     
     Args:
         sensor_type (str): Type of sensor
         value (float): Sensor reading value
+        environment (str): Environment profile whose thresholds apply
     
     Returns:
         bool: Whether the reading is within acceptable range
     """
-    if sensor_type not in SENSOR_THRESHOLDS:
+    thresholds = load_settings(environment).thresholds
+    if sensor_type not in thresholds.index:
         logger.warning(f"No thresholds defined for sensor type: {sensor_type}")
         return True
-    
-    thresholds = SENSOR_THRESHOLDS[sensor_type]
-    is_valid = thresholds['min'] <= value <= thresholds['max']
-    
+
+    is_valid = thresholds.is_valid(sensor_type, value)
     if not is_valid:
         logger.error(f"Sensor {sensor_type} reading {value} out of range")
-    
+
     return is_valid
 
-def get_sensor_alert_level(sensor_type: str, value: float) -> str:
+def get_sensor_alert_level(sensor_type: str, value: float, environment: Optional[str] = None) -> str:
     """
     Determine alert level for a sensor reading
     
     Args:
         sensor_type (str): Type of sensor
         value (float): Sensor reading value
+        environment (str): Environment profile whose thresholds apply
     
     Returns:
         str: Alert level (normal/warning/critical)
     """
-    if sensor_type not in SENSOR_THRESHOLDS:
-        return 'normal'
-    
-    thresholds = SENSOR_THRESHOLDS[sensor_type]['alert_level']
-    
-    if isinstance(thresholds['warning'], dict):
-        # For multi-range thresholds like temperature and humidity
-        if (value < thresholds['warning']['low'] or 
-            value > thresholds['warning']['high']):
-            return 'warning'
-        if (value < thresholds['critical']['low'] or 
-            value > thresholds['critical']['high']):
-            return 'critical'
-    else:
-        # For single-range thresholds like CO2, PM2.5, CO
-        if value >= thresholds['critical']:
-            return 'critical'
-        if value >= thresholds['warning']:
-            return 'warning'
-    
-    return 'normal'
-
-# Optional: Environment-specific overrides
-try:
-    from local_config import *
-except ImportError:
-    pass
\ No newline at end of file
+    return load_settings(environment).thresholds.alert_level(sensor_type, value)
@@ -0,0 +1,217 @@
+# gateway.py
+import argparse
+import asyncio
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from sensor_handler import SensorHandler, create_drainer
+from raw_capture import RawCaptureLog
+from log_setup import setup_logging
+from notifications import create_dispatcher
+from config import load_settings
+from metrics import start_exporter
+
+try:
+    from local_config import GATEWAY_CONFIG, DEVICE_CONFIGURATIONS
+except ImportError:
+    GATEWAY_CONFIG = {}
+    DEVICE_CONFIGURATIONS = {}
+
+logger = logging.getLogger(__name__)
+
+
+class Gateway:
+    """
+    Drive many device pipelines from one asyncio event loop.
+
+    Each device gets its own sampling task scheduled against absolute
+    deadlines, so read and queueing time never push the next sample back.
+    Blocking sensor reads run on a thread pool, and the individual sensors
+    of every device share one bounded pool rather than a thread each.
+    Readings from every device go into one shared local queue, and a
+    separate upload task flushes it in batches and retries on failure
+    without holding up sampling.
+    """
+
+    def __init__(self, devices, drainer=None, read_workers=None, stagger_start=None,
+                 upload_retry_delay=None, metrics_config=None, sensor_read_workers=None):
+        """
+        Args:
+            devices (list): (device_id, interval_seconds) pairs, or
+                (device_id, interval_seconds, environment) to apply a profile
+            drainer (QueueDrainer): Shared queue/uploader, built from config if omitted
+            read_workers (int): Devices read at once
+            sensor_read_workers (int): Threads shared by all devices' sensor reads,
+                default enough for ``read_workers`` devices to read every sensor at once
+            metrics_config (dict): METRICS_CONFIG-style dict, defaults to the settings
+        """
+        self.drainer = drainer or create_drainer()
+        self.raw_capture = RawCaptureLog.from_config()
+        # One dispatcher for all devices so an incident becomes a single digest
+        self.notifier = create_dispatcher()
+        self.read_workers = read_workers or GATEWAY_CONFIG.get('read_workers', 8)
+        # Separate from the device pool, whose threads wait on these reads
+        self.sensor_read_workers = (sensor_read_workers or GATEWAY_CONFIG.get('sensor_read_workers')
+                                    or self.read_workers * len(SensorHandler.SENSOR_READERS))
+        self._read_executor = ThreadPoolExecutor(max_workers=self.sensor_read_workers,
+                                                 thread_name_prefix='sensor-read')
+        self.devices = [
+            (SensorHandler(device_id=device[0], drainer=self.drainer,
+                           environment=device[2] if len(device) > 2 else None,
+                           raw_capture=self.raw_capture, notifier=self.notifier,
+                           read_executor=self._read_executor), device[1])
+            for device in devices
+        ]
+        self.stagger_start = (GATEWAY_CONFIG.get('stagger_start', True)
+                              if stagger_start is None else stagger_start)
+        self.upload_retry_delay = (GATEWAY_CONFIG.get('upload_retry_delay_seconds', 5)
+                                   if upload_retry_delay is None else upload_retry_delay)
+        self.metrics_config = (load_settings().get('METRICS_CONFIG', {})
+                               if metrics_config is None else metrics_config)
+        self.metrics_server = None
+        self._executor = None
+        self._flush_event = None
+        self._pending = 0
+
+    async def _run_blocking(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _sample_device(self, handler, interval, offset):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + offset
+
+        while True:
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                data = await self._run_blocking(handler.read_sensors)
+                if data and await self._run_blocking(handler.queue_reading, data):
+                    self._pending += 1
+                    if self._pending >= self.drainer.batch_size:
+                        self._flush_event.set()
+                elif not data:
+                    logger.warning(f"{handler.device_id}: failed to read sensor data")
+            except Exception as e:
+                logger.error(f"{handler.device_id}: sampling error: {e}")
+
+            # Advance by whole intervals; skip ticks we overran instead of bursting
+            deadline += interval
+            now = loop.time()
+            if now > deadline:
+                missed = math.ceil((now - deadline) / interval)
+                logger.warning(f"{handler.device_id}: sampling overran by {missed} interval(s)")
+                deadline += missed * interval
+
+    async def _upload_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), self.drainer.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            self._pending = 0
+
+            # Uploads use their own threads so reads never wait behind the network
+            # and retry until the backlog is empty
+            while True:
+                try:
+                    if await asyncio.to_thread(self.drainer.drain):
+                        break
+                except Exception as e:
+                    logger.error(f"Upload error: {e}")
+                await asyncio.sleep(self.upload_retry_delay)
+
+    async def run(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.read_workers, thread_name_prefix='gateway')
+        self._flush_event = asyncio.Event()
+        if self.notifier is not None and not self.notifier.is_alive():
+            self.notifier.start()
+        if self.metrics_server is None:
+            self.metrics_server = start_exporter(self.metrics_config)
+
+        tasks = [asyncio.create_task(self._upload_loop(), name='upload')]
+        for index, (handler, interval) in enumerate(self.devices):
+            offset = interval * index / len(self.devices) if self.stagger_start else 0
+            tasks.append(asyncio.create_task(
+                self._sample_device(handler, interval, offset),
+                name=f"sample-{handler.device_id}"
+            ))
+
+        logger.info(f"Gateway running {len(self.devices)} devices")
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.close()
+
+    def close(self):
+        """Flush the queue and release resources"""
+        # Handlers share the drainer, capture log and notifier, so this only
+        # stops their reads and flushes their open aggregation windows
+        for handler, _ in self.devices:
+            handler.cleanup()
+        try:
+            self.drainer.drain()
+        except Exception as e:
+            logger.error(f"Final queue flush failed: {e}")
+        self.drainer.queue.close()
+        if self.raw_capture:
+            self.raw_capture.close()
+        if self.notifier is not None and self.notifier.is_alive():
+            self.notifier.stop(timeout=15)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._read_executor.shutdown(wait=False, cancel_futures=True)
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+            self.metrics_server = None
+
+
+def parse_devices(args):
+    devices = [(device_id, args.interval) for device_id in args.device]
+    for environment in args.environment:
+        env_config = DEVICE_CONFIGURATIONS.get(environment)
+        if env_config is None:
+            raise SystemExit(f"Unknown environment: {environment}")
+        devices.append((env_config['DEVICE_ID'], env_config.get('SAMPLING_INTERVAL', args.interval),
+                        environment))
+    return devices
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several AIRIS devices from one process")
+    parser.add_argument('--device', action='append', default=[], help="Device ID (repeatable)")
+    parser.add_argument('--environment', action='append', default=[],
+                        help="Add the device from DEVICE_CONFIGURATIONS (repeatable)")
+    parser.add_argument('--interval', type=float, default=30, help="Sampling interval in seconds")
+    parser.add_argument('--quiet', action='store_true', default=None,
+                        help="No console logging (log file only)")
+    parser.add_argument('--metrics-port', type=int,
+                        help="Serve Prometheus metrics on this port (overrides METRICS_CONFIG)")
+    args = parser.parse_args()
+
+    setup_logging(quiet=args.quiet)
+
+    devices = parse_devices(args)
+    if not devices:
+        parser.error("At least one --device or --environment is required")
+
+    metrics_config = None
+    if args.metrics_port is not None:
+        metrics_config = {**load_settings().get('METRICS_CONFIG', {}), 'enabled': True,
+                          'port': args.metrics_port}
+
+    try:
+        asyncio.run(Gateway(devices, metrics_config=metrics_config).run())
+    except KeyboardInterrupt:
+        logger.info("Gateway stopped by user")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,9 @@ DEVICE_CONFIGURATIONS = {
         'DEVICE_ID': 'AIRIS_OFFICE_01',
         'DEVICE_LOCATION': 'Main Office Conference Room',
         'SAMPLING_INTERVAL': 15,  # More frequent sampling
+        'EDGE_AGGREGATION': {
+            'mode': 'none'  # Opt in with 'window+deadband': 5 minute rows, skipped while steady
+        },
         'SENSOR_THRESHOLDS': {
             'co2': {
                 'max': 1000,  # Lower threshold for office environment
@@ -40,6 +43,9 @@ DEVICE_CONFIGURATIONS = {
         'DEVICE_ID': 'AIRIS_INDUSTRIAL_001',
         'DEVICE_LOCATION': 'Factory Floor',
         'SAMPLING_INTERVAL': 10,  # Very frequent sampling
+        'EDGE_AGGREGATION': {
+            'mode': 'none'  # Opt in with 'window' and 'window_seconds': 60 for minute peak rows
+        },
         'SENSOR_THRESHOLDS': {
             'co': {
                 'max': 50,  # Stricter CO limits
@@ -59,6 +65,49 @@ DEVICE_CONFIGURATIONS = {
     }
 }
 
+# Edge aggregation before upload (aggregation.EdgeAggregator). Sample often
+# (SAMPLING_INTERVAL) and upload one row per window and/or only on change.
+# mode: 'none', 'window', 'deadband' or 'window+deadband'. Off by default, so
+# every reading is uploaded; a profile opts in by setting 'EDGE_AGGREGATION'
+# (any key here can be overridden there).
+EDGE_AGGREGATION = {
+    'mode': 'none',
+    'window_seconds': 300,
+    # Value uploaded per metric: min, max, mean or last (max keeps pollutant peaks)
+    'stats': {'co2': 'max', 'pm25': 'max', 'co': 'max', 'temperature': 'mean', 'humidity': 'mean'},
+    # Minimum change that counts as new data in the deadband modes
+    'deadband': {'co2': 25, 'pm25': 0.05, 'co': 1, 'temperature': 0.3, 'humidity': 2},
+    'max_silence_seconds': 900  # Upload anyway after this long (heartbeat)
+}
+
+# Per-sensor sampling intervals in seconds. Sensors sampled faster than the
+# device's SAMPLING_INTERVAL report their latest value; unlisted sensors are
+# read once per report. Environments may override via 'SENSOR_SAMPLING_INTERVALS'.
+SENSOR_SAMPLING_INTERVALS = {
+    'gp2y1014au': 10,  # PM spikes are short-lived
+    'mq7': 10,
+    'mq135': 10
+}
+
+# Time budget per sensor read in seconds; a slower read fails that cycle
+SENSOR_READ_TIMEOUTS = {
+    'gp2y1014au': 0.5,
+    'mq7': 0.5,
+    'mq135': 0.5,
+    'dht22': 2.0  # Includes the 200 ms warm-up
+}
+
+# ADC oversampling per analog sensor: samples per reading and the filter
+# applied to them (median, trimmed_mean, mean or ema)
+ADC_OVERSAMPLING = {
+    'mq7': {'samples': 32, 'filter': 'median'},
+    'mq135': {'samples': 32, 'filter': 'median'},
+    # Each sample is one LED pulse (~3 ms), so one keeps a read as cheap as a
+    # single-shot read. 8 samples with 'trimmed_mean' (trim_fraction 0.25)
+    # reject dust spikes but take ~25 ms per read.
+    'gp2y1014au': {'samples': 1, 'filter': 'median'}
+}
+
 # Custom calibration factors for specific sensor units
 CUSTOM_CALIBRATION = {
     'mq7_sensor_batch_1': {
@@ -73,19 +122,58 @@ CUSTOM_CALIBRATION = {
     }
 }
 
+# Which CUSTOM_CALIBRATION batch each installed MQ sensor belongs to,
+# e.g. {'mq7': 'mq7_sensor_batch_1'}; unlisted sensors use the defaults
+SENSOR_CALIBRATION_BATCHES = {}
+
 # Logging configurations
 LOGGING_CONFIG = {
     'log_level': 'DEBUG',  # More verbose logging
     'log_file': '/var/log/airis/sensor_logs.log',
     'max_log_size_mb': 10,  # Log rotation
-    'backup_count': 5  # Number of backup log files
+    'backup_count': 5,  # Number of backup log files
+    'quiet': False,  # True: no console output, log file only (production)
+    'console_level': 'INFO',
+    'json': True,  # JSON lines in the log file
+    'queue_size': 10000  # Records buffered for the writer thread before dropping
 }
 
 # Network retry configurations
 NETWORK_CONFIG = {
     'max_connection_attempts': 5,
     'connection_timeout_seconds': 10,
-    'retry_delay_seconds': 5
+    'retry_delay_seconds': 5,  # Base delay, doubled per attempt with jitter
+    'max_retry_delay_seconds': 60,
+    'pool_size': 4  # Keep-alive connections to Supabase
+}
+
+# Local store-and-forward queue (readings are persisted before upload)
+LOCAL_QUEUE_CONFIG = {
+    'path': 'sensor_queue.db',
+    'compact_every_rows': 1000  # Reclaim disk space after this many acked rows
+}
+
+# Raw ADC capture for offline recalibration (python raw_capture.py --help)
+RAW_CAPTURE_CONFIG = {
+    'enabled': False,
+    'directory': 'raw_capture',
+    'max_file_mb': 64  # Start a new capture file after this size
+}
+
+# Asyncio gateway driving several devices from one process (gateway.py)
+GATEWAY_CONFIG = {
+    'read_workers': 8,  # Devices read at once (threads for blocking read cycles)
+    # Threads shared by all devices' sensor reads, read_workers x sensors by default
+    # 'sensor_read_workers': 32,
+    'stagger_start': True,  # Spread device sampling across the interval
+    'upload_retry_delay_seconds': 5  # Wait after a failed flush before retrying
+}
+
+# Prometheus-style metrics (metrics.py); the gateway serves GET /metrics when enabled
+METRICS_CONFIG = {
+    'enabled': False,  # Off: instrumentation costs one attribute check per update
+    'host': '127.0.0.1',  # '0.0.0.0' to let a remote Prometheus scrape the gateway
+    'port': 9108
 }
 
 # Optional: Environmental context settings
@@ -105,15 +193,26 @@ FEATURE_FLAGS = {
 # Optional cloud synchronization settings
 CLOUD_SYNC_CONFIG = {
     'sync_interval_minutes': 30,
-    'max_batch_size': 100,
-    'compression_enabled': True
+    'max_batch_size': 100,  # Rows per upload request
+    # A server that refuses gzip bodies gets the batch uncompressed, then no more gzip
+    'compression_enabled': True,
+    'flush_interval_seconds': 60  # Upload a partial batch after this long
 }
 
 # Optional error handling and notification settings
 ERROR_HANDLING = {
     'send_email_on_critical_error': True,
     'email_recipients': ['admin@example.com', 'support@example.com'],
-    'max_email_frequency_hours': 4
+    'max_email_frequency_hours': 4,  # At most one (digest) email per window
+    'smtp_host': None,  # e.g. 'localhost' with 'python -m aiosmtpd -n -l localhost:1025'
+    'smtp_port': 25,
+    'smtp_sender': 'airis@localhost',
+    'smtp_use_tls': False,
+    'webhook_url': None,  # e.g. 'http://127.0.0.1:8025/' with 'python notifications.py'
+    'webhook_min_level': 'warning',
+    'digest_interval_seconds': 60,  # Alerts are aggregated into one message per window
+    'alerts_per_hour': 4,  # Token bucket refill per device/metric
+    'alert_burst': 2  # Alerts a device/metric may raise at once
 }
 
 # Function to load environment-specific configuration
@@ -0,0 +1,252 @@
+# local_queue.py
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from metrics import QUEUE_ROWS, ROWS_DEAD_LETTERED, ROWS_QUEUED, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SECONDS = STAGE_SECONDS.labels('queue')
+
+
+class BatchRejected(Exception):
+    """
+    Raised by an upload function when the server refused the rows
+    themselves (malformed row, unknown column, body too large), so sending
+    the same batch again can never succeed
+    """
+
+
+class LocalQueue:
+    """
+    Durable store-and-forward queue for sensor rows, backed by SQLite in WAL mode.
+
+    Every reading is appended here before any upload is attempted, so a
+    reboot or a long uplink outage doesn't lose data. Rows stay in the
+    queue until the uploader acknowledges them. Rows the server rejects
+    are moved to a ``dead_letter`` table, where they can be inspected and
+    requeued once the cause is fixed.
+    """
+
+    def __init__(self, path='sensor_queue.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+
+        with self._lock:
+            # auto_vacuum must be set before the table exists to take effect
+            self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL survives power loss up to the last checkpointed commit
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pending (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    payload TEXT NOT NULL,
+                    queued_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dead_letter (
+                    seq INTEGER PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    queued_at REAL NOT NULL,
+                    failed_at REAL NOT NULL,
+                    error TEXT
+                )
+                """
+            )
+
+    def enqueue(self, row):
+        """Append one row to the queue"""
+        self.enqueue_many([row])
+
+    def enqueue_many(self, rows):
+        """Append several rows in a single transaction"""
+        start = time.perf_counter()
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO pending (payload, queued_at) VALUES (?, ?)",
+                [(json.dumps(row), now) for row in rows]
+            )
+        QUEUE_SECONDS.observe(time.perf_counter() - start)
+        ROWS_QUEUED.inc(len(rows))
+
+    def peek(self, limit):
+        """
+        Return the oldest rows without removing them
+
+        Returns:
+            list: (seq, row) tuples in insertion order
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT seq, payload FROM pending ORDER BY seq LIMIT ?", (limit,)
+            )
+            return [(seq, json.loads(payload)) for seq, payload in cursor.fetchall()]
+
+    def ack(self, seqs):
+        """Remove rows that were uploaded successfully"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("DELETE FROM pending WHERE seq = ?", [(seq,) for seq in seqs])
+            self._conn.execute("COMMIT")
+
+    def dead_letter(self, seqs, error=None):
+        """Move rows the server rejected out of the queue, in one transaction"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO dead_letter (seq, payload, queued_at, failed_at, error) "
+                "SELECT seq, payload, queued_at, ?, ? FROM pending WHERE seq = ?",
+                [(now, error, seq) for seq in seqs]
+            )
+            self._conn.executemany("DELETE FROM pending WHERE seq = ?", [(seq,) for seq in seqs])
+            self._conn.execute("COMMIT")
+
+    def dead_letter_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
+
+    def requeue_dead_letters(self):
+        """
+        Put every dead-lettered row back at the end of the queue
+
+        Returns:
+            int: Number of rows requeued
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            cursor = self._conn.execute(
+                "INSERT INTO pending (payload, queued_at) "
+                "SELECT payload, queued_at FROM dead_letter ORDER BY seq"
+            )
+            self._conn.execute("DELETE FROM dead_letter")
+            self._conn.execute("COMMIT")
+        return cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def compact(self):
+        """Fold the WAL back into the database and release freed pages"""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("PRAGMA incremental_vacuum")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class QueueDrainer(threading.Thread):
+    """
+    Background thread that replays queued rows in bulk.
+
+    ``upload_fn`` receives a list of rows and returns True once they are
+    stored remotely; only then are they removed from the queue. While the
+    uplink is down the backlog simply grows and is sent once it recovers.
+
+    If ``upload_fn`` raises BatchRejected the batch is split in half and
+    each half retried, down to the single rows at fault, which are
+    dead-lettered. The rest of the batch is stored and the queue keeps
+    moving instead of retrying the same head batch forever.
+    """
+
+    def __init__(self, queue, upload_fn, batch_size=100, interval=5, compact_every=1000):
+        super().__init__(name='queue-drainer', daemon=True)
+        self.queue = queue
+        self.upload_fn = upload_fn
+        self.batch_size = batch_size
+        self.interval = interval
+        self.compact_every = compact_every
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._acked_since_compact = 0
+        self._pending_since_drain = 0
+        # Counted at scrape time only
+        QUEUE_ROWS.set_function(queue.__len__)
+
+    def notify_enqueued(self, count=1):
+        """Tell the drainer about new rows; wakes it once a full batch is waiting"""
+        self._pending_since_drain += count
+        if self._pending_since_drain >= self.batch_size:
+            self._wake_event.set()
+
+    def wake(self):
+        """Drain now instead of waiting for the next interval"""
+        self._wake_event.set()
+
+    def stop(self, timeout=None):
+        """
+        Stop after the batch in flight; unsent rows stay queued for the next start
+
+        Returns:
+            bool: True if the thread finished within ``timeout``
+        """
+        self._stop_event.set()
+        self._wake_event.set()
+        self.join(timeout)
+        return not self.is_alive()
+
+    def drain(self):
+        """
+        Upload queued rows until the queue is empty or an upload fails
+
+        Returns:
+            bool: True if the queue was fully drained
+        """
+        self._pending_since_drain = 0
+        while not self._stop_event.is_set():
+            batch = self.queue.peek(self.batch_size)
+            if not batch:
+                return True
+
+            if not self._upload(batch):
+                return False
+
+        return False
+
+    def _upload(self, batch):
+        """Upload (seq, row) pairs and remove them from the queue, bisecting rejected batches"""
+        seqs = [seq for seq, _ in batch]
+        try:
+            if not self.upload_fn([row for _, row in batch]):
+                return False
+        except BatchRejected as e:
+            if len(batch) > 1:
+                middle = len(batch) // 2
+                return self._upload(batch[:middle]) and self._upload(batch[middle:])
+            logger.error(f"Row {seqs[0]} rejected by the server, moved to the dead-letter table: {e}")
+            self.queue.dead_letter(seqs, str(e))
+            ROWS_DEAD_LETTERED.inc()
+        else:
+            self.queue.ack(seqs)
+
+        self._acked_since_compact += len(seqs)
+        if self._acked_since_compact >= self.compact_every:
+            self.queue.compact()
+            self._acked_since_compact = 0
+        return True
+
+    def run(self):
+        logger.info("Queue drainer started")
+        while not self._stop_event.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                logger.error(f"Queue drainer error: {e}")
+
+            self._wake_event.wait(self.interval)
+            self._wake_event.clear()
+        logger.info("Queue drainer stopped")
+
@@ -0,0 +1,159 @@
+# log_setup.py
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+
+try:
+    from local_config import LOGGING_CONFIG
+except ImportError:
+    LOGGING_CONFIG = {}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed via extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listener = None
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any fields passed via extra="""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Queued records carry the traceback as text (DroppingQueueHandler.prepare)
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        """
+        Merge the message and arguments, keeping any traceback as exc_text
+
+        The base class folds the traceback into the message, which would
+        leave JSON lines without an exc_info field. Text formatters still
+        append exc_text after the message.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _file_handler(path, max_bytes, backup_count):
+    directory = os.path.dirname(path)
+    try:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes,
+                                                    backupCount=backup_count, encoding='utf-8')
+    except OSError as e:
+        # e.g. /var/log/airis on a development machine
+        fallback = os.path.basename(path)
+        print(f"Cannot write log file {path} ({e}), using {fallback}", file=sys.stderr)
+        return logging.handlers.RotatingFileHandler(fallback, maxBytes=max_bytes,
+                                                    backupCount=backup_count, encoding='utf-8')
+
+
+def setup_logging(config=None, quiet=None, json_format=None):
+    """
+    Route all logging through a queue to a background writer thread
+
+    Records are put on an in-memory queue by the calling thread and written
+    by a QueueListener, so a slow SD card never stalls sensor reads. The
+    file handler rotates by size per LOGGING_CONFIG; quiet mode drops the
+    console handler. Safe to call more than once: the previous setup is
+    replaced rather than duplicated.
+
+    Args:
+        config (dict): LOGGING_CONFIG-style dict, defaults to local_config
+        quiet (bool): No console output (overrides config)
+        json_format (bool): JSON lines in the log file (overrides config)
+
+    Returns:
+        logging.handlers.QueueListener: The running listener
+    """
+    global _listener
+    config = {**LOGGING_CONFIG, **(config or {})}
+
+    level = os.getenv('LOG_LEVEL', config.get('log_level', 'INFO')).upper()
+    log_file = os.getenv('LOG_FILE', config.get('log_file', 'sensor_logs.log'))
+    quiet = config.get('quiet', False) if quiet is None else quiet
+    json_format = config.get('json', True) if json_format is None else json_format
+
+    handlers = []
+    file_handler = _file_handler(
+        log_file,
+        int(config.get('max_log_size_mb', 10) * 1024 * 1024),
+        config.get('backup_count', 5)
+    )
+    file_handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT))
+    handlers.append(file_handler)
+
+    if not quiet:
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(config.get('console_level', level).upper())
+        console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        handlers.append(console_handler)
+
+    stop_logging()
+    log_queue = queue.Queue(config.get('queue_size', 10000))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(DroppingQueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
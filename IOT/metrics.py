@@ -0,0 +1,72 @@
+# metrics.py
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metrics_registry import CONTENT_TYPE, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Process-wide registry, disabled until configure()/start_exporter() enables it
+REGISTRY = MetricsRegistry()
+
+SENSOR_READ_SECONDS = REGISTRY.histogram(
+    'airis_sensor_read_seconds', 'Duration of one sensor read, per driver', ('sensor',))
+SENSOR_READ_TIMEOUTS = REGISTRY.counter(
+    'airis_sensor_read_timeouts_total', 'Sensor reads that exceeded their time budget', ('sensor',))
+STAGE_SECONDS = REGISTRY.histogram(
+    'airis_stage_seconds', 'Duration of a pipeline stage (validate, alerts, serialize, queue, upload)',
+    ('stage',))
+UPLOAD_REQUESTS = REGISTRY.counter('airis_upload_requests_total', 'Upload HTTP requests sent')
+UPLOAD_RETRIES = REGISTRY.counter('airis_upload_retries_total', 'Upload attempts retried after a transient error')
+UPLOAD_FAILURES = REGISTRY.counter('airis_upload_failures_total', 'Upload batches that failed every attempt')
+ROWS_UPLOADED = REGISTRY.counter('airis_rows_uploaded_total', 'Rows stored remotely')
+ROWS_QUEUED = REGISTRY.counter('airis_rows_queued_total', 'Rows appended to the local queue')
+QUEUE_ROWS = REGISTRY.gauge('airis_queue_rows', 'Rows waiting in the local queue')
+ROWS_DEAD_LETTERED = REGISTRY.counter(
+    'airis_rows_dead_lettered_total', 'Rows the server rejected, moved out of the queue')
+
+
+def configure(config=None):
+    """Enable or disable collection per a METRICS_CONFIG-style dict"""
+    REGISTRY.enabled = bool((config or {}).get('enabled', False))
+    return REGISTRY.enabled
+
+
+class _ExporterHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_exporter(config=None, registry=REGISTRY):
+    """
+    Serve ``GET /metrics`` from a background thread if METRICS_CONFIG enables it
+
+    Returns:
+        ThreadingHTTPServer: The running server (call shutdown() to stop), or None
+    """
+    config = config or {}
+    if not config.get('enabled', False):
+        return None
+
+    registry.enabled = True
+    host, port = config.get('host', '127.0.0.1'), config.get('port', 9108)
+    server = ThreadingHTTPServer((host, port), _ExporterHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True, name='metrics-exporter').start()
+    logger.info(f"Metrics exporter on http://{host}:{server.server_address[1]}/metrics")
+    return server
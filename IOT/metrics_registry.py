@@ -0,0 +1,237 @@
+# metrics_registry.py
+# Prometheus-style metrics without dependencies, shared by the device code
+# (metrics.py) and the ML server (ML/metrics.py, as IOT.metrics_registry).
+# Each side declares its own metrics on its own registry.
+import time
+import bisect
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Seconds; from sub-millisecond conversions to multi-second uploads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Timer:
+    """Context manager observing the elapsed time into a histogram child"""
+    __slots__ = ('child', 'start')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    """Stands in for _Timer while the registry is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Child:
+    """One labelled time series; every update is a no-op while the registry is disabled"""
+
+    def __init__(self, registry):
+        self._registry = registry
+        self._lock = threading.Lock()
+        self._function = None
+        self.value = 0
+
+    def set_function(self, function):
+        """Read the value from ``function()`` at scrape time instead (e.g. a queue length)"""
+        self._function = function
+
+    def current(self):
+        return self._function() if self._function is not None else self.value
+
+
+class _CounterChild(_Child):
+    def inc(self, amount=1):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_Child):
+    def set(self, value):
+        if self._registry.enabled:
+            self.value = value
+
+    def inc(self, amount=1):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+
+class _HistogramChild(_Child):
+    def __init__(self, registry, buckets):
+        super().__init__(registry)
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot: above the largest bound
+        self.sum = 0.0
+
+    def observe(self, value):
+        if not self._registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        """``with histogram.time(): ...`` observes the block's duration"""
+        return _Timer(self) if self._registry.enabled else _NULL_TIMER
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class MetricFamily:
+    """
+    A named metric and its label sets
+
+    ``labels(...)`` returns the child for one label combination; look it up
+    once (e.g. in __init__) and keep it, so the hot path is a single
+    method call. Families without labels forward inc/set/observe/time to
+    their only child.
+    """
+
+    def __init__(self, registry, kind, name, documentation, labelnames=(), buckets=None):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(registry.buckets if buckets is None else buckets))
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # Exported as 0 before the first update, like other Prometheus clients;
+            # inc()/set()/observe()/time() on the family go straight to this child
+            child = self.labels()
+            for method in ('inc', 'dec', 'set', 'observe', 'time', 'set_function'):
+                if hasattr(child, method):
+                    setattr(self, method, getattr(child, method))
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(value) for value in values)
+
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = (_HistogramChild(self.registry, self.buckets) if self.kind == 'histogram'
+                             else _CounterChild(self.registry) if self.kind == 'counter'
+                             else _GaugeChild(self.registry))
+                    self._children[key] = child
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self._children.items()):
+            if self.kind != 'histogram':
+                try:
+                    value = child.current()
+                except Exception as e:
+                    logger.debug(f"Skipping {self.name}: {e}")
+                    continue
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+                continue
+
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Prometheus-style counters, gauges and histograms without dependencies
+
+    Metrics are declared at import time by the modules that update them.
+    While the registry is disabled every update returns after one
+    attribute check, so instrumentation stays in place at near-zero cost.
+    Histograms use ``buckets`` unless they are declared with their own.
+    render() produces the Prometheus text exposition format.
+    """
+
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _family(self, kind, name, documentation, labelnames=(), **kwargs):
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = MetricFamily(self, kind, name, documentation,
+                                                             labelnames, **kwargs)
+            elif family.kind != kind or family.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered as a different {family.kind}")
+            return family
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._family('counter', name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._family('gauge', name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=None):
+        return self._family('histogram', name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        lines = []
+        for family in list(self._families.values()):
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,403 @@
+# notifications.py
+import json
+import time
+import queue
+import logging
+import smtplib
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from config import ALERT_LEVELS, load_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Alert:
+    """A change in alert level for one device metric"""
+    device_id: str
+    metric: str
+    level: str
+    value: float
+    previous: str = 'normal'
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class DigestEntry:
+    """Alerts for one (device, metric, level) merged within a digest window"""
+    device_id: str
+    metric: str
+    level: str
+    first_value: float
+    last_value: float
+    peak_value: float
+    first_seen: float
+    last_seen: float
+    count: int = 1
+    suppressed: int = 0
+    previous: str = 'normal'  # Highest level this entry's alerts came from
+
+    def merge(self, alert):
+        self.last_value = alert.value
+        self.peak_value = max(self.peak_value, alert.value)
+        self.last_seen = alert.timestamp
+        self.count += 1
+        self.previous = max(self.previous, alert.previous, key=ALERT_LEVELS.index)
+
+    def combine(self, other):
+        self.last_value = other.last_value
+        self.peak_value = max(self.peak_value, other.peak_value)
+        self.last_seen = max(self.last_seen, other.last_seen)
+        self.count += other.count
+        self.suppressed += other.suppressed
+        self.previous = max(self.previous, other.previous, key=ALERT_LEVELS.index)
+
+
+class TokenBucket:
+    """Allow ``capacity`` events at once, refilled at ``rate`` tokens per second"""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def allow(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+def format_digest(entries):
+    """Subject and plain-text body summarising digest entries"""
+    by_alert = {}
+    for entry in entries:
+        by_alert.setdefault((entry.metric, entry.level), []).append(entry)
+
+    critical = sum(1 for entry in entries if entry.level == 'critical')
+    devices = len({entry.device_id for entry in entries})
+    subject = f"[AIRIS] {len(entries)} alert(s) on {devices} device(s)"
+    if critical:
+        subject += f", {critical} critical"
+
+    lines = []
+    for (metric, level), group in sorted(by_alert.items(),
+                                         key=lambda item: -ALERT_LEVELS.index(item[0][1])):
+        peak = max(entry.peak_value for entry in group)
+        lines.append(f"{metric} {level.upper()} on {len(group)} device(s), peak {peak:.2f}")
+        for entry in sorted(group, key=lambda entry: -entry.peak_value)[:20]:
+            suppressed = f", {entry.suppressed} rate-limited" if entry.suppressed else ""
+            lines.append(f"  {entry.device_id}: last {entry.last_value:.2f}, "
+                         f"peak {entry.peak_value:.2f} ({entry.count} alert(s){suppressed})")
+        if len(group) > 20:
+            lines.append(f"  ... and {len(group) - 20} more")
+    return subject, "\n".join(lines)
+
+
+class Channel(ABC):
+    """
+    Base class for notification transports
+
+    A channel only receives alerts at or above ``min_level`` (and the
+    recoveries from them) and sends at most one digest per
+    ``min_interval`` seconds; anything arriving in between is merged into
+    the next digest.
+    """
+
+    def __init__(self, min_level='warning', min_interval=0):
+        self.min_level = ALERT_LEVELS.index(min_level)
+        self.min_interval = min_interval
+        self.last_sent = None
+        self.backlog = {}
+
+    def accepts(self, level, previous='normal'):
+        """Whether a change from ``previous`` to ``level`` is reported on this channel"""
+        if level == 'normal':
+            # A recovery only goes to the channels that were told about the alert
+            return ALERT_LEVELS.index(previous) >= self.min_level
+        return ALERT_LEVELS.index(level) >= self.min_level
+
+    @abstractmethod
+    def send(self, subject, body, entries):
+        """Deliver one digest; raising leaves it to be retried with the next one"""
+
+
+class SMTPChannel(Channel):
+    def __init__(self, host, port, sender, recipients, username=None, password=None,
+                 use_tls=False, timeout=10, **kwargs):
+        super().__init__(**kwargs)
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = list(recipients)
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+
+    def send(self, subject, body, entries):
+        message = EmailMessage()
+        message['Subject'] = subject
+        message['From'] = self.sender
+        message['To'] = ', '.join(self.recipients)
+        message.set_content(body)
+
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(message)
+
+
+class WebhookChannel(Channel):
+    def __init__(self, url, timeout=10, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def send(self, subject, body, entries):
+        payload = {
+            'subject': subject,
+            'text': body,
+            'alerts': [vars(entry) for entry in entries]
+        }
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class MemoryChannel(Channel):
+    """Keeps sent digests in memory, for tests"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sent = []
+
+    def send(self, subject, body, entries):
+        self.sent.append((subject, body, entries))
+
+
+class NotificationDispatcher(threading.Thread):
+    """
+    Turn alert level changes into rate-limited digest notifications.
+
+    submit() only puts the alert on a queue, so it never blocks the
+    sampling loop. A background thread then:
+
+    - dedupes: repeats of the same (device, metric, level) in one digest
+      window are merged into one entry with a count and peak value
+    - rate-limits: each (device, metric) has a token bucket; alerts over
+      the limit are counted as suppressed instead of reported
+    - aggregates: every ``digest_interval`` seconds all entries go out as
+      one digest per channel, grouped by metric and level, so an
+      incident across 200 devices is one message, not 200
+    """
+
+    def __init__(self, channels, digest_interval=60, rate_per_hour=4, burst=2, queue_size=10000):
+        super().__init__(daemon=True, name='notification-dispatcher')
+        self.channels = list(channels)
+        self.digest_interval = digest_interval
+        self.rate = rate_per_hour / 3600
+        self.burst = burst
+        self.queue = queue.Queue(queue_size)
+        self.dropped = 0
+        self.sent = 0
+        self._buckets = {}
+        self._pending = {}
+        self._stop_event = threading.Event()
+
+    def submit(self, alert):
+        """Queue an alert without blocking; returns False if the queue is full"""
+        try:
+            self.queue.put_nowait(alert)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _add(self, alert):
+        key = (alert.device_id, alert.metric, alert.level)
+        entry = self._pending.get(key)
+        bucket = self._buckets.get(key[:2])
+        if bucket is None:
+            bucket = self._buckets[key[:2]] = TokenBucket(self.rate, self.burst)
+
+        if entry is not None:
+            entry.merge(alert)
+            return
+        if alert.level != 'normal' and not bucket.allow():
+            # Over the limit for this device/metric: report the count later
+            suppressed = self._pending.setdefault(
+                ('suppressed',) + key[:2],
+                DigestEntry(alert.device_id, alert.metric, alert.level, alert.value, alert.value,
+                            alert.value, alert.timestamp, alert.timestamp, count=0,
+                            previous=alert.previous)
+            )
+            suppressed.suppressed += 1
+            suppressed.peak_value = max(suppressed.peak_value, alert.value)
+            return
+        self._pending[key] = DigestEntry(alert.device_id, alert.metric, alert.level, alert.value,
+                                         alert.value, alert.value, alert.timestamp, alert.timestamp,
+                                         previous=alert.previous)
+
+    def flush(self):
+        """Send pending entries to every channel whose min_interval allows it"""
+        if not any(entry.count for entry in self._pending.values()):
+            # Only rate-limited repeats: report their counts with the next real alert
+            return
+        entries, self._pending = list(self._pending.values()), {}
+        now = time.monotonic()
+
+        for channel in self.channels:
+            for entry in entries:
+                if not channel.accepts(entry.level, entry.previous):
+                    continue
+                key = (entry.device_id, entry.metric, entry.level)
+                if key in channel.backlog:
+                    channel.backlog[key].combine(entry)
+                else:
+                    channel.backlog[key] = DigestEntry(**vars(entry))
+
+            if not channel.backlog:
+                continue
+            if channel.last_sent is not None and now - channel.last_sent < channel.min_interval:
+                continue
+
+            subject, body = format_digest(list(channel.backlog.values()))
+            try:
+                channel.send(subject, body, list(channel.backlog.values()))
+                channel.backlog = {}
+                channel.last_sent = now
+                self.sent += 1
+            except Exception as e:
+                # Keep the backlog and retry with the next digest
+                logger.error(f"{type(channel).__name__} notification failed: {e}")
+
+    def run(self):
+        next_flush = time.monotonic() + self.digest_interval
+        while not self._stop_event.is_set():
+            try:
+                alert = self.queue.get(timeout=max(0.0, next_flush - time.monotonic()))
+                if alert is not None:
+                    self._add(alert)
+                continue
+            except queue.Empty:
+                pass
+            self.flush()
+            next_flush = time.monotonic() + self.digest_interval
+
+        while True:
+            try:
+                alert = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if alert is not None:
+                self._add(alert)
+        self.flush()
+
+    def stop(self, timeout=None):
+        """Send what is pending and stop the thread"""
+        self._stop_event.set()
+        try:
+            self.queue.put_nowait(None)  # Wake the queue wait
+        except queue.Full:
+            pass
+        self.join(timeout)
+
+
+def create_dispatcher(settings=None):
+    """
+    Build a dispatcher from ERROR_HANDLING, or None if no channel is configured
+
+    Email goes out only for critical alerts, at most once per
+    max_email_frequency_hours; the webhook receives every digest.
+    """
+    settings = settings or load_settings()
+    config = settings.get('ERROR_HANDLING', {})
+    channels = []
+
+    if config.get('send_email_on_critical_error') and config.get('smtp_host'):
+        channels.append(SMTPChannel(
+            config['smtp_host'],
+            config.get('smtp_port', 25),
+            config.get('smtp_sender', 'airis@localhost'),
+            config.get('email_recipients', []),
+            username=config.get('smtp_username'),
+            password=config.get('smtp_password'),
+            use_tls=config.get('smtp_use_tls', False),
+            min_level='critical',
+            min_interval=config.get('max_email_frequency_hours', 4) * 3600
+        ))
+    if config.get('webhook_url'):
+        channels.append(WebhookChannel(
+            config['webhook_url'],
+            min_level=config.get('webhook_min_level', 'warning')
+        ))
+
+    if not channels:
+        return None
+    return NotificationDispatcher(
+        channels,
+        digest_interval=config.get('digest_interval_seconds', 60),
+        rate_per_hour=config.get('alerts_per_hour', 4),
+        burst=config.get('alert_burst', 2)
+    )
+
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    received = deque(maxlen=1000)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        payload = json.loads(body or b'{}')
+        self.received.append(payload)
+        logger.info(f"Webhook sink: {payload.get('subject')}\n{payload.get('text')}")
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_webhook_sink(host='127.0.0.1', port=8025):
+    """Local stand-in for a webhook receiver; received payloads are kept in memory"""
+    server = ThreadingHTTPServer((host, port), _SinkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local notification stand-ins: a webhook sink and an SMTP debugging server"
+    )
+    parser.add_argument('--webhook-port', type=int, default=8025)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    serve_webhook_sink(port=args.webhook_port)
+    logger.info(f"Webhook sink on http://127.0.0.1:{args.webhook_port}/ "
+                f"(set ERROR_HANDLING['webhook_url']). For email, run an SMTP debugging server, "
+                f"e.g. 'python -m aiosmtpd -n -l localhost:1025', and set smtp_host/smtp_port.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,467 @@
+# raw_capture.py
+import os
+import glob
+import logging
+import argparse
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from config import load_settings
+from sensors.lut import (
+    DEFAULT_CALIBRATION, calibration_params, dust_lookup,
+    mq7_lookup, mq7_rs, mq135_lookup, reported_co2
+)
+from sensors.sampling import BurstSampler
+
+try:
+    from local_config import RAW_CAPTURE_CONFIG, CUSTOM_CALIBRATION
+except ImportError:
+    RAW_CAPTURE_CONFIG = {}
+    CUSTOM_CALIBRATION = {}
+
+logger = logging.getLogger(__name__)
+
+# File layout: 16 byte header followed by fixed-size little-endian records
+MAGIC = b'AIRISRAW'
+VERSION = 1
+DEVICE_ID_BYTES = 24  # Longer device ids are truncated
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),  # Unix time of the burst
+    ('device', f'S{DEVICE_ID_BYTES}'),
+    ('sensor', 'u1'),
+    ('raw', '<u2')
+])
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u2'),
+    ('record_size', '<u2'),
+    ('reserved', '<u4')
+])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+
+# Sensor codes stored in the log. mq7_calibration holds the clean-air
+# samples MQ7.calibrate() derived R0 from, so R0 can be recomputed offline.
+SENSOR_CODES = {
+    'mq7': 1,
+    'mq135': 2,
+    'gp2y1014au': 3,
+    'mq7_calibration': 4
+}
+SENSOR_NAMES = {code: name for name, code in SENSOR_CODES.items()}
+
+# How Reprocessor reduces a burst: as its driver does, or a plain statistic
+REDUCTIONS = ('driver', 'median', 'mean', 'none')
+
+# What each sensor's converted value is called in sensor_data
+SENSOR_METRICS = {
+    'mq7': 'co',
+    'mq135': 'co2',
+    'gp2y1014au': 'pm25'
+}
+
+
+class RawCaptureLog:
+    """
+    Append-only binary log of raw ADC codes.
+
+    Every sample of every burst is stored as one fixed-size record, so a
+    log can be memory-mapped as a NumPy structured array and reconverted
+    under a corrected calibration long after the derived values were
+    uploaded. Files rotate once they reach ``max_file_mb``. One log can be
+    shared by all SensorHandlers in a process.
+    """
+
+    def __init__(self, directory='raw_capture', max_file_mb=64):
+        self.directory = directory
+        self.max_file_bytes = int(max_file_mb * 1024 * 1024)
+        self.records_written = 0
+        self._file = None
+        self._size = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config=None):
+        """Build a log from a RAW_CAPTURE_CONFIG-style dict, or None if disabled"""
+        config = RAW_CAPTURE_CONFIG if config is None else config
+        if not config.get('enabled', False):
+            return None
+        return cls(config.get('directory', 'raw_capture'), config.get('max_file_mb', 64))
+
+    def _open_file(self):
+        name = datetime.now().strftime('raw_%Y%m%d_%H%M%S_%f.bin')
+        path = os.path.join(self.directory, name)
+        self._file = open(path, 'ab')
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header['magic'] = MAGIC
+        header['version'] = VERSION
+        header['record_size'] = RECORD_DTYPE.itemsize
+        self._file.write(header.tobytes())
+        self._size = HEADER_SIZE
+        logger.info(f"Raw capture writing to {path}")
+
+    def record(self, device_id, sensor, raw_codes, timestamp=None):
+        """
+        Append one burst of raw ADC codes
+
+        Args:
+            device_id (str): Device the burst came from
+            sensor (str): Key of SENSOR_CODES
+            raw_codes: Scalar or array of ADC codes
+            timestamp (float): Unix time, defaults to now
+        """
+        raw_codes = np.atleast_1d(raw_codes)
+        records = np.empty(raw_codes.size, dtype=RECORD_DTYPE)
+        records['timestamp'] = time.time() if timestamp is None else timestamp
+        records['device'] = device_id.encode('utf-8')[:DEVICE_ID_BYTES]
+        records['sensor'] = SENSOR_CODES[sensor]
+        records['raw'] = np.clip(raw_codes, 0, np.iinfo(np.uint16).max)
+        data = records.tobytes()
+
+        with self._lock:
+            if self._file is None or self._size + len(data) > self.max_file_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._size += len(data)
+            self.records_written += records.size
+
+    def recorder(self, device_id):
+        """Return capture(sensor, raw_codes) bound to one device, as the drivers expect"""
+        def capture(sensor, raw_codes):
+            try:
+                self.record(device_id, sensor, raw_codes)
+            except Exception as e:
+                logger.error(f"Raw capture failed for {device_id}/{sensor}: {e}")
+        return capture
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        self._open_file()
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def open_capture(path):
+    """Memory-map a capture file as a structured array of RECORD_DTYPE"""
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if header.size == 0 or header['magic'][0] != MAGIC:
+        raise ValueError(f"{path} is not a raw capture file")
+    if header['version'][0] != VERSION or header['record_size'][0] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} has unsupported format version {header['version'][0]}")
+
+    # A torn final record (power loss mid-write) is ignored
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+def _same_burst(a, b):
+    return (a['timestamp'] == b['timestamp'] and a['device'] == b['device']
+            and a['sensor'] == b['sensor'])
+
+
+def iter_chunks(records, chunk_size):
+    """Yield consecutive slices of about ``chunk_size`` records without splitting a burst"""
+    start = 0
+    total = len(records)
+    while start < total:
+        end = min(start + chunk_size, total)
+        last = records[end - 1]
+        while end < total and _same_burst(records[end], last):
+            end += 1
+        yield records[start:end]
+        start = end
+
+
+class Reprocessor:
+    """
+    Reconvert captured raw ADC codes under a (new) calibration.
+
+    Conversions are the drivers' own table-backed ones (sensors.lut), so
+    a chunk of millions of records costs one gather per sensor and, under
+    the device's calibration, reproduces the uploaded values. MQ7 R0 is
+    recomputed from the captured calibration bursts with the new
+    clean-air ratio; readings logged before any calibration burst use
+    ``mq7_r0``. By default each burst is filtered like its driver does
+    (ADC_OVERSAMPLING), carrying EMA state per device and sensor across
+    chunks; 'median', 'mean' and 'none' are also available.
+    """
+
+    def __init__(self, calibration=None, mq7_r0=None, reduce='driver', settings=None):
+        if reduce not in REDUCTIONS:
+            raise ValueError(f"Unknown reduce '{reduce}'. Expected one of {REDUCTIONS}")
+        settings = settings or load_settings()
+        # The calibration the devices run with, unless overridden
+        batches = settings.get('SENSOR_CALIBRATION_BATCHES', {})
+        custom = settings.get('CUSTOM_CALIBRATION', {})
+        calibration = {
+            **{sensor: custom[batches[sensor]] if batches.get(sensor) else settings.sensor_calibration[sensor]
+               for sensor in DEFAULT_CALIBRATION},
+            **(calibration or {})
+        }
+        self.mq7 = {**settings.sensor_params('mq7'), **calibration_params(calibration['mq7'])}
+        self.mq135 = {**settings.sensor_params('mq135'), **calibration_params(calibration['mq135'])}
+        self.mq7_adc_resolution = (1 << self.mq7['ADC_BIT_RESOLUTION']) - 1
+        self.oversampling = settings.get('ADC_OVERSAMPLING', {})
+        self.mq7_r0 = mq7_r0
+        self.reduce = reduce
+        # device -> (sorted calibration timestamps, R0 per calibration)
+        self.r0_by_device = {}
+        # (device, sensor code) -> BurstSampler, for reduce='driver'
+        self.samplers = {}
+
+    def load_calibrations(self, captures):
+        """Collect the MQ7 calibration bursts of every capture file"""
+        code = SENSOR_CODES['mq7_calibration']
+        bursts = [records[records['sensor'] == code] for records in captures]
+        bursts = np.concatenate(bursts) if bursts else np.empty(0, dtype=RECORD_DTYPE)
+        if bursts.size == 0:
+            return
+
+        rs = mq7_rs(bursts['raw'], self.mq7['VOLTAGE_RESOLUTION'], self.mq7_adc_resolution)
+        r0 = rs / self.mq7['RATIO_CLEAN_AIR']
+        for device in np.unique(bursts['device']):
+            mask = (bursts['device'] == device) & np.isfinite(r0)
+            times, inverse = np.unique(bursts['timestamp'][mask], return_inverse=True)
+            sums = np.bincount(inverse, weights=r0[mask])
+            counts = np.bincount(inverse)
+            self.r0_by_device[device] = (times, sums / counts)
+
+    def _mq7_r0(self, records):
+        """R0 in effect for each MQ7 record (NaN if unknown)"""
+        fallback = np.nan if self.mq7_r0 is None else self.mq7_r0
+        r0 = np.full(len(records), fallback, dtype=np.float64)
+        for device in np.unique(records['device']):
+            if device not in self.r0_by_device:
+                continue
+            times, values = self.r0_by_device[device]
+            mask = records['device'] == device
+            index = np.searchsorted(times, records['timestamp'][mask], side='right') - 1
+            r0[mask] = np.where(index >= 0, values[np.maximum(index, 0)], fallback)
+        return r0
+
+    def convert(self, records):
+        """
+        Convert one chunk of records to the values SensorHandler reports
+
+        Returns:
+            np.ndarray: float64 value per record (NaN for calibration records)
+        """
+        values = np.full(len(records), np.nan, dtype=np.float64)
+        sensors = records['sensor']
+
+        mask = sensors == SENSOR_CODES['mq135']
+        if mask.any():
+            params = self.mq135
+            values[mask] = reported_co2(mq135_lookup(
+                records['raw'][mask], params['A'], params['B'], params['RATIO_CLEAN_AIR'],
+                params['VOLTAGE_RESOLUTION'], params['ADC_BIT_RESOLUTION']))
+
+        mask = sensors == SENSOR_CODES['gp2y1014au']
+        if mask.any():
+            values[mask] = dust_lookup(records['raw'][mask])
+
+        mask = sensors == SENSOR_CODES['mq7']
+        if mask.any():
+            mq7_records = records[mask]
+            r0 = self._mq7_r0(mq7_records)
+            mq7_values = np.full(len(mq7_records), np.nan, dtype=np.float64)
+            # One table for the curve, each record scaled by the R0 in effect
+            known = np.isfinite(r0)
+            mq7_values[known] = mq7_lookup(mq7_records['raw'][known], self.mq7['A'], self.mq7['B'],
+                                           r0[known], self.mq7['VOLTAGE_RESOLUTION'],
+                                           self.mq7_adc_resolution)
+            values[mask] = mq7_values
+
+        return values
+
+    def _sampler(self, device, sensor):
+        key = (device, sensor)
+        sampler = self.samplers.get(key)
+        if sampler is None:
+            config = self.oversampling.get(SENSOR_NAMES[sensor])
+            sampler = self.samplers[key] = BurstSampler.from_config(None, config)
+        return sampler
+
+    def reduce_bursts(self, records, values):
+        """
+        Filter each burst with its driver's sampler settings
+
+        Bursts must arrive in capture order, as the EMA filter carries
+        over from one burst of a device's sensor to the next.
+
+        Returns:
+            tuple: (index of each burst's first record, value, finite samples)
+        """
+        if len(records) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0), np.empty(0, dtype=np.intp)
+
+        changed = ((records['timestamp'][1:] != records['timestamp'][:-1])
+                   | (records['device'][1:] != records['device'][:-1])
+                   | (records['sensor'][1:] != records['sensor'][:-1]))
+        starts = np.concatenate(([0], np.flatnonzero(changed) + 1))
+        ends = np.append(starts[1:], len(records))
+
+        reduced = np.empty(len(starts), dtype=np.float64)
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            value = self._sampler(records['device'][start], records['sensor'][start]).reduce(values[start:end])
+            reduced[i] = np.nan if value is None else value
+        return starts, reduced, np.add.reduceat(np.isfinite(values), starts)
+
+    def process(self, records):
+        """
+        Convert a chunk and reduce each burst to one value
+
+        Returns:
+            pandas.DataFrame: timestamp, device_id, sensor, metric, value, samples
+        """
+        import pandas as pd
+
+        records = records[records['sensor'] != SENSOR_CODES['mq7_calibration']]
+        values = self.convert(records)
+
+        if self.reduce == 'driver':
+            starts, reduced, samples = self.reduce_bursts(records, values)
+            frame = pd.DataFrame({
+                'timestamp': records['timestamp'][starts],
+                'device_id': records['device'][starts],
+                'sensor': records['sensor'][starts],
+                'value': reduced,
+                'samples': samples
+            })
+        else:
+            frame = pd.DataFrame({
+                'timestamp': records['timestamp'],
+                'device_id': records['device'],
+                'sensor': records['sensor'],
+                'value': values
+            })
+            frame['value'] = frame['value'].replace([np.inf, -np.inf], np.nan)
+
+            if self.reduce == 'none':
+                frame['samples'] = 1
+            else:
+                frame = (frame.groupby(['timestamp', 'device_id', 'sensor'], sort=False)['value']
+                         .agg([self.reduce, 'count'])
+                         .reset_index()
+                         .rename(columns={self.reduce: 'value', 'count': 'samples'}))
+
+        names = frame['sensor'].map(SENSOR_NAMES)
+        frame['device_id'] = frame['device_id'].str.decode('utf-8')
+        frame['metric'] = names.map(SENSOR_METRICS)
+        frame['sensor'] = names
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='s', utc=True)
+        return frame[['timestamp', 'device_id', 'sensor', 'metric', 'value', 'samples']]
+
+
+class FrameWriter:
+    """Stream DataFrame chunks to one CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self._writer = None
+        self._header = True
+
+    def write(self, frame):
+        if self.parquet:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='w' if self._header else 'a',
+                         header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def parse_calibration(values):
+    """Parse --calibration sensor=batch_name or sensor=slope,intercept,r0"""
+    calibration = {}
+    for value in values:
+        sensor, _, spec = value.partition('=')
+        if sensor not in DEFAULT_CALIBRATION or not spec:
+            raise SystemExit(f"Invalid calibration '{value}', expected mq7=... or mq135=...")
+        if spec in CUSTOM_CALIBRATION:
+            calibration[sensor] = CUSTOM_CALIBRATION[spec]
+            continue
+        try:
+            slope, intercept, r0 = (float(part) for part in spec.split(','))
+        except ValueError:
+            raise SystemExit(f"Unknown calibration batch '{spec}'")
+        calibration[sensor] = {'slope': slope, 'intercept': intercept, 'r0': r0}
+    return calibration
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Reconvert raw ADC capture logs under a new calibration'
+    )
+    parser.add_argument('paths', nargs='+', help='Capture files or directories')
+    parser.add_argument('-o', '--output', required=True, help='Output .csv or .parquet file')
+    parser.add_argument('--calibration', action='append', default=[],
+                        help='sensor=CUSTOM_CALIBRATION batch or sensor=slope,intercept,r0')
+    parser.add_argument('--mq7-r0', type=float,
+                        help='MQ7 R0 for readings captured before any calibration burst')
+    parser.add_argument('--reduce', choices=REDUCTIONS, default='driver',
+                        help="How to reduce each oversampled burst (default: 'driver', the "
+                             "filter the driver used, from ADC_OVERSAMPLING)")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    paths = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            paths.extend(sorted(glob.glob(os.path.join(path, '*.bin'))))
+        else:
+            paths.append(path)
+
+    captures = [open_capture(path) for path in paths]
+    reprocessor = Reprocessor(parse_calibration(args.calibration), args.mq7_r0, args.reduce)
+    reprocessor.load_calibrations(captures)
+
+    writer = FrameWriter(args.output)
+    records_in = rows_out = 0
+    started = time.perf_counter()
+    try:
+        for records in captures:
+            for chunk in iter_chunks(records, args.chunk_size):
+                frame = reprocessor.process(chunk)
+                writer.write(frame)
+                records_in += len(chunk)
+                rows_out += len(frame)
+    finally:
+        writer.close()
+
+    logger.info(f"Reprocessed {records_in} records from {len(paths)} files into {rows_out} rows "
+                f"in {time.perf_counter() - started:.1f}s -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
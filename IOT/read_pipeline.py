@@ -0,0 +1,114 @@
+# read_pipeline.py
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from metrics import SENSOR_READ_SECONDS, SENSOR_READ_TIMEOUTS
+
+logger = logging.getLogger(__name__)
+
+
+class SensorReadPipeline:
+    """
+    Read independent sensors concurrently with a time budget per sensor.
+
+    Every reader runs on its own worker thread, so one acquisition cycle
+    takes about as long as the slowest sensor rather than the sum of all
+    of them. A sensor that exceeds its budget is reported as failed for
+    this cycle; while its read is still stuck it is skipped instead of
+    tying up another thread.
+
+    Many pipelines (e.g. a gateway's devices) can share one bounded
+    ``executor`` instead of each owning a thread per sensor. A read that
+    is still waiting for a worker when its budget runs out is cancelled.
+    """
+
+    def __init__(self, readers, timeouts=None, default_timeout=1.0, executor=None):
+        """
+        Args:
+            readers (dict): Sensor name -> zero-argument callable
+            timeouts (dict): Sensor name -> time budget in seconds
+            default_timeout (float): Budget for sensors not in ``timeouts``
+            executor (ThreadPoolExecutor): Shared pool to read on, left running
+                by shutdown(); a pool of one thread per sensor if omitted
+        """
+        self.readers = readers
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.latencies = {}      # last completed read duration per sensor, seconds
+        self.timeout_counts = {name: 0 for name in readers}
+        self.last_cycle_time = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._read_seconds = {name: SENSOR_READ_SECONDS.labels(name) for name in readers}
+        self._read_timeouts = {name: SENSOR_READ_TIMEOUTS.labels(name) for name in readers}
+        self.owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=len(readers),
+                                                        thread_name_prefix='sensor-read')
+
+    def _timed_read(self, name):
+        start = time.perf_counter()
+        try:
+            return self.readers[name]()
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.latencies[name] = elapsed
+            self._read_seconds[name].observe(elapsed)
+
+    def read_all(self, names=None):
+        """
+        Read the given sensors (all by default) in parallel
+
+        Returns:
+            dict: Sensor name -> reader result, or None if it failed or timed out
+        """
+        names = list(names or self.readers)
+        start = time.monotonic()
+        futures = {}
+        results = {}
+
+        for name in names:
+            previous = self._inflight.get(name)
+            if previous is not None and not previous.done():
+                logger.warning(f"{name} read still in progress from an earlier cycle, skipping")
+                results[name] = None
+                continue
+            futures[name] = self._inflight[name] = self._executor.submit(self._timed_read, name)
+
+        for name, future in futures.items():
+            # Budgets count from the start of the cycle, the reads overlap
+            remaining = start + self.timeouts.get(name, self.default_timeout) - time.monotonic()
+            try:
+                results[name] = future.result(timeout=max(remaining, 0))
+            except TimeoutError:
+                # Not started yet on a busy shared pool: don't read late
+                future.cancel()
+                self.timeout_counts[name] += 1
+                self._read_timeouts[name].inc()
+                logger.error(f"{name} read timed out")
+                results[name] = None
+            except Exception as e:
+                logger.error(f"Error reading {name}: {e}")
+                results[name] = None
+
+        self.last_cycle_time = time.monotonic() - start
+        return results
+
+    def stats(self):
+        """Per-sensor latency (ms) and timeout counts for the latest cycle"""
+        with self._lock:
+            latencies = {name: round(value * 1000, 2) for name, value in self.latencies.items()}
+        return {
+            'latency_ms': latencies,
+            'timeouts': dict(self.timeout_counts),
+            'cycle_ms': round(self.last_cycle_time * 1000, 2) if self.last_cycle_time is not None else None
+        }
+
+    def shutdown(self):
+        if self.owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            for future in self._inflight.values():
+                future.cancel()
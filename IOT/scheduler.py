@@ -0,0 +1,70 @@
+# scheduler.py
+import heapq
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class IntervalScheduler:
+    """
+    Run callbacks at fixed rates against a monotonic clock.
+
+    Each job's next deadline is computed from its previous deadline, not
+    from when the callback finished, so run time never accumulates as
+    drift. Between deadlines the thread sleeps until the earliest one
+    instead of polling. A job that overruns skips the ticks it missed
+    rather than firing them back to back.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._jobs = []  # heap of (deadline, order, name, interval, callback)
+        self._order = 0
+        self._stop_event = threading.Event()
+
+    def add(self, name, interval, callback, delay=0.0):
+        """
+        Schedule ``callback()`` every ``interval`` seconds
+
+        Jobs due at the same moment run in the order they were added.
+        """
+        if interval <= 0:
+            raise ValueError(f"Interval for {name} must be positive")
+
+        heapq.heappush(self._jobs, (self.clock() + delay, self._order, name, interval, callback))
+        self._order += 1
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        """Run jobs until stop() is called"""
+        self._stop_event.clear()
+
+        while self._jobs and not self._stop_event.is_set():
+            deadline, order, name, interval, callback = self._jobs[0]
+
+            wait = deadline - self.clock()
+            if wait > 0:
+                # Wakes early only if stop() is called
+                if self._stop_event.wait(wait):
+                    break
+                continue
+
+            heapq.heappop(self._jobs)
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Scheduled job {name} failed: {e}")
+
+            next_deadline = deadline + interval
+            now = self.clock()
+            if now > next_deadline:
+                missed = math.ceil((now - next_deadline) / interval)
+                logger.warning(f"Job {name} overran, skipping {missed} tick(s)")
+                next_deadline += missed * interval
+
+            heapq.heappush(self._jobs, (next_deadline, order, name, interval, callback))
@@ -1,77 +1,121 @@
 # sensor_handler.py
 import time
 import logging
-import requests
-import json
 from datetime import datetime, UTC
 import os
 from dotenv import load_dotenv
 import uuid
-import math
-
-try:
-    from machine import ADC, Pin
-    REAL_HARDWARE = True
-except ImportError:
-    from sensors.mock_hardware import ADC, Pin
-    REAL_HARDWARE = False
+from functools import partial
 
 from sensors.mq135 import MQ135
 from sensors.mq7 import MQ7
 from sensors.gp2y1014au import GP2Y1014AU
 from sensors.dht22 import DHT22Handler
+from sensors.lut import reported_co2
+from local_queue import BatchRejected, LocalQueue, QueueDrainer
+from scheduler import IntervalScheduler
+from read_pipeline import SensorReadPipeline
+from uploader import SupabaseUploader
+from raw_capture import RawCaptureLog
+from log_setup import setup_logging
+from config import load_settings
+from alerts import AlertEngine
+from aggregation import EdgeAggregator
+from notifications import Alert, create_dispatcher
+from metrics import STAGE_SECONDS
 
 # Load environment variables
 load_dotenv()
 
-# Configure Logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('sensor_debug.log', mode='a'),
-        logging.StreamHandler()
-    ]
-)
+# Handlers are installed by log_setup.setup_logging() in the entry point
 logger = logging.getLogger(__name__)
 
+VALIDATE_SECONDS = STAGE_SECONDS.labels('validate')
+ALERTS_SECONDS = STAGE_SECONDS.labels('alerts')
+
 # Supabase Configuration
 SUPABASE_URL = os.getenv('SUPABASE_URL', "https://cghzdaaevsmlppngucbe.supabase.co")
 SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_KEY')
 
+def create_drainer():
+    """
+    Build the local queue, uploader and drainer from config.
+
+    One drainer can be shared by several SensorHandlers so a gateway sends
+    one request per max_batch_size readings across all of its devices.
+    """
+    settings = load_settings()
+    cloud_sync = settings.get('CLOUD_SYNC_CONFIG', {})
+    network = settings.get('NETWORK_CONFIG', {})
+    local_queue = settings.get('LOCAL_QUEUE_CONFIG', {})
+    uploader = SupabaseUploader(
+        SUPABASE_URL,
+        SUPABASE_KEY,
+        max_batch_size=cloud_sync.get('max_batch_size', 100),
+        compression_enabled=cloud_sync.get('compression_enabled', True),
+        timeout=network.get('connection_timeout_seconds', 10),
+        max_attempts=network.get('max_connection_attempts', 1),
+        retry_delay=network.get('retry_delay_seconds', 1),
+        max_retry_delay=network.get('max_retry_delay_seconds', 60),
+        pool_size=network.get('pool_size', 4)
+    )
+    return QueueDrainer(
+        LocalQueue(local_queue.get('path', 'sensor_queue.db')),
+        uploader.send_batch,
+        batch_size=uploader.max_batch_size,
+        interval=cloud_sync.get('flush_interval_seconds', 60),
+        compact_every=local_queue.get('compact_every_rows', 1000)
+    )
+
 class SensorHandler:
-    def __init__(self, device_id='AIRIS_ESP32_01', debug=False):
+    def __init__(self, device_id='AIRIS_ESP32_01', debug=False, drainer=None, environment=None,
+                 raw_capture=None, notifier=None, read_executor=None):
         self.device_id = device_id
         self.debug_mode = debug
-        
-        # Arduino exact parameters
-        self.MQ7_PARAMS = {
-            'A': 99.042,
-            'B': -1.518,
-            'RATIO_CLEAN_AIR': 27.5,
-            'VOLTAGE_RESOLUTION': 5,
-            'ADC_BIT_RESOLUTION': 12
-        }
-        
-        self.MQ135_PARAMS = {
-            'A': 110.47,
-            'B': -2.862,
-            'VOLTAGE_RESOLUTION': 5,
-            'ADC_BIT_RESOLUTION': 12,
-            'RATIO_CLEAN_AIR': 3.6
-        }
-        
-        self.sensor_thresholds = {
-            'co2': (400, 5000),
-            'pm25': (0, 1000),
-            'co': (0, 50),
-            'temperature': (0, 50),
-            'humidity': (0, 100)
-        }
-        
+
+        # Base config merged with the environment profile (cached, read-only)
+        self.settings = load_settings(environment)
+
+        # Reporting cadence and per-sensor sampling rates
+        self.sampling_interval = self.settings.sampling_interval
+        self.sensor_intervals = dict(self.settings.get('SENSOR_SAMPLING_INTERVALS', {}))
+        self.scheduler = None
+
+        # Curve parameters from SENSOR_CALIBRATION (Arduino values by default)
+        self.MQ7_PARAMS = self.settings.sensor_params('mq7')
+        self.MQ135_PARAMS = self.settings.sensor_params('mq135')
+
+        # Valid (min, max) per metric from SENSOR_THRESHOLDS
+        thresholds = self.settings.thresholds
+        self.sensor_thresholds = {name: thresholds.bounds(name) for name in thresholds.names}
+
+        # Sample fast locally, upload window aggregates / changes only (EDGE_AGGREGATION)
+        self.aggregator = EdgeAggregator.from_config(self.settings.get('EDGE_AGGREGATION'))
+
+        # Alert levels (with hysteresis/debounce) feed the shared notification dispatcher
+        self.alert_engine = AlertEngine(thresholds, environment=environment)
+        self.alert_levels = {}
+        self.owns_notifier = notifier is None
+        self.notifier = notifier or create_dispatcher(self.settings)
+
+        # Optional raw ADC capture, shareable across handlers like the drainer
+        self.owns_raw_capture = raw_capture is None
+        self.raw_capture = raw_capture or RawCaptureLog.from_config()
+
         self.init_sensors()
-        self.consecutive_errors = 0
-        self.MAX_CONSECUTIVE_ERRORS = 3
+
+        # Independent sensors are read in parallel, each within its own time budget
+        # (on a pool shared across handlers if one is given)
+        self.read_pipeline = SensorReadPipeline(
+            {name: getattr(self, method) for name, method in self.SENSOR_READERS.items()},
+            timeouts=self.settings.get('SENSOR_READ_TIMEOUTS', {}),
+            executor=read_executor
+        )
+
+        # Every reading goes to the local queue first and is uploaded from there
+        self.owns_drainer = drainer is None
+        self.drainer = drainer or create_drainer()
+        self.queue = self.drainer.queue
 
     def init_sensors(self):
         sensor_configs = [
@@ -82,11 +126,23 @@ class SensorHandler:
         ]
         
         for sensor_name, sensor_class, pin in sensor_configs:
+            sampling = self.settings.get('ADC_OVERSAMPLING', {}).get(sensor_name.lower())
+            capture = self.raw_capture.recorder(self.device_id) if self.raw_capture else None
             try:
                 if sensor_name in ['MQ7', 'MQ135']:
-                    sensor = sensor_class(pin, self.MQ7_PARAMS if sensor_name == 'MQ7' else self.MQ135_PARAMS)
+                    sensor = sensor_class(pin, self.MQ7_PARAMS if sensor_name == 'MQ7' else self.MQ135_PARAMS,
+                                          sampling=sampling, capture=capture)
+                elif sensor_name == 'GP2Y1014AU':
+                    sensor = sensor_class(pin, sampling=sampling, capture=capture)
                 else:
                     sensor = sensor_class(pin)
+
+                # Per-unit calibration batch; lookup tables rebuild for it lazily
+                batch = self.settings.get('SENSOR_CALIBRATION_BATCHES', {}).get(sensor_name.lower())
+                if batch:
+                    sensor.apply_calibration(self.settings.get('CUSTOM_CALIBRATION')[batch])
+                    logger.info(f"{sensor_name} using calibration batch {batch}")
+
                 setattr(self, sensor_name.lower(), sensor)  # Set the attribute
                 logger.info(f"{sensor_name} sensor initialized successfully on pin {pin}")
             except Exception as e:
@@ -94,201 +150,308 @@ class SensorHandler:
 
     def validate_sensor_data(self, data):
         """Validate and correct sensor data"""
-        corrected_data = data.copy()
-        
-        for key, (min_val, max_val) in self.sensor_thresholds.items():
-            if key in data:
-                value = float(data[key])
-                corrected_data[key] = max(min_val, min(value, max_val))
-                corrected_data[key] = round(corrected_data[key], 2)
-                
-                if value != corrected_data[key]:
-                    logger.warning(f"Corrected {key}: {value} -> {corrected_data[key]}")
-        
+        with VALIDATE_SECONDS.time():
+            corrected_data = data.copy()
+
+            for key, (min_val, max_val) in self.sensor_thresholds.items():
+                if key in data:
+                    value = float(data[key])
+                    corrected_data[key] = max(min_val, min(value, max_val))
+                    corrected_data[key] = round(corrected_data[key], 2)
+
+                    if value != corrected_data[key]:
+                        logger.warning(f"Corrected {key}: {value} -> {corrected_data[key]}")
+
         return corrected_data
 
+    # Sensor name -> reader method, in read order
+    SENSOR_READERS = {
+        'gp2y1014au': 'read_dust',
+        'mq7': 'read_co',
+        'mq135': 'read_co2',
+        'dht22': 'read_climate'
+    }
+
+    def read_dust(self):
+        # Read GP2Y1014AU (Dust) - Tambahkan konversi ke µg/m³
+        if not hasattr(self, 'gp2y1014au'):
+            logger.error("GP2Y1014AU sensor not initialized.")
+            return None
+
+        pm25_value = self.gp2y1014au.read()
+        logger.debug(f"PM2.5 Value: {pm25_value:.2f} mg/m3")
+        return {'pm25': pm25_value}
+
+    def read_co(self):
+        if not hasattr(self, 'mq7'):
+            logger.error("MQ7 sensor not initialized.")
+            return None
+
+        co_value = self.mq7.read_sensor()
+        if co_value is None:
+            logger.error("Failed to read MQ7 sensor")
+            return None
+        return {'co': co_value}
+
+    def read_co2(self):
+        if not hasattr(self, 'mq135'):
+            logger.error("MQ135 sensor not initialized.")
+            return None
+
+        co2_raw = self.mq135.read_sensor()
+        if co2_raw is None:
+            logger.error("Failed to read MQ135 sensor")
+            return None
+        return {'co2': reported_co2(co2_raw)}
+
+    def read_climate(self):
+        if not hasattr(self, 'dht22'):
+            logger.error("DHT22 sensor not initialized.")
+            return None
+
+        sensor_data = self.dht22.read()
+        if not sensor_data:
+            logger.error("Failed to read DHT22 sensor")
+            return None
+
+        temperature = sensor_data['temperature']
+        humidity = sensor_data['humidity']
+        if temperature is None or humidity is None:
+            logger.error("Failed to read DHT22")
+            return None
+
+        logger.debug(f"Temperature: {temperature} C, Humidity: {humidity} %")
+        return {'temperature': temperature, 'humidity': humidity}
+
+    def read_sensor(self, name):
+        """Read one sensor, returning its fields or None on failure"""
+        try:
+            return getattr(self, self.SENSOR_READERS[name])()
+        except Exception as e:
+            logger.error(f"Error reading {name}: {e}")
+            return None
+
+    def build_reading(self, values):
+        """Combine per-sensor fields into one timestamped reading"""
+        sensor_data = {
+            "device_id": self.device_id,
+            "temperature": round(float(values['temperature']), 2),
+            "humidity": round(float(values['humidity']), 2),
+            "co2": round(values['co2'], 2),
+            "co": round(values['co'], 2),
+            "pm25": round(values['pm25'], 2),  # Nilai yang sudah dikonversi
+            "timestamp": datetime.now(UTC).isoformat()
+        }
+
+        # One record per reading; the fields travel as structured data
+        logger.info(
+            "Reading: CO %.2f ppm, CO2 %.2f ppm, dust %.2f mg/m3, %.2f C, %.2f %%",
+            sensor_data['co'], sensor_data['co2'], sensor_data['pm25'],
+            sensor_data['temperature'], sensor_data['humidity'],
+            extra={'device_id': self.device_id, 'reading': sensor_data}
+        )
+
+        self.check_alerts(sensor_data)
+        return sensor_data
+
+    def check_alerts(self, reading):
+        """Notify on alert level changes; never blocks (the dispatcher has its own thread)"""
+        if self.notifier is None:
+            return
+        try:
+            with ALERTS_SECONDS.time():
+                levels = self.alert_engine.evaluate_reading(reading, self.device_id)
+            for metric, level in levels.items():
+                previous = self.alert_levels.get(metric, 'normal')
+                if level != previous:
+                    self.alert_levels[metric] = level
+                    self.notifier.submit(Alert(self.device_id, metric, level, reading[metric], previous))
+        except Exception as e:
+            logger.error(f"Alert evaluation failed: {e}")
+
     def read_sensors(self):
         try:
-            print("\n" + "="*50)
-            print("READING SENSORS")
-            print("="*50)
-            
-            # Read GP2Y1014AU (Dust) - Tambahkan konversi ke µg/m³
-            print("\nReading Dust Sensor:")
-            if hasattr(self, 'gp2y1014au'):
-                pm25_value = self.gp2y1014au.read()
-                print(f"PM2.5 Value: {pm25_value:.2f} mg/m3")
-            else:
-                logger.error("GP2Y1014AU sensor not initialized.")
-                return None
-
-            # Baca sensor lainnya seperti biasa
-            co_value = None
-            if hasattr(self, 'mq7'):
-                co_value = self.mq7.read_sensor()
-                if co_value is None:
-                    logger.error("Failed to read MQ7 sensor")
-                    return None
-            else:
-                logger.error("MQ7 sensor not initialized.")
-                return None
-            
-            co2_value = None
-            if hasattr(self, 'mq135'):
-                co2_raw = self.mq135.read_sensor()
-                co2_value = co2_raw + 400
-                if co2_value is None:
-                    logger.error("Failed to read MQ135 sensor")
-                    return None
-            else:
-                logger.error("MQ135 sensor not initialized.")
-                return None
-            
-            temperature = None
-            humidity = None
-            if hasattr(self, 'dht22'):
-                sensor_data = self.dht22.read()
-                if sensor_data:
-                    temperature = sensor_data['temperature']
-                    humidity = sensor_data['humidity']
-                    logger.info(f"Temperature: {temperature} C, Humidity: {humidity} %")
-                else:
-                    logger.error("Failed to read DHT22 sensor")
+            results = self.read_pipeline.read_all()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Sensor read timings: {self.read_pipeline.stats()}")
+
+            values = {}
+            for name in self.SENSOR_READERS:
+                if results[name] is None:
                     return None
-            else:
-                logger.error("DHT22 sensor not initialized.")
-                return None
-            
-            if temperature is None or humidity is None:
-                raise ValueError("Failed to read DHT22")
-            
-            sensor_data = {
-                "device_id": self.device_id,
-                "temperature": round(float(temperature), 2),
-                "humidity": round(float(humidity), 2),
-                "co2": round(co2_value, 2),
-                "co": round(co_value, 2),
-                "pm25": round(pm25_value, 2),  # Nilai yang sudah dikonversi
-                "timestamp": datetime.now(UTC).isoformat()
-            }
-
-            print("\n" + "="*50)
-            print("FINAL READINGS")
-            print("="*50)
-            print(f"{datetime.now().strftime('%H:%M:%S.%f')[:-3]} -> CO Concentration: {sensor_data['co']:.2f} ppm")
-            print(f"{datetime.now().strftime('%H:%M:%S.%f')[:-3]} -> CO2 Concentration: {sensor_data['co2']:.2f} PPM")
-            print(f"{datetime.now().strftime('%H:%M:%S.%f')[:-3]} -> Dust Density: {sensor_data['pm25']:.2f} mg/m3")
-            print(f"{datetime.now().strftime('%H:%M:%S.%f')[:-3]} -> Temperature: {sensor_data['temperature']:.2f} C")
-            print(f"{datetime.now().strftime('%H:%M:%S.%f')[:-3]} -> Humidity: {sensor_data['humidity']:.2f} %")
-            print("="*50 + "\n")
-
-            return sensor_data
+                values.update(results[name])
+
+            return self.build_reading(values)
 
         except Exception as e:
             logger.error(f"Error reading sensors: {e}")
             return None
 
-    def send_to_supabase(self, data):
-        if not data:
-            return False
+    def format_row(self, data):
+        """Build the sensor_data row for Supabase with proper rounding"""
+        return {
+            "id": str(uuid.uuid4()),
+            "timestamp": data["timestamp"],
+            "co2": round(float(data["co2"]), 2),
+            "pm25": round(float(data["pm25"]), 2),
+            "co": round(float(data["co"]), 2),
+            "temperature": round(float(data["temperature"]), 2),
+            "humidity": round(float(data["humidity"]), 2),
+            "device_id": data["device_id"],
+            "created_at": datetime.now(UTC).isoformat()
+        }
+
+    def rows_for(self, data):
+        """Formatted rows to upload for a reading; empty while the aggregator holds it"""
+        return [self.format_row(reading) for reading in self.aggregator.add(data)]
+
+    def queue_reading(self, data):
+        """Persist a reading in the local queue without triggering an upload
 
+        Returns:
+            bool: True if the reading was queued (or absorbed by the aggregator)
+        """
         try:
-            # Format data with proper rounding
-            formatted_data = {
-                "id": str(uuid.uuid4()),
-                "timestamp": data["timestamp"],
-                "co2": round(float(data["co2"]), 2),
-                "pm25": round(float(data["pm25"]), 2),
-                "co": round(float(data["co"]), 2),
-                "temperature": round(float(data["temperature"]), 2),
-                "humidity": round(float(data["humidity"]), 2),
-                "device_id": data["device_id"],
-                "created_at": datetime.now(UTC).isoformat()
-            }
-
-            if self.debug_mode:
-                logger.debug(f"Sending data to Supabase: {formatted_data}")
-
-            response = requests.post(
-                f"{SUPABASE_URL}/rest/v1/sensor_data",
-                json=formatted_data,
-                headers={
-                    "apikey": SUPABASE_KEY,
-                    "Authorization": f"Bearer {SUPABASE_KEY}",
-                    "Content-Type": "application/json",
-                    "Prefer": "return=minimal"
-                },
-                timeout=10
-            )
-
-            response.raise_for_status()
-            print("Data sent successfully to Supabase")
-            self.consecutive_errors = 0
+            rows = self.rows_for(data)
+            if rows:
+                self.queue.enqueue_many(rows)
             return True
+        except Exception as e:
+            logger.error(f"Failed to queue data locally: {e}")
+            return False
+
+    def send_to_supabase(self, data):
+        """Queue a reading locally and upload the backlog
 
-        except requests.exceptions.RequestException as e:
-            self.consecutive_errors += 1
-            logger.error(f"Failed to send data: {e}")
-            
-            if self.consecutive_errors >= self.MAX_CONSECUTIVE_ERRORS:
-                self._save_failed_data(formatted_data)
-            
+        Returns:
+            bool: True if the reading was stored (in the queue or remotely)
+        """
+        if not data:
             return False
 
-    def _save_failed_data(self, data):
-        """Save failed data submissions to file"""
+        rows = self.rows_for(data)
+        if not rows:
+            # Held by the edge aggregator until its window closes or the value moves
+            return True
+
         try:
-            filename = f"failed_data_{datetime.now(UTC).strftime('%Y%m%d_%H%M%S')}.json"
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=2)
-            logger.warning(f"Failed data saved to {filename}")
+            self.queue.enqueue_many(rows)
         except Exception as e:
-            logger.error(f"Failed to save failed data: {e}")
+            # Queue unavailable (e.g. disk full), fall back to a direct upload
+            logger.error(f"Failed to queue data locally: {e}")
+            try:
+                return self.drainer.upload_fn(rows)
+            except BatchRejected as e:
+                logger.error(f"Reading rejected by the server and dropped: {e}")
+                return False
+
+        if self.drainer.is_alive():
+            # Uploads happen once a full batch is queued or the flush interval passes
+            self.drainer.notify_enqueued(len(rows))
+            return True
+
+        # No background drainer (single-shot use), upload inline
+        self.drainer.drain()
+        return True
+
+    def sample_sensor(self, name):
+        """Scheduled job for sensors sampled faster than the report interval"""
+        fields = self.read_sensor(name)
+        if fields is not None:
+            self._latest[name] = (time.monotonic(), fields)
+
+    def report_cycle(self):
+        """Scheduled job: assemble a reading and queue it for upload"""
+        now = time.monotonic()
+        results = {}
+        to_read = []
+
+        for name in self.SENSOR_READERS:
+            sampled_at, fields = self._latest.get(name, (None, None))
+            # Read directly if the scheduled sample is missing or stale
+            if fields is None or now - sampled_at > 2 * self.sensor_intervals[name]:
+                to_read.append(name)
+            else:
+                results[name] = fields
+
+        if to_read:
+            results.update(self.read_pipeline.read_all(to_read))
+
+        values = {}
+        for name in self.SENSOR_READERS:
+            if results[name] is None:
+                logger.warning(f"{self.device_id}: failed to read sensor data")
+                return
+            values.update(results[name])
+
+        # Sampling carries on at its own cadence whether or not this upload succeeds
+        if not self.send_to_supabase(self.build_reading(values)):
+            logger.error(f"{self.device_id}: failed to store sensor data")
+
+    def run(self, interval=None):
+        interval = interval or self.sampling_interval
+        logger.info(f"Starting sensor handler with {interval} second interval")
+        if self.owns_drainer:
+            self.drainer.start()
+        if self.notifier is not None and self.owns_notifier and not self.notifier.is_alive():
+            self.notifier.start()
+
+        self._latest = {}
+        self.scheduler = IntervalScheduler()
+        for name in self.SENSOR_READERS:
+            rate = self.sensor_intervals.get(name)
+            if rate and rate < interval:
+                self.scheduler.add(f"sample-{name}", rate, partial(self.sample_sensor, name))
+            else:
+                self.sensor_intervals[name] = interval
+        self.scheduler.add('report', interval, self.report_cycle)
 
-    def run(self, interval=30):
-        print(f"\nStarting sensor handler with {interval} second interval")
-        last_send_time = 0
-        
         try:
-            while True:
-                current_time = time.time()
-                
-                if current_time - last_send_time >= interval:
-                    print("\nReading sensors...")
-                    sensor_data = self.read_sensors()
-                    
-                    if sensor_data:
-                        if self.send_to_supabase(sensor_data):
-                            last_send_time = current_time
-                            print("Data successfully sent to Supabase")
-                        else:
-                            print("Failed to send data to Supabase")
-                    else:
-                        print("Failed to read sensor data")
-                
-                time.sleep(1)  # Match Arduino delay
+            self.scheduler.run()
         
         except KeyboardInterrupt:
-            print("\nSensor handler stopped by user")
+            logger.info("Sensor handler stopped by user")
         except Exception as e:
             logger.critical(f"Critical error in sensor handler: {e}")
             raise
         finally:
             self.cleanup()
 
+    def stop(self):
+        """Stop run() from another thread"""
+        if self.scheduler is not None:
+            self.scheduler.stop()
+
+    def flush_aggregates(self):
+        """Queue the partially filled aggregation window, e.g. before shutting down"""
+        try:
+            rows = [self.format_row(reading) for reading in self.aggregator.flush()]
+            if rows:
+                self.queue.enqueue_many(rows)
+        except Exception as e:
+            logger.error(f"Failed to queue final aggregate: {e}")
+
     def cleanup(self):
-        print("\nCleaning up sensor resources")
+        logger.info("Cleaning up sensor resources")
+        self.read_pipeline.shutdown()
+        self.flush_aggregates()
+        if self.owns_drainer:
+            # Unsent rows stay in the queue and go out after the next start
+            if self.drainer.is_alive() and not self.drainer.stop(timeout=15):
+                # Closing the queue under a running upload would fail it mid-batch
+                logger.error("Queue drainer did not stop within 15s, leaving the queue open")
+            else:
+                self.queue.close()
+        if self.raw_capture and self.owns_raw_capture:
+            self.raw_capture.close()
+        if self.notifier is not None and self.owns_notifier and self.notifier.is_alive():
+            self.notifier.stop(timeout=15)
 
 if __name__ == "__main__":
     try:
-        # Set up logging
-        logging.getLogger().setLevel(logging.DEBUG)
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.DEBUG)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        console_handler.setFormatter(formatter)
-        logging.getLogger().addHandler(console_handler)
-        
+        # Queue-based logging with rotation, per LOGGING_CONFIG
+        setup_logging()
+
         logger.debug("Starting sensor handler initialization")
         
         # Initialize and run the sensor handler
@@ -1,33 +1,32 @@
 # dht22.py
 import time
 import math  # Import math module for isnan
+import logging
 try:
     import machine
     REAL_HARDWARE = True
 except ImportError:
-    from sensors.mock_hardware import Pin
+    from sensors.mock_hardware import DHT, Pin
     REAL_HARDWARE = False
 
+logger = logging.getLogger(__name__)
+
 class DHT22Handler:
     def __init__(self, pin):
         if REAL_HARDWARE:
             self.sensor = machine.DHT(machine.Pin(pin), machine.DHT.DHT22)
         else:
-            self.sensor = Pin(pin, Pin.IN)
+            self.sensor = DHT(Pin(pin, Pin.IN), DHT.DHT22)
+        self.warmup = 0.2  # seconds before each measurement
 
     def read(self):
         try:
-            time.sleep(0.2)  # sensor warmup
-            if REAL_HARDWARE:
-                self.sensor.measure()
-                temp = self.sensor.temperature()
-                hum = self.sensor.humidity()
-            else:
-                # Mock values for testing
-                temp = 25.0
-                hum = 50.0
-            
-            print(f"DHT22 Raw - Temp: {temp:.2f}°C, Humidity: {hum:.2f}%")
+            time.sleep(self.warmup)  # sensor warmup
+            self.sensor.measure()
+            temp = self.sensor.temperature()
+            hum = self.sensor.humidity()
+
+            logger.debug(f"DHT22 Raw - Temp: {temp:.2f}°C, Humidity: {hum:.2f}%")
             
             if not (math.isnan(temp) or math.isnan(hum)):  # Use math.isnan
                 return {
@@ -36,5 +35,5 @@ class DHT22Handler:
                 }
             return None
         except Exception as e:
-            print(f"DHT22 error: {e}")
+            logger.error(f"DHT22 error: {e}")
             return None
\ No newline at end of file
@@ -1,5 +1,7 @@
 # gp2y1014au.py
 import time
+import logging
+
 try:
     import machine
     REAL_HARDWARE = True
@@ -7,53 +9,72 @@ except ImportError:
     from sensors.mock_hardware import ADC, Pin
     REAL_HARDWARE = False
 
+from sensors.lut import dust_density, dust_lookup
+from sensors.sampling import BurstSampler
+
+logger = logging.getLogger(__name__)
+
 class GP2Y1014AU:
-    def __init__(self, pin):
+    def __init__(self, pin, sampling=None, capture=None):
         if REAL_HARDWARE:
             self.adc = machine.ADC(machine.Pin(pin))
             if hasattr(self.adc, 'atten'):
                 self.adc.atten(machine.ADC.ATTN_11DB)
         else:
             self.adc = ADC(pin)
-        
+
         # Set LED pin
         if REAL_HARDWARE:
             self.LED_POWER_PIN = machine.Pin(4, machine.Pin.OUT)
         else:
             self.LED_POWER_PIN = Pin(4, Pin.OUT)
-        
+
         # Constants - exact match with Arduino
         self.VOLTAGE_REF = 3.3  # ESP32 uses 3.3V reference
         self.ADC_RESOLUTION = 4095  # 12-bit ADC
 
+        # Each sample is one LED pulse; the burst is filtered as a whole
+        self.sampler = BurstSampler.from_config(self._pulse_read, sampling)
+
+        # Optional capture(sensor, raw_codes) hook, e.g. RawCaptureLog.recorder()
+        self.capture = capture
+
+    def _pulse_read(self):
+        # Exactly match Arduino timing
+        self.LED_POWER_PIN.value(0)  # LED on
+        time.sleep(0.001)  # Sleep for 1 millisecond
+        voMeasured = self.adc.read()  # Raw ADC reading
+        time.sleep(0.001)   # Wait 1 millisecond
+        self.LED_POWER_PIN.value(1)  # LED off
+        time.sleep(0.001) # Wait for remaining cycle
+        return voMeasured
+
+    def to_density(self, raw_adc):
+        """Dust density in mg/m3 for raw ADC codes, scalar or array"""
+        # Use exact Arduino formula, negative densities clamp to 0 like the Arduino code
+        return dust_density(raw_adc, self.VOLTAGE_REF, self.ADC_RESOLUTION)
+
+    def lookup_density(self, raw_adc):
+        """Density via the shared lookup table"""
+        return dust_lookup(raw_adc, self.VOLTAGE_REF, self.ADC_RESOLUTION)
+
     def read(self):
         try:
-            # Exactly match Arduino timing
-            self.LED_POWER_PIN.value(0)  # LED on
-            time.sleep(0.001)  # Sleep for 1 millisecond
-            voMeasured = self.adc.read()  # Raw ADC reading
-            time.sleep(0.001)   # Wait 1 millisecond
-            self.LED_POWER_PIN.value(1)  # LED off
-            time.sleep(0.001) # Wait for remaining cycle
-            
-            # Debug prints
-            print(f"Raw ADC value: {voMeasured}")
-            
-            # Convert to voltage - match Arduino exactly
-            calcVoltage = voMeasured * (self.VOLTAGE_REF / self.ADC_RESOLUTION)
-            print(f"Calculated voltage: {calcVoltage:.3f}V")
-            
-            # Use exact Arduino formula
-            dustDensity = 0.17 * calcVoltage - 0.1
-            
-            # Match Arduino behavior
-            if dustDensity < 0:
-                dustDensity = 0.0
-                
-            print(f"Calculated dust density: {dustDensity:.3f} mg/m3")
-            
+            raw = self.sampler.acquire()
+            if self.capture:
+                self.capture('gp2y1014au', raw)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Raw ADC value: {raw.mean():.1f} ({raw.size} samples)")
+
+            dustDensity = self.sampler.reduce(self.lookup_density(raw))
+            if dustDensity is None:
+                raise ValueError("no valid ADC samples")
+
+            logger.debug(f"Calculated dust density: {dustDensity:.3f} mg/m3")
+
             return round(dustDensity, 2)
-            
+
         except Exception as e:
-            print(f"Dust sensor error: {e}")
-            return 0.0
\ No newline at end of file
+            logger.error(f"Dust sensor error: {e}")
+            return 0.0
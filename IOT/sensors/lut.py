@@ -0,0 +1,162 @@
+# lut.py
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+ADC_CODES = 4096  # 12-bit ADC
+
+# Arduino curve parameters, same as config.SENSOR_CALIBRATION
+DEFAULT_CALIBRATION = {
+    'mq7': {'slope': 99.042, 'intercept': -1.518, 'r0': 27.5},
+    'mq135': {'slope': 110.47, 'intercept': -2.862, 'r0': 3.6}
+}
+
+# Clean-air CO2 the MQ135 curve is offset by (MQUnifiedsensor)
+MQ135_BASELINE_PPM = 400
+# SensorHandler reports CO2 this far above the MQ135 driver's reading
+REPORTED_CO2_OFFSET = 400
+
+
+def mq7_ppm(raw_adc, a, b, r0, volt_resolution=5, adc_resolution=ADC_CODES - 1):
+    """MQ7 CO ppm for raw ADC codes (Arduino MQ7 formula), scalar or array"""
+    voltage = np.asarray(raw_adc, dtype=np.float64) * (volt_resolution / adc_resolution)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        rs = (volt_resolution - voltage) / voltage
+        return a * np.power(rs / r0, b)
+
+
+def mq7_rs(raw_adc, volt_resolution=5, adc_resolution=ADC_CODES - 1):
+    """MQ7 sensor resistance relative to the load resistor"""
+    voltage = np.asarray(raw_adc, dtype=np.float64) * (volt_resolution / adc_resolution)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (volt_resolution - voltage) / voltage
+
+
+def mq7_curve(raw_adc, a, b, volt_resolution=5, adc_resolution=ADC_CODES - 1):
+    """
+    R0-independent part of the MQ7 curve, a * rs^b
+
+    ppm = mq7_curve(raw_adc, a, b) * r0 ** -b, so one table of this serves
+    every unit with the same curve, whatever its calibrated R0.
+    """
+    rs = mq7_rs(raw_adc, volt_resolution, adc_resolution)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        return a * np.power(rs, b)
+
+
+def mq135_ppm(raw_adc, a, b, ratio_clean_air, volt_resolution=5, adc_bits=12):
+    """MQ135 CO2 ppm including the 400 ppm baseline (MQUnifiedsensor formula)"""
+    voltage = np.asarray(raw_adc, dtype=np.float64) * (volt_resolution / ((1 << adc_bits) - 1))
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        rs_ro_ratio = (volt_resolution / voltage) - 1
+        return a * np.power(rs_ro_ratio / ratio_clean_air, b) + MQ135_BASELINE_PPM
+
+
+def reported_co2(driver_ppm):
+    """CO2 as uploaded for an MQ135 driver reading, scalar or array"""
+    return driver_ppm + REPORTED_CO2_OFFSET
+
+
+def dust_density(raw_adc, volt_ref=3.3, adc_resolution=ADC_CODES - 1):
+    """GP2Y1014AU dust density in mg/m3, negative values clamped to 0"""
+    voltage = np.asarray(raw_adc, dtype=np.float64) * (volt_ref / adc_resolution)
+    return np.maximum(0.17 * voltage - 0.1, 0.0)
+
+
+class LookupTableRegistry:
+    """
+    Process-wide cache of conversion tables indexed by raw ADC code.
+
+    A table holds the converted value for every possible ADC code, so
+    converting a burst (or millions of logged samples) is one indexed
+    gather instead of a division and pow() per sample. Tables are keyed
+    on the curve parameters, built on first use and shared by every
+    driver instance with the same curve; per-unit factors such as MQ7's
+    R0 are applied to the gathered values instead of baked into the
+    table. Changing a sensor's calibration produces a new key, and that
+    table is built lazily on the next read.
+    """
+
+    def __init__(self, max_tables=256):
+        self.max_tables = max_tables
+        self.builds = 0
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, convert, size=ADC_CODES):
+        """Return the table for ``key``, building it with ``convert(codes)`` if needed"""
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+
+        table = np.asarray(convert(np.arange(size)), dtype=np.float64)
+        table.setflags(write=False)
+
+        with self._lock:
+            self._tables[key] = table
+            self.builds += 1
+            while len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+        return table
+
+    def lookup(self, key, convert, raw_adc, size=ADC_CODES):
+        """Convert raw ADC codes via the table for ``key``"""
+        table = self.get(key, convert, size)
+        codes = np.clip(np.asarray(raw_adc).astype(np.intp), 0, size - 1)
+        return table[codes]
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+
+    def __len__(self):
+        return len(self._tables)
+
+
+# Shared by all sensor instances in the process
+TABLES = LookupTableRegistry()
+
+
+# Table-backed conversions used by the drivers and by raw_capture.Reprocessor,
+# so reconverted captures come out exactly like the live readings
+
+def mq7_lookup(raw_adc, a, b, r0, volt_resolution=5, adc_resolution=ADC_CODES - 1):
+    """MQ7 ppm via the table for the curve, scaled by ``r0`` (scalar or one per code)"""
+    curve = TABLES.lookup(('mq7', a, b, volt_resolution, adc_resolution),
+                          lambda codes: mq7_curve(codes, a, b, volt_resolution, adc_resolution),
+                          raw_adc, adc_resolution + 1)
+    return curve * np.power(r0, -b)
+
+
+def mq135_lookup(raw_adc, a, b, ratio_clean_air, volt_resolution=5, adc_bits=12):
+    """MQ135 ppm (baseline included) via the table for the calibration"""
+    return TABLES.lookup(('mq135', a, b, ratio_clean_air, volt_resolution, adc_bits),
+                         lambda codes: mq135_ppm(codes, a, b, ratio_clean_air, volt_resolution, adc_bits),
+                         raw_adc, 1 << adc_bits)
+
+
+def dust_lookup(raw_adc, volt_ref=3.3, adc_resolution=ADC_CODES - 1):
+    """GP2Y1014AU dust density via the table for the ADC reference"""
+    return TABLES.lookup(('gp2y1014au', volt_ref, adc_resolution),
+                         lambda codes: dust_density(codes, volt_ref, adc_resolution),
+                         raw_adc, adc_resolution + 1)
+
+
+def calibration_params(calibration):
+    """
+    Map a SENSOR_CALIBRATION / CUSTOM_CALIBRATION entry to driver params
+
+    Args:
+        calibration (dict): {'slope', 'intercept', 'r0'}
+
+    Returns:
+        dict: {'A', 'B', 'RATIO_CLEAN_AIR'}
+    """
+    return {
+        'A': calibration['slope'],
+        'B': calibration['intercept'],
+        'RATIO_CLEAN_AIR': calibration['r0']
+    }
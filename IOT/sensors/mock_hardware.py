@@ -1,5 +1,8 @@
 # mock_hardware.py
 import random
+import logging
+
+logger = logging.getLogger(__name__)
 
 class Pin:
     IN = 'IN'
@@ -11,7 +14,7 @@ class Pin:
         
     def value(self, val=None):
         if val is not None:
-            print(f"Setting pin {self.pin_num} to {val}")
+            logger.debug(f"Setting pin {self.pin_num} to {val}")
         return val
 
 class ADC:
@@ -20,15 +23,41 @@ class ADC:
     ATTN_6DB = 2
     ATTN_11DB = 3
     
-    def __init__(self, pin):
+    def __init__(self, pin, source=None):
         self.pin = pin
         self._attenuation = self.ATTN_11DB
+        # Optional zero-argument callable returning the next ADC code (simulator.py)
+        self.source = source
         
     def atten(self, value):
         self._attenuation = value
         
     def read(self):
+        if self.source is not None:
+            return self.source()
         # Simulate different ranges based on attenuation
         if self._attenuation == self.ATTN_11DB:
             return random.randint(1000, 4000)
-        return random.randint(0, 4095)
\ No newline at end of file
+        return random.randint(0, 4095)
+
+class DHT:
+    """Stand-in for machine.DHT; fixed 25 C / 50 % unless given a source"""
+    DHT22 = 22
+
+    def __init__(self, pin, kind=DHT22, source=None):
+        self.pin = pin
+        self.kind = kind
+        # Optional zero-argument callable returning (temperature, humidity)
+        self.source = source
+        self._temperature = 25.0
+        self._humidity = 50.0
+
+    def measure(self):
+        if self.source is not None:
+            self._temperature, self._humidity = self.source()
+
+    def temperature(self):
+        return self._temperature
+
+    def humidity(self):
+        return self._humidity
@@ -1,5 +1,4 @@
 # mq135.py
-import math
 import logging
 
 try:
@@ -9,35 +8,63 @@ except ImportError:
     from sensors.mock_hardware import ADC, Pin
     REAL_HARDWARE = False
 
+from sensors.lut import calibration_params, mq135_lookup, mq135_ppm
+from sensors.sampling import BurstSampler
+
+logger = logging.getLogger(__name__)
+
 class MQ135:
-    def __init__(self, pin, params):
+    def __init__(self, pin, params, sampling=None, capture=None):
         if REAL_HARDWARE:
             self.adc = machine.ADC(machine.Pin(pin))
             if hasattr(self.adc, 'atten'):
                 self.adc.atten(machine.ADC.ATTN_11DB)
         else:
             self.adc = ADC(pin)
-        
+
         # Exact same parameters as Arduino
         self.VOLTAGE_RESOLUTION = params['VOLTAGE_RESOLUTION']
         self.ADC_BIT_RESOLUTION = params['ADC_BIT_RESOLUTION']
         self.RATIO_CLEAN_AIR = params['RATIO_CLEAN_AIR']
         self.A = params['A']
         self.B = params['B']
-        
+
+        # Oversampling: N raw samples per reading, converted and filtered together
+        self.sampler = BurstSampler.from_config(self.adc.read, sampling)
+
+        # Optional capture(sensor, raw_codes) hook, e.g. RawCaptureLog.recorder()
+        self.capture = capture
+
     def update(self):
         pass
 
+    def to_ppm(self, raw_adc):
+        """CO2 concentration (including the 400 ppm baseline) for raw ADC codes, scalar or array"""
+        # Use exact same formula as Arduino MQUnifiedsensor
+        return mq135_ppm(raw_adc, self.A, self.B, self.RATIO_CLEAN_AIR,
+                         self.VOLTAGE_RESOLUTION, self.ADC_BIT_RESOLUTION)
+
+    def lookup_ppm(self, raw_adc):
+        """ppm via the shared lookup table for the current calibration"""
+        return mq135_lookup(raw_adc, self.A, self.B, self.RATIO_CLEAN_AIR,
+                            self.VOLTAGE_RESOLUTION, self.ADC_BIT_RESOLUTION)
+
+    def apply_calibration(self, calibration):
+        """Switch to a SENSOR_CALIBRATION / CUSTOM_CALIBRATION entry"""
+        params = calibration_params(calibration)
+        self.A = params['A']
+        self.B = params['B']
+        self.RATIO_CLEAN_AIR = params['RATIO_CLEAN_AIR']
+
     def read_sensor(self):
         try:
-            raw_adc = self.adc.read()
-            voltage = raw_adc * (self.VOLTAGE_RESOLUTION / ((1 << self.ADC_BIT_RESOLUTION) - 1))
-            rs_ro_ratio = ((self.VOLTAGE_RESOLUTION / voltage) - 1)
-            
-            # Use exact same formula as Arduino MQUnifiedsensor
-            ppm = self.A * pow(rs_ro_ratio / self.RATIO_CLEAN_AIR, self.B)
-            co2_value = ppm + 400
+            raw_adc = self.sampler.acquire()
+            if self.capture:
+                self.capture('mq135', raw_adc)
+            co2_value = self.sampler.reduce(self.lookup_ppm(raw_adc))
+            if co2_value is None:
+                raise ValueError("no valid ADC samples")
             return co2_value
         except Exception as e:
-            logging.error(f"MQ135 read error: {e}")
-            return 0
\ No newline at end of file
+            logger.error(f"MQ135 read error: {e}")
+            return 0
@@ -1,4 +1,8 @@
 # mq7.py
+import logging
+
+import numpy as np
+
 try:
     import machine
     REAL_HARDWARE = True
@@ -6,36 +10,67 @@ except ImportError:
     from sensors.mock_hardware import ADC, Pin
     REAL_HARDWARE = False
 
+from sensors.lut import calibration_params, mq7_lookup, mq7_ppm, mq7_rs
+from sensors.sampling import BurstSampler
+
+logger = logging.getLogger(__name__)
+
 class MQ7:
-    def __init__(self, pin, params):
+    def __init__(self, pin, params, sampling=None, capture=None):
         if REAL_HARDWARE:
             self.adc = machine.ADC(machine.Pin(pin))
             if hasattr(self.adc, 'atten'):
                 self.adc.atten(machine.ADC.ATTN_11DB)
         else:
             self.adc = ADC(pin)
-        
+
         # Exact Arduino parameters
-        self.R0 = None
-        self.calibrate()
         self.VOLT_RESOLUTION = params['VOLTAGE_RESOLUTION']
         self.ADC_RESOLUTION = (1 << params['ADC_BIT_RESOLUTION']) - 1  # 12-bit ADC
         self.A = params['A']
         self.B = params['B']
         self.RATIO_CLEAN_AIR = params['RATIO_CLEAN_AIR']
 
+        # Oversampling: N raw samples per reading, converted and filtered together
+        self.sampler = BurstSampler.from_config(self.adc.read, sampling)
+
+        # Optional capture(sensor, raw_codes) hook, e.g. RawCaptureLog.recorder()
+        self.capture = capture
+
+        self.R0 = None
+        self.calibrate()
+
         # Debugging: Log initialization parameters
         logger.debug(f"MQ7 initialized with pin: {pin}, params: {params}")
 
+    def to_rs(self, raw_adc):
+        """Sensor resistance (relative to load) for raw ADC codes, scalar or array"""
+        return mq7_rs(raw_adc, self.VOLT_RESOLUTION, self.ADC_RESOLUTION)
+
+    def to_ppm(self, raw_adc):
+        """CO concentration for raw ADC codes, scalar or array"""
+        # Direct match with Arduino code
+        return mq7_ppm(raw_adc, self.A, self.B, self.R0, self.VOLT_RESOLUTION, self.ADC_RESOLUTION)
+
+    def lookup_ppm(self, raw_adc):
+        """ppm via the lookup table shared by all MQ7s on this curve, scaled for this unit's R0"""
+        return mq7_lookup(raw_adc, self.A, self.B, self.R0, self.VOLT_RESOLUTION, self.ADC_RESOLUTION)
+
+    def apply_calibration(self, calibration):
+        """Switch to a SENSOR_CALIBRATION / CUSTOM_CALIBRATION entry and recalibrate R0"""
+        params = calibration_params(calibration)
+        self.A = params['A']
+        self.B = params['B']
+        self.RATIO_CLEAN_AIR = params['RATIO_CLEAN_AIR']
+        self.calibrate()
+
     def calibrate(self):
         # Implementasi kalibrasi R0 seperti di Arduino
-        calcR0 = 0
-        for _ in range(10):
-            raw_adc = self.adc.read()
-            voltage = raw_adc * (self.VOLT_RESOLUTION / self.ADC_RESOLUTION)
-            rs = (self.VOLT_RESOLUTION - voltage) / voltage
-            calcR0 += rs / self.RATIO_CLEAN_AIR  # Sesuaikan dengan parameter clean air
-        self.R0 = calcR0 / 10
+        raw = np.array([self.adc.read() for _ in range(10)], dtype=np.float64)
+        if self.capture:
+            self.capture('mq7_calibration', raw)
+        rs = self.to_rs(raw)
+        self.R0 = float(np.mean(rs[np.isfinite(rs)] / self.RATIO_CLEAN_AIR))  # Sesuaikan dengan parameter clean air
 
         # Debugging: Log calibration result
         logger.debug(f"MQ7 calibration complete, R0: {self.R0}")
@@ -43,22 +78,19 @@ class MQ7:
     def read_sensor(self):
         try:
             # Debug raw values
-            raw_adc = self.adc.read()
-            logger.debug(f"MQ7 Raw ADC: {raw_adc}")
-            
-            # Match Arduino exactly
-            voltage = raw_adc * (self.VOLT_RESOLUTION / self.ADC_RESOLUTION)
-            logger.debug(f"MQ7 Voltage: {voltage:.3f}V")
-
-            rs = (self.VOLT_RESOLUTION - voltage) / voltage
-            ratio = rs / self.R0
-            
-            # Direct match with Arduino code
-            co_ppm = self.A * pow(ratio, self.B)
+            raw_adc = self.sampler.acquire()
+            if self.capture:
+                self.capture('mq7', raw_adc)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"MQ7 Raw ADC: {raw_adc.mean():.1f} ({raw_adc.size} samples)")
+
+            co_ppm = self.sampler.reduce(self.lookup_ppm(raw_adc))
+            if co_ppm is None:
+                raise ValueError("no valid ADC samples")
             logger.debug(f"MQ7 CO PPM: {co_ppm:.2f}")
-            
+
             return co_ppm
-            
+
         except Exception as e:
             logger.error(f"MQ7 error: {e}")
-            return 0
\ No newline at end of file
+            return 0
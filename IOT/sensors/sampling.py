@@ -0,0 +1,82 @@
+# sampling.py
+import numpy as np
+
+FILTERS = ('median', 'trimmed_mean', 'mean', 'ema')
+
+
+class BurstSampler:
+    """
+    Take several ADC samples per reading and reduce them to one value.
+
+    Samples go into a preallocated array so a burst allocates nothing;
+    drivers convert the whole array to physical units with NumPy and then
+    call reduce() to filter out noise:
+
+    - ``median``: robust to single-sample spikes
+    - ``trimmed_mean``: mean after dropping ``trim_fraction`` from each end
+    - ``mean``: plain average
+    - ``ema``: burst mean smoothed across readings with ``ema_alpha``
+    """
+
+    def __init__(self, read_fn, samples=1, filter='median', trim_fraction=0.1, ema_alpha=0.3):
+        if samples < 1:
+            raise ValueError("samples must be at least 1")
+        if filter not in FILTERS:
+            raise ValueError(f"Unknown filter '{filter}'. Expected one of {FILTERS}")
+
+        self.read_fn = read_fn
+        self.samples = samples
+        self.filter = filter
+        self.trim_fraction = trim_fraction
+        self.ema_alpha = ema_alpha
+        self.buffer = np.empty(samples, dtype=np.float64)
+        self._ema = None
+
+    @classmethod
+    def from_config(cls, read_fn, config=None):
+        """Build a sampler from an ADC_OVERSAMPLING-style dict"""
+        config = config or {}
+        return cls(
+            read_fn,
+            samples=config.get('samples', 1),
+            filter=config.get('filter', 'median'),
+            trim_fraction=config.get('trim_fraction', 0.1),
+            ema_alpha=config.get('ema_alpha', 0.3)
+        )
+
+    def acquire(self):
+        """Fill the buffer with raw ADC codes and return it"""
+        buffer = self.buffer
+        read = self.read_fn
+        for i in range(self.samples):
+            buffer[i] = read()
+        return buffer
+
+    def reduce(self, values):
+        """
+        Filter converted sample values down to one reading
+
+        Non-finite values (e.g. from a zero ADC code) are ignored.
+
+        Returns:
+            float: Filtered value, or None if no sample was usable
+        """
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return None
+
+        if self.filter == 'median':
+            return float(np.median(values))
+
+        if self.filter == 'trimmed_mean':
+            trim = int(values.size * self.trim_fraction)
+            if trim and values.size > 2 * trim:
+                values = np.sort(values)[trim:values.size - trim]
+            return float(values.mean())
+
+        value = float(values.mean())
+        if self.filter == 'ema':
+            if self._ema is not None:
+                value = self.ema_alpha * value + (1 - self.ema_alpha) * self._ema
+            self._ema = value
+        return value
@@ -0,0 +1,388 @@
+# simulator.py
+import os
+import csv
+import json
+import math
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from functools import partial
+
+import numpy as np
+
+from sensors.lut import MQ135_BASELINE_PPM, REPORTED_CO2_OFFSET
+from sensors.mq7 import REAL_HARDWARE
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('co2', 'pm25', 'co', 'temperature', 'humidity')
+ADC_NOISE_CODES = 2.0  # Gaussian noise per ADC sample, in codes
+
+
+class SimClock:
+    """Simulated wall clock running ``speed`` times faster than real time"""
+
+    def __init__(self, speed=1.0, start=None):
+        self.speed = speed
+        self.start = time.time() if start is None else start
+        self._t0 = time.monotonic()
+
+    def __call__(self):
+        return self.start + (time.monotonic() - self._t0) * self.speed
+
+
+def _bump(hour, start, end):
+    """Half-sine between start and end hours, 0 outside"""
+    phase = (hour - start) / (end - start)
+    return np.where((phase >= 0) & (phase <= 1), np.sin(np.pi * np.clip(phase, 0, 1)), 0.0)
+
+
+class FleetModel:
+    """
+    Correlated air-quality time series for a fleet of virtual devices.
+
+    All devices advance together as NumPy arrays, at most once per
+    ``resolution`` simulated seconds, so thousands of devices cost about
+    the same as one. Each device gets its own randomised room:
+
+    - occupancy follows an office (weekday 8-18) or home (morning and
+      evening) diurnal profile; CO2 relaxes towards outdoor air plus an
+      occupancy load with the room's ventilation time constant
+    - temperature follows the day and occupancy, relative humidity moves
+      against temperature
+    - PM2.5 has random spikes (cooking, smoking) that decay over minutes;
+      CO rises with the same combustion events
+    - gas sensors drift a little per day, and devices drop out now and
+      then (the sensors then read nothing)
+    """
+
+    def __init__(self, n_devices, seed=None, clock=time.time, resolution=1.0):
+        rng = self.rng = np.random.default_rng(seed)
+        self.n = n_devices
+        self.clock = clock
+        self.resolution = resolution
+
+        self.tz_offset = rng.uniform(-1, 1, n_devices)
+        self.office = rng.random(n_devices) < 0.6
+        self.peak = rng.uniform(0.3, 1.0, n_devices)
+        self.outdoor_co2 = rng.normal(420, 10, n_devices)
+        self.co2_gain = rng.uniform(600, 1400, n_devices)
+        self.co2_tau = rng.uniform(900, 2400, n_devices)
+        self.temp_base = rng.normal(24, 1.5, n_devices)
+        self.temp_amp = rng.uniform(1, 3, n_devices)
+        self.humidity_base = rng.normal(50, 8, n_devices)
+        self.pm_base = rng.uniform(0.01, 0.04, n_devices)      # mg/m3
+        self.spike_rate = rng.uniform(0.1, 0.5, n_devices) / 3600
+        self.co_base = rng.uniform(0.5, 2.0, n_devices)
+        self.drift_per_day = rng.normal(0, 0.01, n_devices)
+        self.dropout_rate = rng.uniform(0, 2, n_devices) / 86400
+
+        self.co2 = self.outdoor_co2.copy()
+        self.pm_spike = np.zeros(n_devices)
+        self.offline_until = np.full(n_devices, -np.inf)
+        self.t0 = self.t = clock()
+        self.current = None
+        self._lock = threading.Lock()
+        self._advance(self.t, 0.0)
+
+    def _advance(self, t, dt):
+        rng = self.rng
+        hour = (t / 3600 + self.tz_offset) % 24
+        weekday = ((t // 86400 + 3) % 7) < 5  # 1970-01-01 was a Thursday
+
+        office = _bump(hour, 8, 18) * weekday
+        home = 0.6 * _bump(hour, 6, 8.5) + _bump(hour, 17, 23)
+        occupancy = np.clip(self.peak * np.where(self.office, office, home)
+                            + rng.normal(0, 0.05, self.n), 0, 1)
+
+        target = self.outdoor_co2 + self.co2_gain * occupancy
+        self.co2 += (target - self.co2) * (1 - np.exp(-dt / self.co2_tau))
+
+        spikes = rng.poisson(self.spike_rate * dt)
+        self.pm_spike = self.pm_spike * math.exp(-dt / 600) + spikes * rng.exponential(0.08, self.n)
+
+        drift = 1 + self.drift_per_day * (t - self.t0) / 86400
+        temperature = (self.temp_base + self.temp_amp * np.sin(2 * np.pi * (hour - 9) / 24)
+                       + 1.5 * occupancy + rng.normal(0, 0.05, self.n))
+
+        went_offline = rng.random(self.n) < self.dropout_rate * dt
+        self.offline_until[went_offline] = t + rng.exponential(300, went_offline.sum())
+
+        self.current = {
+            'co2': self.outdoor_co2 + (self.co2 - self.outdoor_co2) * drift,
+            'pm25': (self.pm_base + 0.02 * occupancy + self.pm_spike) * drift,
+            'co': (self.co_base + 15 * self.pm_spike) * drift,
+            'temperature': temperature,
+            'humidity': np.clip(self.humidity_base - 2 * (temperature - self.temp_base)
+                                + rng.normal(0, 0.5, self.n), 15, 95)
+        }
+        self.offline = t < self.offline_until
+
+    def update(self):
+        """Advance to the clock's current time if a resolution step has passed"""
+        t = self.clock()
+        if t - self.t < self.resolution:
+            return
+        with self._lock:
+            dt = t - self.t
+            if dt >= self.resolution:
+                # A long pause (e.g. suspended process) is treated as at most an hour
+                self._advance(t, min(dt, 3600.0))
+                self.t = t
+
+    def sample(self, index):
+        """Current (values dict, offline) for one device"""
+        self.update()
+        current = self.current
+        return {metric: float(current[metric][index]) for metric in METRICS}, bool(self.offline[index])
+
+
+class TraceModel:
+    """
+    Replay recorded readings (e.g. a sensor_data export or raw_capture.py
+    output pivoted to one column per metric) onto virtual devices.
+
+    The CSV needs ``timestamp`` (ISO-8601 or Unix seconds) and any of the
+    metric columns, optionally ``device_id``. Virtual devices cycle
+    through the recorded devices, each starting at a random offset in the
+    trace so they are not in lockstep; values are interpolated in time
+    and the trace loops. Missing values count as dropouts.
+    """
+
+    def __init__(self, path, n_devices, seed=None, clock=time.time):
+        series = {}
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                raw_time = row['timestamp']
+                try:
+                    timestamp = float(raw_time)
+                except ValueError:
+                    timestamp = datetime.fromisoformat(raw_time).timestamp()
+                values = [float(row[m]) if row.get(m) not in (None, '') else np.nan for m in METRICS]
+                series.setdefault(row.get('device_id', 'trace'), []).append((timestamp, values))
+
+        if not series:
+            raise ValueError(f"No readings in trace {path}")
+
+        self.traces = []
+        for rows in series.values():
+            rows.sort(key=lambda row: row[0])
+            times = np.array([row[0] for row in rows])
+            values = np.array([row[1] for row in rows])
+            self.traces.append((times, values))
+
+        rng = np.random.default_rng(seed)
+        self.offsets = [rng.uniform(0, max(times[-1] - times[0], 1)) for times, _ in
+                        (self.traces[i % len(self.traces)] for i in range(n_devices))]
+        self.clock = clock
+        self.t0 = clock()
+
+    def sample(self, index):
+        times, values = self.traces[index % len(self.traces)]
+        span = max(times[-1] - times[0], 1)
+        t = times[0] + (self.clock() - self.t0 + self.offsets[index]) % span
+        sample = {metric: float(np.interp(t, times, values[:, i])) for i, metric in enumerate(METRICS)}
+        offline = any(math.isnan(value) for value in sample.values())
+        return sample, offline
+
+
+def _adc_code(ideal, max_code):
+    return int(min(max(round(ideal + random.gauss(0, ADC_NOISE_CODES)), 1), max_code))
+
+
+def mq7_code(sensor, ppm):
+    """ADC code at which the MQ7 driver reads ``ppm`` with its current calibration"""
+    rs = sensor.R0 * (max(ppm, 1e-3) / sensor.A) ** (1 / sensor.B)
+    return sensor.ADC_RESOLUTION / (1 + rs)
+
+
+def mq135_code(sensor, ppm):
+    """ADC code at which SensorHandler reports ``ppm`` CO2 from the MQ135 driver"""
+    # Undo the handler's offset, then the driver's own baseline
+    curve_ppm = ppm - REPORTED_CO2_OFFSET - MQ135_BASELINE_PPM
+    rs_ro = sensor.RATIO_CLEAN_AIR * (max(curve_ppm, 1e-3) / sensor.A) ** (1 / sensor.B)
+    return ((1 << sensor.ADC_BIT_RESOLUTION) - 1) / (1 + rs_ro)
+
+
+def dust_code(sensor, density):
+    """ADC code at which the GP2Y1014AU driver reads ``density`` mg/m3"""
+    return (density + 0.1) / 0.17 * sensor.ADC_RESOLUTION / sensor.VOLTAGE_REF
+
+
+class Simulator:
+    """
+    Drive real SensorHandler instances from a FleetModel or TraceModel.
+
+    attach() points the mock ADC and DHT of each sensor at the model, so
+    readings still go through the drivers' oversampling, lookup tables,
+    the read pipeline, alerts, aggregation and the upload queue.
+    """
+
+    def __init__(self, model, dht_warmup=None):
+        if REAL_HARDWARE:
+            raise RuntimeError("The simulator replaces mock hardware and cannot run on a device")
+        self.model = model
+        self.dht_warmup = dht_warmup
+
+    def _read(self, index, metric, convert, sensor):
+        values, offline = self.model.sample(index)
+        if offline:
+            return 0  # Nothing on the ADC; the driver reports no valid samples
+        return _adc_code(convert(sensor, values[metric]), 4095)
+
+    def _climate(self, index):
+        values, offline = self.model.sample(index)
+        if offline:
+            return math.nan, math.nan
+        return values['temperature'], values['humidity']
+
+    def attach(self, handler, index):
+        """Feed one handler's sensors from virtual device ``index``"""
+        mq7 = getattr(handler, 'mq7', None)
+        if mq7 is not None:
+            # Recalibrate in simulated clean air so R0 is deterministic
+            mq7.adc.source = lambda: _adc_code(mq7.ADC_RESOLUTION / (1 + mq7.RATIO_CLEAN_AIR), 4095)
+            mq7.calibrate()
+            mq7.adc.source = partial(self._read, index, 'co', mq7_code, mq7)
+
+        mq135 = getattr(handler, 'mq135', None)
+        if mq135 is not None:
+            mq135.adc.source = partial(self._read, index, 'co2', mq135_code, mq135)
+
+        dust = getattr(handler, 'gp2y1014au', None)
+        if dust is not None:
+            dust.adc.source = partial(self._read, index, 'pm25', dust_code, dust)
+
+        dht = getattr(handler, 'dht22', None)
+        if dht is not None:
+            dht.sensor.source = partial(self._climate, index)
+            if self.dht_warmup is not None:
+                dht.warmup = self.dht_warmup
+
+
+async def _run_for(gateway, duration):
+    task = asyncio.create_task(gateway.run())
+    await asyncio.sleep(duration)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def run_load_test(devices=100, interval=5.0, duration=60.0, speed=1.0, trace=None, seed=None,
+                  read_workers=None, batch_size=None, latency=0.0, failure_rate=0.0,
+                  dht_warmup=None):
+    """
+    Run a simulated fleet through the real gateway against a local
+    Supabase stand-in and return throughput/latency statistics
+    """
+    # Imported here so mock hardware is in place before handlers are built
+    from config import load_settings
+    from gateway import Gateway
+    from local_queue import LocalQueue, QueueDrainer
+    from uploader import SupabaseUploader
+    from supabase_standin import SupabaseStandIn
+
+    settings = load_settings()
+    cloud_sync = settings.get('CLOUD_SYNC_CONFIG', {})
+    standin = SupabaseStandIn(latency=latency, failure_rate=failure_rate).start()
+    # Scratch directory for the queue database, removed when the run ends
+    workdir = tempfile.TemporaryDirectory(prefix='airis-sim-')
+    try:
+        uploader = SupabaseUploader(
+            standin.url, 'simulator',
+            max_batch_size=batch_size or cloud_sync.get('max_batch_size', 100),
+            compression_enabled=cloud_sync.get('compression_enabled', True),
+            max_attempts=3, retry_delay=0.2, max_retry_delay=2.0
+        )
+        drainer = QueueDrainer(
+            LocalQueue(os.path.join(workdir.name, 'queue.db')),
+            uploader.send_batch,
+            batch_size=uploader.max_batch_size,
+            interval=cloud_sync.get('flush_interval_seconds', 60)
+        )
+
+        clock = SimClock(speed)
+        model = (TraceModel(trace, devices, seed, clock) if trace
+                 else FleetModel(devices, seed, clock))
+        simulator = Simulator(model, dht_warmup)
+
+        started = time.perf_counter()
+        gateway = Gateway([(f"SIM_{i:05d}", interval) for i in range(devices)], drainer=drainer,
+                          read_workers=read_workers)
+        for index, (handler, _) in enumerate(gateway.devices):
+            simulator.attach(handler, index)
+        setup_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        asyncio.run(_run_for(gateway, duration))
+        elapsed = time.perf_counter() - started
+
+        readings = sum(handler.aggregator.samples_in for handler, _ in gateway.devices)
+        cycle_ms = [handler.read_pipeline.last_cycle_time * 1000 for handler, _ in gateway.devices
+                    if handler.read_pipeline.last_cycle_time is not None]
+    finally:
+        standin.stop()
+        workdir.cleanup()
+
+    return {
+        'devices': devices,
+        'interval_s': interval,
+        'duration_s': round(elapsed, 2),
+        'setup_s': round(setup_seconds, 2),
+        'readings': readings,
+        'readings_per_s': round(readings / elapsed, 1),
+        'expected_readings_per_s': round(devices / interval, 1),
+        'read_cycle_ms': {
+            'p50': round(float(np.percentile(cycle_ms, 50)), 1) if cycle_ms else None,
+            'p99': round(float(np.percentile(cycle_ms, 99)), 1) if cycle_ms else None
+        },
+        'upload': uploader.stats.snapshot(),
+        'server': standin.stats()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load-test the IOT pipeline with simulated devices and a local Supabase stand-in"
+    )
+    parser.add_argument('--devices', type=int, default=100)
+    parser.add_argument('--interval', type=float, default=5, help="Sampling interval per device (s)")
+    parser.add_argument('--duration', type=float, default=60, help="Test length in seconds")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="Simulated time per real second (e.g. 60: an hour per minute)")
+    parser.add_argument('--trace', help="Replay this CSV instead of generating series")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--read-workers', type=int)
+    parser.add_argument('--batch-size', type=int)
+    parser.add_argument('--latency-ms', type=float, default=0, help="Stand-in response delay")
+    parser.add_argument('--failure-rate', type=float, default=0, help="Fraction of uploads answered 503")
+    parser.add_argument('--dht-warmup', type=float,
+                        help="Override the 0.2 s DHT22 warm-up (0 to skip it)")
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    from log_setup import setup_logging
+    setup_logging({'log_level': 'WARNING', 'log_file': 'simulator.log'}, quiet=True)
+
+    results = run_load_test(
+        devices=args.devices, interval=args.interval, duration=args.duration, speed=args.speed,
+        trace=args.trace, seed=args.seed, read_workers=args.read_workers,
+        batch_size=args.batch_size, latency=args.latency_ms / 1000,
+        failure_rate=args.failure_rate, dht_warmup=args.dht_warmup
+    )
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.json:
+        with open(args.json, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
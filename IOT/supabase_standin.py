@@ -0,0 +1,144 @@
+# supabase_standin.py
+import gzip
+import json
+import time
+import random
+import logging
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like PostgREST behind a proxy
+
+    def do_POST(self):
+        standin = self.server.standin
+        received_at = time.time()
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        if standin.latency:
+            time.sleep(standin.latency)
+        if not self.path.startswith('/rest/v1/'):
+            return self._reply(404)
+        if standin.failure_rate and random.random() < standin.failure_rate:
+            standin.record_failure()
+            return self._reply(503)
+
+        try:
+            if self.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            rows = json.loads(body)
+        except ValueError:
+            return self._reply(400)
+
+        standin.record(self.path[len('/rest/v1/'):], rows if isinstance(rows, list) else [rows],
+                       len(body), int(self.headers.get('Content-Length', 0)), received_at)
+        self._reply(201)
+
+    def _reply(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SupabaseStandIn:
+    """
+    Local stand-in for the Supabase REST (PostgREST) insert endpoint.
+
+    Accepts ``POST /rest/v1/<table>`` with a JSON object or array, gzip
+    bodies included, and answers 201 like Supabase with
+    ``Prefer: return=minimal``. Rows are counted rather than stored (unless
+    ``keep_rows``), along with the delay between each row's ``timestamp``
+    and its arrival, so a load test measures end-to-end latency. Optional
+    artificial latency and failure rate exercise the retry path.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, failure_rate=0.0,
+                 keep_rows=False, max_lag_samples=100000):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.keep_rows = keep_rows
+        self.rows = []
+        self.requests = 0
+        self.row_count = 0
+        self.failures = 0
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        self.tables = {}
+        self._lags = np.empty(max_lag_samples, dtype=np.float64)
+        self._lag_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True,
+                                        name='supabase-standin')
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def record(self, table, rows, decoded_size, wire_size, received_at):
+        lags = []
+        for row in rows:
+            timestamp = row.get('timestamp') if isinstance(row, dict) else None
+            if timestamp:
+                try:
+                    lags.append(received_at - datetime.fromisoformat(timestamp).timestamp())
+                except ValueError:
+                    pass
+
+        with self._lock:
+            self.requests += 1
+            self.row_count += len(rows)
+            self.bytes_received += wire_size
+            self.bytes_decoded += decoded_size
+            self.tables[table] = self.tables.get(table, 0) + len(rows)
+            if self.keep_rows:
+                self.rows.extend(rows)
+            # Keep the first max_lag_samples lags
+            room = self._lags.size - self._lag_count
+            lags = lags[:room]
+            self._lags[self._lag_count:self._lag_count + len(lags)] = lags
+            self._lag_count += len(lags)
+
+    def record_failure(self):
+        with self._lock:
+            self.requests += 1
+            self.failures += 1
+
+    def stats(self):
+        with self._lock:
+            lags = self._lags[:self._lag_count]
+            return {
+                'requests': self.requests,
+                'rows': self.row_count,
+                'failures': self.failures,
+                'bytes_received': self.bytes_received,
+                'bytes_decoded': self.bytes_decoded,
+                'rows_per_request': self.row_count / max(1, self.requests - self.failures),
+                'tables': dict(self.tables),
+                'row_lag_ms': {
+                    'p50': float(np.percentile(lags, 50) * 1000) if lags.size else None,
+                    'p99': float(np.percentile(lags, 99) * 1000) if lags.size else None,
+                    'max': float(lags.max() * 1000) if lags.size else None
+                }
+            }
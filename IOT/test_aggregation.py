@@ -0,0 +1,68 @@
+# test_aggregation.py
+import pytest
+
+from aggregation import EdgeAggregator
+
+
+def reading(co2, temperature=21.0):
+    return {'co2': co2, 'pm25': 0.01, 'co': 1.0, 'temperature': temperature, 'humidity': 40.0}
+
+
+def test_none_uploads_every_reading():
+    aggregator = EdgeAggregator.from_config({'mode': 'none'})
+    rows = [row for t in range(5) for row in aggregator.add(reading(400 + t), now=t)]
+    assert [row['co2'] for row in rows] == [400, 401, 402, 403, 404]
+
+
+def test_window_reports_configured_statistics():
+    aggregator = EdgeAggregator('window', window_seconds=60)
+
+    assert aggregator.add(reading(450, 20.0), now=0) == []
+    assert aggregator.add(reading(1200, 22.0), now=20) == []
+    assert aggregator.add(reading(500, 24.0), now=40) == []
+    # The first reading of the next window closes the previous one
+    [row] = aggregator.add(reading(600, 30.0), now=65)
+
+    # Pollutants keep the window peak, climate the mean
+    assert row['co2'] == 1200
+    assert row['temperature'] == pytest.approx(22.0)
+    assert set(row) == set(reading(0))
+
+    [row] = aggregator.flush(now=90)
+    assert (row['co2'], row['temperature']) == (600, 30.0)
+    assert aggregator.flush(now=91) == []
+    assert aggregator.reduction() == 2.0
+
+
+def test_windows_align_to_the_clock():
+    aggregator = EdgeAggregator('window', window_seconds=60)
+    aggregator.add(reading(400), now=50)
+    # 50 s and 59 s fall in the same [0, 60) window, 61 s starts the next
+    assert aggregator.add(reading(410), now=59) == []
+    assert len(aggregator.add(reading(420), now=61)) == 1
+
+
+def test_deadband_skips_small_changes_until_heartbeat():
+    aggregator = EdgeAggregator('deadband', deadband={'co2': 25}, max_silence_seconds=900)
+
+    sent = [t for t, co2 in [(0, 400), (10, 410), (20, 420), (30, 430), (40, 431), (950, 431)]
+            if aggregator.add(reading(co2), now=t)]
+
+    # 430 moved more than 25 ppm from the last uploaded 400; 950 s is the heartbeat
+    assert sent == [0, 30, 950]
+
+
+def test_window_deadband_drops_steady_windows():
+    aggregator = EdgeAggregator('window+deadband', window_seconds=60, deadband={'co2': 25},
+                                max_silence_seconds=900)
+    rows = []
+    for t, co2 in [(0, 400), (60, 405), (120, 410), (180, 500), (240, 505)]:
+        rows += aggregator.add(reading(co2), now=t)
+    rows += aggregator.flush(now=300)
+
+    assert [row['co2'] for row in rows] == [400, 500]
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match="Unknown aggregation mode"):
+        EdgeAggregator('hourly')
@@ -0,0 +1,73 @@
+# test_alerts.py
+import math
+
+import numpy as np
+
+from alerts import CRITICAL, NORMAL, WARNING, AlertEngine
+
+
+def scalar_levels(engine, metric, values, debounce):
+    """Reference: one reading at a time, hysteresis and debounce as plain loops"""
+    t = engine.thresholds
+    i = t.index[metric]
+    margin = engine.margins[i]
+
+    def level(value, margin):
+        if value < t.critical_low[i] + margin or value >= t.critical_high[i] - margin:
+            return CRITICAL
+        if value < t.warning_low[i] + margin or value >= t.warning_high[i] - margin:
+            return WARNING
+        return NORMAL
+
+    state = [0, 0]
+    set_runs = [0, 0]
+    reset_runs = [0, 0]
+    levels = []
+    for value in values:
+        for k, threshold in enumerate((WARNING, CRITICAL)):
+            finite = not math.isnan(value)
+            set_runs[k] = set_runs[k] + 1 if finite and level(value, 0.0) >= threshold else 0
+            reset_runs[k] = reset_runs[k] + 1 if finite and level(value, margin) < threshold else 0
+            if set_runs[k] >= debounce:
+                state[k] = 1
+            elif reset_runs[k] >= debounce:
+                state[k] = 0
+        levels.append(sum(state))
+    return levels
+
+
+def test_matches_scalar_reference_across_devices_and_calls():
+    rng = np.random.default_rng(7)
+    engine = AlertEngine(debounce=2)
+    devices = np.array(['a', 'b', 'c'])
+
+    # Random walks around the co2 warning (1000) and critical (2000) thresholds, with gaps
+    n = 3000
+    device_ids = devices[rng.integers(0, len(devices), n)]
+    values = np.empty(n)
+    for device in devices:
+        rows = device_ids == device
+        values[rows] = 1500 + np.cumsum(rng.normal(0, 60, rows.sum()))
+    values[rng.random(n) < 0.03] = np.nan
+
+    # Streamed in uneven chunks, so state has to carry over between calls
+    levels = np.empty(n, dtype=np.int8)
+    bounds = np.concatenate([[0], np.sort(rng.choice(np.arange(1, n), 40, replace=False)), [n]])
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        levels[start:end] = engine.evaluate({'co2': values[start:end]}, device_ids[start:end])['co2']
+
+    for device in devices:
+        rows = device_ids == device
+        assert levels[rows].tolist() == scalar_levels(engine, 'co2', values[rows], debounce=2)
+    assert set(np.unique(levels)) == {NORMAL, WARNING, CRITICAL}
+
+
+def test_value_hovering_at_threshold_does_not_flap():
+    engine = AlertEngine(debounce=2)
+    # Keeps crossing 1000 ppm; it only clears after two readings below 950 ppm
+    readings = [990, 1010, 1005, 990, 1010, 985, 960, 940, 930]
+
+    levels = [engine.evaluate_reading({'co2': value}, 'dev')['co2'] for value in readings]
+
+    assert levels == ['normal', 'normal', 'warning', 'warning', 'warning', 'warning', 'warning',
+                      'warning', 'normal']
@@ -0,0 +1,22 @@
+# test_benchmark.py
+import benchmark
+
+
+def test_suite_runs_and_reports_tracked_metrics():
+    report = benchmark.run_benchmarks(cycles=3, repeat=2)
+    results = report['results']
+
+    assert report['suite'] == 'iot'
+    total = results['handler.total']
+    assert (total['cycles'], total['failed_reads'], total['rows_received']) == (3, 0, 3)
+    assert {'handler.read.mq7', 'handler.read.mq135', 'handler.read.gp2y1014au'} <= set(results)
+    assert all(result.get(metric, 0) >= 0 for result in results.values() for metric in benchmark.TRACKED)
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {'results': {'convert': {'median_us': 10.0}, 'cycle': {'cycles_per_s': 100.0}}}
+    report = {'results': {'convert': {'median_us': 11.5}, 'cycle': {'cycles_per_s': 70.0},
+                          'new': {'median_us': 1.0}}}
+
+    # +15 % latency is within tolerance, -30 % throughput is not; new benchmarks are skipped
+    assert benchmark.compare(report, baseline, tolerance=0.2) == [('cycle', 'cycles_per_s', 100.0, 70.0)]
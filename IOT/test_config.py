@@ -0,0 +1,64 @@
+# test_config.py
+import numpy as np
+import pytest
+
+from config import ThresholdTable, build_settings, load_settings, reload_settings
+
+
+def test_layers_merge_in_order():
+    settings = build_settings('office', environ={
+        'SAMPLING_INTERVAL': '5',
+        'AIRIS__SENSOR_THRESHOLDS__CO2__MAX': '900'
+    })
+
+    # Environment variables win over the profile, the profile over local_config and defaults
+    assert settings.sampling_interval == 5.0
+    assert settings.device_id == 'AIRIS_OFFICE_01'
+    co2 = settings.sensor_thresholds['co2']
+    assert (co2['min'], co2['max'], co2['alert_level']['warning']) == (400, 900, 800)
+    # Nested dicts merge key by key, untouched sensors keep their defaults
+    assert settings.thresholds.bounds('pm25') == (0.0, 500.0)
+    assert settings.thresholds.bounds('co2') == (400.0, 900.0)
+
+
+def test_environment_variable_selects_the_profile():
+    assert build_settings(environ={'AIRIS_ENVIRONMENT': 'home'}).environment == 'home'
+    assert build_settings(environ={}).environment is None
+    with pytest.raises(ValueError, match="Unknown environment"):
+        build_settings('garage', environ={})
+
+
+def test_settings_are_read_only_and_cached():
+    settings = load_settings()
+    with pytest.raises(TypeError):
+        settings.sensor_thresholds['co2']['max'] = 1
+    with pytest.raises(TypeError):
+        settings.values['NEW_SETTING'] = 1
+
+    assert load_settings() is settings
+    reload_settings()
+    assert load_settings() is not settings
+
+
+def test_threshold_table_classifies_levels_and_ranges():
+    table = ThresholdTable.compile({
+        'co2': {'min': 400, 'max': 5000, 'alert_level': {'warning': 1000, 'critical': 2000}},
+        'temperature': {'min': -20, 'max': 50,
+                        'alert_level': {'warning': {'low': 10, 'high': 35},
+                                        'critical': {'low': 0, 'high': 40}}}
+    })
+
+    levels = [table.alert_level('co2', value) for value in (999, 1000, 1999, 2000)]
+    assert levels == ['normal', 'warning', 'warning', 'critical']
+    # Range bounds are inclusive: only values outside [low, high] alert
+    levels = [table.alert_level('temperature', value) for value in (-1, 5, 10, 35, 35.5, 40, 41)]
+    assert levels == ['critical', 'warning', 'normal', 'normal', 'warning', 'warning', 'critical']
+
+    assert table.is_valid('co2', 400) and not table.is_valid('co2', 5001)
+    assert table.alert_level('noise', 1e9) == 'normal' and table.bounds('noise') is None
+
+    # The arrays hold the same bounds as the scalar rows, in ``names`` order
+    i = table.index['temperature']
+    assert (table.warning_low[i], table.critical_high[i]) == (10.0, np.nextafter(40.0, np.inf))
+    with pytest.raises(ValueError):
+        table.minimum[0] = 0
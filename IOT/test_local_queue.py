@@ -0,0 +1,83 @@
+# test_local_queue.py
+import os
+import threading
+
+from local_queue import LocalQueue, QueueDrainer
+
+
+def test_peek_ack_and_compact(tmp_path):
+    queue = LocalQueue(str(tmp_path / 'queue.db'))
+    queue.enqueue_many([{'i': i} for i in range(5)])
+    queue.enqueue({'i': 5})
+
+    # Peeking doesn't remove anything, rows come back oldest first
+    batch = queue.peek(3)
+    assert [row for _, row in batch] == [{'i': 0}, {'i': 1}, {'i': 2}]
+    assert len(queue) == 6
+
+    queue.ack([seq for seq, _ in batch])
+    assert [row for _, row in queue.peek(10)] == [{'i': i} for i in range(3, 6)]
+
+    queue.compact()
+    assert os.path.getsize(str(tmp_path / 'queue.db-wal')) == 0
+    assert len(queue) == 3
+    queue.close()
+
+
+def test_rows_survive_a_crash(tmp_path):
+    path = str(tmp_path / 'queue.db')
+    queue = LocalQueue(path)
+    queue.enqueue_many([{'i': i} for i in range(4)])
+    seq, _ = queue.peek(1)[0]
+    queue.ack([seq])
+    # No close(): the process dies with the WAL not yet checkpointed
+
+    recovered = LocalQueue(path)
+    assert [row for _, row in recovered.peek(10)] == [{'i': 1}, {'i': 2}, {'i': 3}]
+    # Sequence numbers keep increasing, so new rows stay behind the backlog
+    recovered.enqueue({'i': 4})
+    assert recovered.peek(10)[-1] == (5, {'i': 4})
+    recovered.close()
+    queue.close()
+
+
+def test_unacked_batch_is_resent_after_a_failed_upload(tmp_path):
+    queue = LocalQueue(str(tmp_path / 'queue.db'))
+    queue.enqueue_many([{'i': i} for i in range(5)])
+    sent = []
+    results = iter([True, False, True, True])
+
+    def upload(rows):
+        sent.append([row['i'] for row in rows])
+        return next(results)
+
+    drainer = QueueDrainer(queue, upload, batch_size=2)
+    assert not drainer.drain()
+    assert len(queue) == 3
+    assert drainer.drain()
+    assert sent == [[0, 1], [2, 3], [2, 3], [4]]
+    queue.close()
+
+
+def test_stop_waits_only_for_the_batch_in_flight(tmp_path):
+    queue = LocalQueue(str(tmp_path / 'queue.db'))
+    queue.enqueue_many([{'i': i} for i in range(10)])
+    uploading = threading.Event()
+    release = threading.Event()
+
+    def upload(rows):
+        uploading.set()
+        release.wait(5)
+        return True
+
+    drainer = QueueDrainer(queue, upload, batch_size=2, interval=60)
+    drainer.start()
+    assert uploading.wait(5)
+    # Still uploading, so stop() reports that it didn't finish in time
+    assert not drainer.stop(timeout=0)
+    release.set()
+
+    # The batch in flight is acked, the rest stays queued for the next start
+    assert drainer.stop(timeout=5)
+    assert len(queue) == 8
+    queue.close()
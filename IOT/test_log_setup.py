@@ -0,0 +1,97 @@
+# test_log_setup.py
+import json
+import logging
+import queue
+
+import pytest
+
+from log_setup import DroppingQueueHandler, setup_logging, stop_logging
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    """Path for setup_logging() to write to; the root logger is restored afterwards"""
+    monkeypatch.delenv('LOG_FILE', raising=False)
+    monkeypatch.delenv('LOG_LEVEL', raising=False)
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield tmp_path / 'airis.log'
+    stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def test_records_are_written_as_json_lines(log_file):
+    setup_logging({'log_file': str(log_file), 'log_level': 'INFO'}, quiet=True, json_format=True)
+    logger = logging.getLogger('airis.test')
+    logger.info("reading stored", extra={'device_id': 'D1', 'co2': 812.5})
+    logger.debug("not written")
+    stop_logging()
+
+    [entry] = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert (entry['level'], entry['logger'], entry['message']) == ('INFO', 'airis.test', "reading stored")
+    # Fields passed via extra= become keys of their own
+    assert (entry['device_id'], entry['co2']) == ('D1', 812.5)
+
+
+def test_exceptions_keep_their_traceback_field(log_file):
+    setup_logging({'log_file': str(log_file), 'log_level': 'INFO'}, quiet=True, json_format=True)
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logging.getLogger('airis.test').exception("read failed for %s", 'mq7')
+    stop_logging()
+
+    [entry] = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert entry['message'] == "read failed for mq7"
+    assert entry['exc_info'].startswith("Traceback") and "ZeroDivisionError" in entry['exc_info']
+
+
+def test_text_log_appends_the_traceback(log_file):
+    setup_logging({'log_file': str(log_file), 'log_level': 'INFO'}, quiet=True, json_format=False)
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logging.getLogger('airis.test').exception("read failed")
+    stop_logging()
+
+    text = log_file.read_text()
+    assert "read failed\nTraceback" in text and text.count("ZeroDivisionError") == 1
+
+
+def test_setup_twice_replaces_the_handlers(log_file):
+    setup_logging({'log_file': str(log_file)}, quiet=True, json_format=False)
+    setup_logging({'log_file': str(log_file)}, quiet=True, json_format=False)
+    logging.getLogger('airis.test').warning("once")
+    stop_logging()
+
+    assert len(logging.getLogger().handlers) == 1
+    assert log_file.read_text().count("once") == 1
+
+
+def test_log_file_rotates_by_size(log_file):
+    setup_logging({'log_file': str(log_file), 'max_log_size_mb': 0.001, 'backup_count': 2},
+                  quiet=True, json_format=False)
+    logger = logging.getLogger('airis.test')
+    for i in range(100):
+        logger.info(f"reading {i:03d}")
+    stop_logging()
+
+    rotated = sorted(path.name for path in log_file.parent.iterdir())
+    assert rotated == ['airis.log', 'airis.log.1', 'airis.log.2']
+    # Older files beyond backup_count are dropped, the newest record is kept
+    assert "reading 099" in log_file.read_text()
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord('airis.test', logging.INFO, __file__, 1, "reading", None, None)
+
+    handler.handle(record)
+    handler.handle(record)
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
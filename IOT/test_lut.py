@@ -0,0 +1,63 @@
+# test_lut.py
+import numpy as np
+
+from sensors.gp2y1014au import GP2Y1014AU
+from sensors.lut import TABLES, DEFAULT_CALIBRATION
+from sensors.mq135 import MQ135
+from sensors.mq7 import MQ7
+
+PARAMS = {'VOLTAGE_RESOLUTION': 5, 'ADC_BIT_RESOLUTION': 12,
+          'A': 99.042, 'B': -1.518, 'RATIO_CLEAN_AIR': 27.5}
+# Every ADC code; code 0 divides by zero, which both paths must agree on
+CODES = np.arange(4096)
+
+
+def clean_air(code):
+    """ADC source reading ``code`` every time, for a known R0"""
+    return lambda: code
+
+
+def test_tables_match_the_closed_form_conversion():
+    mq7 = MQ7(32, PARAMS)
+    mq135 = MQ135(35, dict(PARAMS, A=110.47, B=-2.862, RATIO_CLEAN_AIR=3.6))
+    dust = GP2Y1014AU(34)
+
+    for lookup, convert in ((mq7.lookup_ppm, mq7.to_ppm),
+                            (mq135.lookup_ppm, mq135.to_ppm),
+                            (dust.lookup_density, dust.to_density)):
+        np.testing.assert_allclose(lookup(CODES), convert(CODES), rtol=1e-12, equal_nan=True)
+        # Burst buffers hold float codes
+        np.testing.assert_allclose(lookup(CODES[1:].astype(np.float64)), convert(CODES[1:]), rtol=1e-12)
+
+
+def test_units_on_one_curve_share_a_table():
+    TABLES.clear()
+    builds = TABLES.builds
+    first, second = MQ7(32, PARAMS), MQ7(33, PARAMS)
+    first.adc.source, second.adc.source = clean_air(1200), clean_air(2400)
+    first.calibrate()
+    second.calibrate()
+    assert first.R0 != second.R0
+
+    # Each unit's R0 is applied after the shared lookup
+    np.testing.assert_allclose(first.lookup_ppm(CODES[1:]), first.to_ppm(CODES[1:]), rtol=1e-12)
+    np.testing.assert_allclose(second.lookup_ppm(CODES[1:]), second.to_ppm(CODES[1:]), rtol=1e-12)
+    assert (TABLES.builds - builds, len(TABLES)) == (1, 1)
+
+
+def test_recalibration_builds_a_new_table():
+    TABLES.clear()
+    builds = TABLES.builds
+    sensor = MQ135(35, dict(PARAMS, A=110.47, B=-2.862, RATIO_CLEAN_AIR=3.6))
+    before = sensor.lookup_ppm(CODES[1:])
+
+    sensor.apply_calibration({'slope': 112.47, 'intercept': -2.962, 'r0': 3.5})
+    after = sensor.lookup_ppm(CODES[1:])
+    np.testing.assert_allclose(after, sensor.to_ppm(CODES[1:]), rtol=1e-12)
+    assert not np.allclose(before, after)
+    assert TABLES.builds - builds == 2
+
+    # Going back to the first curve reuses its table
+    sensor.apply_calibration(DEFAULT_CALIBRATION['mq135'])
+    np.testing.assert_allclose(sensor.lookup_ppm(CODES[1:]), before, rtol=1e-12)
+    assert TABLES.builds - builds == 2
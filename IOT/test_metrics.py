@@ -0,0 +1,96 @@
+# test_metrics.py
+import urllib.error
+import urllib.request
+
+import pytest
+
+from metrics import start_exporter
+from metrics_registry import CONTENT_TYPE, MetricsRegistry
+
+
+def test_render_uses_the_text_exposition_format():
+    registry = MetricsRegistry(enabled=True, buckets=(0.1, 1.0))
+    requests = registry.counter('airis_requests_total', 'Requests sent')
+    queued = registry.gauge('airis_queued', 'Rows queued', ('device',))
+    latency = registry.histogram('airis_latency_seconds', 'Latency', ('stage',))
+
+    requests.inc()
+    requests.inc(2)
+    queued.labels('D"1\n').set(7)
+    queued.labels(device='D2').set_function(lambda: 3)
+    stage = latency.labels('upload')
+    for value in (0.05, 0.1, 0.5, 3.0):
+        stage.observe(value)
+
+    assert registry.render() == '\n'.join([
+        '# HELP airis_requests_total Requests sent',
+        '# TYPE airis_requests_total counter',
+        'airis_requests_total 3',
+        '# HELP airis_queued Rows queued',
+        '# TYPE airis_queued gauge',
+        'airis_queued{device="D\\"1\\n"} 7',
+        'airis_queued{device="D2"} 3',
+        '# HELP airis_latency_seconds Latency',
+        '# TYPE airis_latency_seconds histogram',
+        # Buckets are cumulative; a value on a bound counts in that bucket
+        'airis_latency_seconds_bucket{stage="upload",le="0.1"} 2',
+        'airis_latency_seconds_bucket{stage="upload",le="1.0"} 3',
+        'airis_latency_seconds_bucket{stage="upload",le="+Inf"} 4',
+        'airis_latency_seconds_sum{stage="upload"} 3.65',
+        'airis_latency_seconds_count{stage="upload"} 4',
+    ]) + '\n'
+
+
+def test_disabled_registry_ignores_updates():
+    registry = MetricsRegistry()
+    counter = registry.counter('airis_events_total', 'Events')
+    gauge = registry.gauge('airis_level', 'Level')
+    histogram = registry.histogram('airis_seconds', 'Duration')
+
+    counter.inc()
+    gauge.set(5)
+    histogram.observe(0.2)
+    with histogram.time():
+        pass
+
+    assert counter.labels().value == 0 and gauge.labels().value == 0
+    assert histogram.labels().snapshot() == ([0] * (len(registry.buckets) + 1), 0.0)
+    # Unlabelled families are still exported, at 0
+    assert 'airis_events_total 0\n' in registry.render()
+
+    registry.enabled = True
+    with histogram.time():
+        pass
+    assert sum(histogram.labels().snapshot()[0]) == 1
+
+
+def test_metrics_are_declared_once_per_name():
+    registry = MetricsRegistry()
+    first = registry.counter('airis_events_total', 'Events', ('sensor',))
+
+    assert registry.counter('airis_events_total', 'Events', ('sensor',)) is first
+    with pytest.raises(ValueError, match="already registered"):
+        registry.gauge('airis_events_total', 'Events', ('sensor',))
+    with pytest.raises(ValueError, match="expects labels"):
+        first.labels('mq7', 'extra')
+
+
+def test_exporter_serves_the_registry():
+    registry = MetricsRegistry()
+    registry.counter('airis_events_total', 'Events').inc()
+    assert start_exporter({'enabled': False}, registry) is None
+
+    server = start_exporter({'enabled': True, 'port': 0}, registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            assert response.headers['Content-Type'] == CONTENT_TYPE
+            body = response.read().decode()
+        # Starting the exporter enables collection
+        registry.counter('airis_events_total', 'Events').inc()
+        assert 'airis_events_total 0\n' in body and 'airis_events_total 1\n' in registry.render()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other")
+    finally:
+        server.shutdown()
+        server.server_close()
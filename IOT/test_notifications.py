@@ -0,0 +1,92 @@
+# test_notifications.py
+import pytest
+
+from notifications import Alert, Channel, MemoryChannel, NotificationDispatcher, TokenBucket
+
+
+def deliver(dispatcher, *alerts):
+    """Process alerts as the dispatcher thread would, then send one digest"""
+    for alert in alerts:
+        dispatcher._add(alert)
+    dispatcher.flush()
+
+
+def test_token_bucket_refills_at_rate():
+    now = [0.0]
+    bucket = TokenBucket(rate=0.5, capacity=2, clock=lambda: now[0])
+
+    assert [bucket.allow() for _ in range(3)] == [True, True, False]
+    now[0] += 1
+    assert not bucket.allow()
+    now[0] += 1
+    assert bucket.allow()
+    # Never more than capacity, however long it was idle
+    now[0] += 100
+    assert [bucket.allow() for _ in range(3)] == [True, True, False]
+
+
+def test_incident_across_devices_is_one_digest():
+    channel = MemoryChannel()
+    dispatcher = NotificationDispatcher([channel])
+
+    alerts = [Alert(f"D{i}", 'co2', 'warning', 1100 + i) for i in range(200)]
+    # Repeats within the window are merged, not reported again
+    alerts += [Alert('D0', 'co2', 'warning', 1500), Alert('D0', 'co2', 'warning', 1200)]
+    deliver(dispatcher, *alerts)
+
+    assert len(channel.sent) == 1
+    subject, body, entries = channel.sent[0]
+    assert subject == "[AIRIS] 200 alert(s) on 200 device(s)"
+    d0 = next(entry for entry in entries if entry.device_id == 'D0')
+    assert (d0.count, d0.peak_value, d0.last_value) == (3, 1500, 1200)
+
+
+def test_rate_limited_alerts_are_counted_in_the_next_digest():
+    channel = MemoryChannel()
+    dispatcher = NotificationDispatcher([channel], rate_per_hour=4, burst=2)
+
+    deliver(dispatcher, Alert('D1', 'co2', 'warning', 1100))
+    deliver(dispatcher, Alert('D1', 'co2', 'critical', 2100))
+    # The bucket is empty: these are only counted, and alone they don't send a digest
+    deliver(dispatcher, Alert('D1', 'co2', 'warning', 1200))
+    deliver(dispatcher, Alert('D1', 'co2', 'critical', 2300))
+    assert len(channel.sent) == 2
+
+    deliver(dispatcher, Alert('D2', 'co2', 'warning', 1050))
+    _, body, entries = channel.sent[2]
+    suppressed = next(entry for entry in entries if entry.device_id == 'D1')
+    assert (suppressed.count, suppressed.suppressed, suppressed.peak_value) == (0, 2, 2300)
+    assert "2 rate-limited" in body
+
+
+def test_recoveries_go_to_channels_that_saw_the_alert():
+    email = MemoryChannel(min_level='critical')
+    webhook = MemoryChannel(min_level='warning')
+    dispatcher = NotificationDispatcher([email, webhook])
+
+    deliver(dispatcher, Alert('D1', 'co2', 'warning', 1100), Alert('D2', 'co', 'critical', 60))
+    deliver(dispatcher, Alert('D1', 'co2', 'normal', 800, previous='warning'),
+            Alert('D2', 'co', 'normal', 5, previous='critical'))
+
+    assert [(entry.device_id, entry.level) for entry in email.sent[1][2]] == [('D2', 'normal')]
+    assert {(entry.device_id, entry.level) for entry in webhook.sent[1][2]} == {
+        ('D1', 'normal'), ('D2', 'normal')}
+
+
+def test_channel_min_interval_holds_a_backlog():
+    channel = MemoryChannel(min_interval=3600)
+    dispatcher = NotificationDispatcher([channel])
+
+    deliver(dispatcher, Alert('D1', 'co2', 'warning', 1100))
+    deliver(dispatcher, Alert('D2', 'co2', 'warning', 1100))
+    assert len(channel.sent) == 1
+    # Held back entries wait for the next allowed digest
+    assert [entry.device_id for entry in channel.backlog.values()] == ['D2']
+
+
+def test_channels_must_implement_send():
+    class Incomplete(Channel):
+        pass
+
+    with pytest.raises(TypeError, match="send"):
+        Incomplete()
@@ -0,0 +1,81 @@
+# test_read_pipeline.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from read_pipeline import SensorReadPipeline
+
+
+def sleeper(seconds, value):
+    def read():
+        time.sleep(seconds)
+        return value
+    return read
+
+
+def test_reads_overlap_within_one_cycle():
+    pipeline = SensorReadPipeline({name: sleeper(0.2, name) for name in ('a', 'b', 'c')})
+    try:
+        start = time.monotonic()
+        results = pipeline.read_all()
+        elapsed = time.monotonic() - start
+    finally:
+        pipeline.shutdown()
+
+    assert results == {'a': 'a', 'b': 'b', 'c': 'c'}
+    # About as long as the slowest sensor, not the sum of all three
+    assert elapsed < 0.5
+    assert set(pipeline.stats()['latency_ms']) == {'a', 'b', 'c'}
+
+
+def test_slow_sensor_times_out_and_is_skipped_while_stuck():
+    release = threading.Event()
+    pipeline = SensorReadPipeline(
+        {'fast': lambda: 1, 'stuck': lambda: release.wait(5) and 2},
+        timeouts={'stuck': 0.1}
+    )
+    try:
+        assert pipeline.read_all() == {'fast': 1, 'stuck': None}
+        # The earlier read still holds its thread, so it isn't started again
+        assert pipeline.read_all() == {'fast': 1, 'stuck': None}
+        assert pipeline.stats()['timeouts'] == {'fast': 0, 'stuck': 1}
+
+        release.set()
+        time.sleep(0.05)
+        assert pipeline.read_all() == {'fast': 1, 'stuck': 2}
+    finally:
+        release.set()
+        pipeline.shutdown()
+
+
+def test_failed_reader_returns_none():
+    def broken():
+        raise OSError("bus error")
+
+    pipeline = SensorReadPipeline({'ok': lambda: 1, 'broken': broken})
+    try:
+        assert pipeline.read_all() == {'ok': 1, 'broken': None}
+    finally:
+        pipeline.shutdown()
+
+
+def test_reads_queued_on_a_busy_shared_pool_are_cancelled():
+    executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    calls = []
+    busy = executor.submit(release.wait, 5)
+    pipeline = SensorReadPipeline({'co2': lambda: calls.append(1)}, timeouts={'co2': 0.05},
+                                  executor=executor)
+    try:
+        assert pipeline.read_all() == {'co2': None}
+        release.set()
+        busy.result()
+        # Cancelled before it reached a worker, so it never reads late
+        executor.submit(lambda: None).result()
+        assert calls == []
+    finally:
+        release.set()
+        pipeline.shutdown()
+        # Left running for the other pipelines sharing it
+        assert executor.submit(lambda: 'alive').result() == 'alive'
+        executor.shutdown()
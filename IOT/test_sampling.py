@@ -0,0 +1,68 @@
+# test_sampling.py
+import numpy as np
+import pytest
+
+import sensors.gp2y1014au as gp2y1014au
+from sensors.sampling import BurstSampler
+
+
+def test_acquire_fills_one_buffer_per_burst():
+    codes = iter(range(100))
+    sampler = BurstSampler(lambda: next(codes), samples=4)
+
+    first = sampler.acquire()
+    assert first.tolist() == [0, 1, 2, 3]
+    # The buffer is reused rather than reallocated
+    assert sampler.acquire() is first
+    assert first.tolist() == [4, 5, 6, 7]
+
+
+def test_median_ignores_a_spike():
+    sampler = BurstSampler(None, samples=5, filter='median')
+
+    assert sampler.reduce(np.array([10.0, 11.0, 900.0, 9.0, 10.0])) == 10.0
+
+
+def test_trimmed_mean_drops_both_ends():
+    sampler = BurstSampler(None, samples=8, filter='trimmed_mean', trim_fraction=0.25)
+
+    assert sampler.reduce(np.array([0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 100.0, -100.0])) == 2.5
+    # Too few samples to trim falls back to the plain mean
+    assert sampler.reduce(np.array([1.0, 3.0])) == 2.0
+
+
+def test_mean_and_ema():
+    assert BurstSampler(None, filter='mean').reduce(np.array([1.0, 2.0, 6.0])) == 3.0
+
+    sampler = BurstSampler(None, filter='ema', ema_alpha=0.5)
+    assert sampler.reduce(np.array([10.0, 10.0])) == 10.0
+    # Each burst's mean is blended with the previous readings
+    assert sampler.reduce(np.array([20.0])) == 15.0
+    assert sampler.reduce(np.array([15.0])) == 15.0
+
+
+def test_non_finite_samples_are_ignored():
+    sampler = BurstSampler(None, filter='mean')
+
+    assert sampler.reduce(np.array([np.inf, 4.0, np.nan, 2.0])) == 3.0
+    assert sampler.reduce(np.array([np.inf, np.nan])) is None
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError, match="samples"):
+        BurstSampler(None, samples=0)
+    with pytest.raises(ValueError, match="Unknown filter"):
+        BurstSampler.from_config(None, {'filter': 'mode'})
+
+
+def test_dust_burst_pulses_the_led_once_per_sample(monkeypatch):
+    monkeypatch.setattr(gp2y1014au.time, 'sleep', lambda seconds: None)
+    codes = iter([1500, 1600, 4000, 1550])
+    sensor = gp2y1014au.GP2Y1014AU(36, sampling={'samples': 4, 'filter': 'median'})
+    sensor.adc.source = lambda: next(codes)
+    pulses = []
+    sensor.LED_POWER_PIN.value = lambda level=None: pulses.append(level) if level == 0 else None
+
+    expected = float(np.median(sensor.to_density(np.array([1500, 1600, 4000, 1550]))))
+    assert sensor.read() == round(expected, 2)
+    assert len(pulses) == 4
@@ -0,0 +1,28 @@
+# test_scheduler.py
+import pytest
+
+from scheduler import IntervalScheduler
+
+
+def test_overrun_skips_missed_ticks():
+    now = [0.0]
+    calls = []
+    scheduler = IntervalScheduler(clock=lambda: now[0])
+
+    def job():
+        calls.append(now[0])
+        # The third run takes three intervals, every other run one
+        now[0] += 3 if len(calls) == 3 else 1
+        if len(calls) == 5:
+            scheduler.stop()
+
+    scheduler.add('job', 1, job)
+    scheduler.run()
+
+    # Ticks 3 and 4 were missed and are skipped, not fired back to back at t=5
+    assert calls == [0, 1, 2, 5, 6]
+
+
+def test_interval_must_be_positive():
+    with pytest.raises(ValueError):
+        IntervalScheduler().add('job', 0, lambda: None)
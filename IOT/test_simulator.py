@@ -0,0 +1,39 @@
+# test_simulator.py
+import random
+
+import pytest
+
+from local_queue import LocalQueue, QueueDrainer
+from sensor_handler import SensorHandler
+from simulator import Simulator
+
+
+class FixedModel:
+    """Every device reads ``values``"""
+
+    def __init__(self, values):
+        self.values = values
+
+    def sample(self, index):
+        return dict(self.values), False
+
+
+@pytest.fixture
+def handler(tmp_path):
+    drainer = QueueDrainer(LocalQueue(str(tmp_path / 'queue.db')), lambda rows: True)
+    handler = SensorHandler('SIM_00001', drainer=drainer)
+    yield handler
+    handler.cleanup()
+    drainer.queue.close()
+
+
+@pytest.mark.parametrize('co2', [1200.0, 2500.0])
+def test_simulated_readings_match_the_model(handler, co2):
+    random.seed(3)
+    values = {'co2': co2, 'pm25': 0.08, 'co': 12.0, 'temperature': 24.0, 'humidity': 45.0}
+    Simulator(FixedModel(values)).attach(handler, 0)
+
+    # What the handler reports, after the drivers and its CO2 offset
+    assert handler.read_co2()['co2'] == pytest.approx(co2, rel=0.02)
+    assert handler.read_co()['co'] == pytest.approx(values['co'], rel=0.05)
+    assert handler.read_dust()['pm25'] == pytest.approx(values['pm25'], abs=0.01)
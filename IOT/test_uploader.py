@@ -0,0 +1,144 @@
+# test_uploader.py
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from local_queue import BatchRejected, LocalQueue, QueueDrainer
+from uploader import SupabaseUploader
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        gzipped = self.headers.get('Content-Encoding') == 'gzip'
+        rows = json.loads(gzip.decompress(body) if gzipped else body)
+        status = self.server.respond(rows, gzipped)
+        self.server.requests.append((status, len(rows), gzipped))
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Local endpoint answering each POST with ``server.respond(rows, gzipped)``"""
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    httpd.requests = []
+    httpd.respond = lambda rows, gzipped: 201
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def statuses(*codes):
+    """Responder answering with ``codes`` in turn, then 201"""
+    codes = list(codes)
+    return lambda rows, gzipped: codes.pop(0) if codes else 201
+
+
+def test_transient_errors_are_retried(server):
+    server.respond = statuses(503, 429)
+    uploader = SupabaseUploader(server.url, 'key', max_attempts=3, retry_delay=0.01)
+
+    assert uploader.send_batch([{'co2': 400}])
+    assert [status for status, _, _ in server.requests] == [503, 429, 201]
+    assert uploader.stats.snapshot()['retries'] == 2
+
+
+def test_failure_after_every_attempt_keeps_rows_for_later(server):
+    server.respond = lambda rows, gzipped: 503
+    uploader = SupabaseUploader(server.url, 'key', max_attempts=3, retry_delay=0)
+
+    assert not uploader.send_batch([{'co2': 400}])
+    assert len(server.requests) == 3
+    stats = uploader.stats.snapshot()
+    assert (stats['retries'], stats['failures'], uploader.consecutive_errors) == (2, 1, 1)
+
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    # Full jitter: a uniform delay between 0 and the capped exponential bound
+    monkeypatch.setattr('uploader.random.uniform', lambda low, high: (low, high))
+    uploader = SupabaseUploader('http://127.0.0.1', 'key', retry_delay=1, max_retry_delay=5)
+
+    assert [uploader.backoff_delay(attempt) for attempt in range(1, 6)] == [
+        (0, 1), (0, 2), (0, 4), (0, 5), (0, 5)]
+
+
+def test_requests_share_one_keep_alive_connection(server):
+    uploader = SupabaseUploader(server.url, 'key')
+    for i in range(5):
+        assert uploader.send_batch([{'co2': 400 + i}])
+
+    stats = uploader.stats.snapshot()
+    assert (stats['requests'], stats['connections_opened']) == (5, 1)
+    uploader.close()
+
+
+def test_upload_sends_max_batch_size_rows_per_request(server):
+    uploader = SupabaseUploader(server.url, 'key', max_batch_size=4)
+
+    assert uploader.upload([{'i': i} for i in range(10)]) == 10
+    assert [count for _, count, _ in server.requests] == [4, 4, 2]
+    with pytest.raises(ValueError):
+        uploader.post_batch([{'i': i} for i in range(5)])
+
+    # Stops at the first failed batch and reports the rows stored before it
+    server.respond = statuses(201, 401)
+    assert uploader.upload([{'i': i} for i in range(10)]) == 4
+
+
+def test_rejected_batches_are_not_retried(server):
+    server.respond = statuses(400)
+    uploader = SupabaseUploader(server.url, 'key', max_attempts=3, retry_delay=0.01)
+
+    with pytest.raises(BatchRejected):
+        uploader.send_batch([{'co2': 400}])
+    assert len(server.requests) == 1
+
+
+def test_configuration_errors_keep_rows_queued(server):
+    server.respond = statuses(401)
+    uploader = SupabaseUploader(server.url, 'key', max_attempts=3, retry_delay=0.01)
+
+    # Not retried now, but not rejected either: the drainer tries again later
+    assert not uploader.send_batch([{'co2': 400}])
+    assert len(server.requests) == 1
+
+
+def test_drainer_dead_letters_only_rejected_rows(server, tmp_path):
+    server.respond = lambda rows, gzipped: 400 if any('bad' in row for row in rows) else 201
+    uploader = SupabaseUploader(server.url, 'key')
+    queue = LocalQueue(str(tmp_path / 'queue.db'))
+    queue.enqueue_many([{'i': i} for i in range(10)] + [{'bad': 1}] + [{'i': i} for i in range(10, 15)])
+    drainer = QueueDrainer(queue, uploader.send_batch, batch_size=8)
+
+    # The head batch no longer blocks the queue: it is bisected down to the bad row
+    assert drainer.drain()
+    assert len(queue) == 0
+    assert queue.dead_letter_count() == 1
+    assert sum(count for status, count, _ in server.requests if status == 201) == 15
+
+    assert queue.requeue_dead_letters() == 1
+    assert [row for _, row in queue.peek(10)] == [{'bad': 1}]
+    queue.close()
+
+
+def test_gzip_refused_falls_back_to_uncompressed(server):
+    server.respond = lambda rows, gzipped: 415 if gzipped else 201
+    uploader = SupabaseUploader(server.url, 'key', compression_enabled=True)
+
+    assert uploader.send_batch([{'co2': 400}])
+    assert uploader.send_batch([{'co2': 410}])
+    assert not uploader.compression_enabled
+    assert [gzipped for _, _, gzipped in server.requests] == [True, False, False]
@@ -0,0 +1,273 @@
+# uploader.py
+import gzip
+import json
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from local_queue import BatchRejected
+from metrics import ROWS_UPLOADED, STAGE_SECONDS, UPLOAD_FAILURES, UPLOAD_REQUESTS, UPLOAD_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Worth retrying: the server is overloaded or briefly unavailable
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# The rows themselves were refused (bad value, unknown column, conflict,
+# body too large or not accepted), so resending the batch can't succeed.
+# Other errors such as 401/403/404 are configuration problems: the rows
+# stay queued until the configuration is fixed.
+REJECT_STATUS_CODES = {400, 409, 413, 415, 422}
+# How a server (or a proxy in front of it) that can't read gzip bodies answers
+GZIP_REFUSED_STATUS_CODES = {400, 415}
+
+SERIALIZE_SECONDS = STAGE_SECONDS.labels('serialize')
+UPLOAD_SECONDS = STAGE_SECONDS.labels('upload')
+
+
+class UploadStats:
+    """Counters and timings for the upload path"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.connections_opened = 0
+        self.connect_time = 0.0   # DNS + TCP + TLS handshakes, seconds
+        self.request_time = 0.0   # whole request incl. any handshake, seconds
+
+    def record_connect(self, elapsed):
+        with self._lock:
+            self.connections_opened += 1
+            self.connect_time += elapsed
+
+    def record_request(self, elapsed):
+        with self._lock:
+            self.requests += 1
+            self.request_time += elapsed
+        UPLOAD_REQUESTS.inc()
+        UPLOAD_SECONDS.observe(elapsed)
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+        UPLOAD_RETRIES.inc()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+        UPLOAD_FAILURES.inc()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'failures': self.failures,
+                'connections_opened': self.connections_opened,
+                'avg_connect_ms': 1000 * self.connect_time / self.connections_opened if self.connections_opened else 0.0,
+                'avg_request_ms': 1000 * self.request_time / self.requests if self.requests else 0.0
+            }
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections report how long connecting took"""
+
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def _timed(self, connection_cls):
+        stats = self.stats
+
+        class TimedConnection(connection_cls):
+            def connect(self):
+                start = time.perf_counter()
+                super().connect()
+                stats.record_connect(time.perf_counter() - start)
+
+        return TimedConnection
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': type('TimedHTTPConnectionPool', (HTTPConnectionPool,),
+                         {'ConnectionCls': self._timed(HTTPConnection)}),
+            'https': type('TimedHTTPSConnectionPool', (HTTPSConnectionPool,),
+                          {'ConnectionCls': self._timed(HTTPSConnection)})
+        }
+
+
+class SupabaseUploader:
+    """
+    Uploads sensor rows to the Supabase REST API as JSON arrays.
+
+    PostgREST inserts an array body as one statement, so a batch of
+    readings costs a single request (and one bad row fails the whole
+    batch). Bodies can be gzip-compressed to save uplink bandwidth; if
+    the server refuses a gzip body that it accepts uncompressed,
+    compression is turned off for the rest of the session. Requests share
+    one keep-alive session, and transient failures are retried with
+    exponential backoff and jitter.
+    """
+
+    def __init__(self, url, key, table='sensor_data', max_batch_size=100,
+                 compression_enabled=False, timeout=10, max_attempts=1,
+                 retry_delay=1.0, max_retry_delay=60.0, pool_size=4):
+        self.endpoint = f"{url}/rest/v1/{table}"
+        self.max_batch_size = max_batch_size
+        self.compression_enabled = compression_enabled
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json",
+            # Replayed rows keep their id, so duplicates are skipped
+            "Prefer": "return=minimal,resolution=ignore-duplicates"
+        }
+        self.consecutive_errors = 0
+
+        # One pooled session, so the TLS handshake is paid once, not per upload
+        self.stats = UploadStats()
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = TimedHTTPAdapter(
+            self.stats,
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=0  # Retries are handled here, with backoff
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def encode(self, rows, compress=None):
+        """Serialize rows into the request body, gzipped if compression is enabled"""
+        compress = self.compression_enabled if compress is None else compress
+        with SERIALIZE_SECONDS.time():
+            body = json.dumps(rows, separators=(',', ':')).encode('utf-8')
+            if compress:
+                body = gzip.compress(body, compresslevel=6)
+        return body
+
+    def backoff_delay(self, attempt):
+        """Full-jitter exponential backoff for the given retry number (1-based)"""
+        cap = min(self.max_retry_delay, self.retry_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+
+    def _post(self, body, compressed):
+        headers = {"Content-Encoding": "gzip"} if compressed else None
+        start = time.perf_counter()
+        try:
+            response = self.session.post(self.endpoint, data=body, headers=headers, timeout=self.timeout)
+        finally:
+            self.stats.record_request(time.perf_counter() - start)
+        response.raise_for_status()
+
+    @staticmethod
+    def _is_retryable(error):
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        response = getattr(error, 'response', None)
+        return response is not None and response.status_code in RETRY_STATUS_CODES
+
+    @staticmethod
+    def _is_rejected(error):
+        response = getattr(error, 'response', None)
+        return response is not None and response.status_code in REJECT_STATUS_CODES
+
+    def post_batch(self, rows):
+        """
+        Send up to max_batch_size rows in one request, retrying transient errors
+
+        Raises:
+            requests.exceptions.RequestException: If every attempt fails
+        """
+        if len(rows) > self.max_batch_size:
+            raise ValueError(f"Batch of {len(rows)} rows exceeds max_batch_size={self.max_batch_size}")
+
+        try:
+            try:
+                self._post_rows(rows, self.compression_enabled)
+            except requests.exceptions.HTTPError as e:
+                if not self.compression_enabled or e.response.status_code not in GZIP_REFUSED_STATUS_CODES:
+                    raise
+                # Either the server can't read gzip or the rows are bad: resend
+                # uncompressed, and only stop compressing if that goes through
+                self._post_rows(rows, False)
+                self.compression_enabled = False
+                logger.warning(f"Server refused a gzip body ({e}) but took it uncompressed, "
+                               f"compression disabled")
+        except requests.exceptions.RequestException:
+            self.stats.record_failure()
+            raise
+        ROWS_UPLOADED.inc(len(rows))
+
+    def _post_rows(self, rows, compressed):
+        body = self.encode(rows, compressed)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self._post(body, compressed)
+                return
+            except requests.exceptions.RequestException as e:
+                if attempt == self.max_attempts or not self._is_retryable(e):
+                    raise
+
+                delay = self.backoff_delay(attempt)
+                self.stats.record_retry()
+                logger.warning(f"Upload attempt {attempt} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def send_batch(self, rows):
+        """
+        Send one batch, logging transient failures instead of raising
+
+        Returns:
+            bool: True if the rows were stored, False if they should be retried later
+
+        Raises:
+            BatchRejected: If the server refused the rows themselves
+        """
+        try:
+            self.post_batch(rows)
+        except requests.exceptions.RequestException as e:
+            if self._is_rejected(e):
+                # The server is up, it just won't take these rows
+                logger.warning(f"Server rejected a batch of {len(rows)} rows: {e}")
+                raise BatchRejected(f"{e}: {e.response.text[:500]}") from e
+            self.consecutive_errors += 1
+            logger.error(f"Failed to send {len(rows)} rows: {e}")
+            return False
+
+        self.consecutive_errors = 0
+        logger.info(f"{len(rows)} rows sent successfully to Supabase")
+        return True
+
+    def upload(self, rows):
+        """
+        Send any number of rows, max_batch_size per request
+
+        Returns:
+            int: Number of leading rows that were stored before any failure
+        """
+        sent = 0
+        for start in range(0, len(rows), self.max_batch_size):
+            chunk = rows[start:start + self.max_batch_size]
+            try:
+                self.post_batch(chunk)
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Batch upload failed after {sent} rows: {e}")
+                break
+            sent += len(chunk)
+        return sent
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,14 @@
+import os
+
+# Library thread pools are sized when NumPy's BLAS and TensorFlow load, so
+# the limits are applied on package import, before either is imported.
+# With several server workers on one box, set INFERENCE_INTRA_OP_THREADS to
+# about cores / workers so they don't oversubscribe the CPU.
+_INTRA_OP_THREADS = os.getenv('INFERENCE_INTRA_OP_THREADS')
+_INTER_OP_THREADS = os.getenv('INFERENCE_INTER_OP_THREADS')
+
+if _INTRA_OP_THREADS:
+    for _name in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS'):
+        os.environ.setdefault(_name, _INTRA_OP_THREADS)
+if _INTER_OP_THREADS:
+    os.environ.setdefault('TF_NUM_INTEROP_THREADS', _INTER_OP_THREADS)
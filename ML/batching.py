@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import os
+
+from ML.inference import InferencePool, Overloaded
+from ML.metrics import BATCH_SIZE, REJECTED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Micro-batching configuration (overridable per deployment)
+BATCH_MAX_SIZE = int(os.getenv('PREDICT_BATCH_MAX_SIZE', '64'))
+BATCH_MAX_WAIT_MS = float(os.getenv('PREDICT_BATCH_MAX_WAIT_MS', '5'))
+# Items waiting for a batch before submit() refuses new ones
+BATCH_MAX_QUEUE = int(os.getenv('PREDICT_BATCH_MAX_QUEUE', '1024'))
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single predictions into one batched model call.
+
+    Requests are queued as they arrive; a background task collects up to
+    ``max_batch_size`` of them (waiting at most ``max_wait_ms`` after the
+    first one) and hands the whole batch to ``batch_fn`` on an
+    InferencePool thread. Each caller gets back the result at its own
+    position in the batch. Once ``max_queue`` items are waiting, submit()
+    raises Overloaded instead of queueing more.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+                 name='predict', pool=None, max_queue=BATCH_MAX_QUEUE):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.batch_fn = batch_fn
+        self.batch_size_metric = BATCH_SIZE.labels(name)
+        self.pool = pool or InferencePool()
+        self.max_queue = max_queue
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(max_wait_ms, 0) / 1000.0
+        self._queue = None
+        self._worker = None
+
+    async def start(self):
+        """Start the background batching task"""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+            logger.info(
+                f"Micro-batcher started (max_batch_size={self.max_batch_size}, "
+                f"max_wait_ms={self.max_wait * 1000:.1f})"
+            )
+
+    async def stop(self):
+        """Stop the background task and fail any requests still queued"""
+        if self._worker is None:
+            return
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    async def submit(self, item):
+        """Queue one item and wait for its result"""
+        if self._worker is None:
+            raise RuntimeError("Micro-batcher is not running")
+        if self._queue.qsize() >= self.max_queue:
+            REJECTED_REQUESTS.inc()
+            # Batches still ahead of this request
+            raise Overloaded(self.pool.retry_after(self._queue.qsize() / self.max_batch_size))
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        """Wait for the first item, then gather more until full or timed out"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Drain whatever is already queued without yielding
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+            self.batch_size_metric.observe(len(items))
+
+            try:
+                # Keep the event loop responsive while the model runs
+                results = await self.pool.run(self.batch_fn, items, admit=False)
+            except Exception as e:
+                logger.error(f"Batched prediction failed for {len(items)} items: {e}")
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                # Callers that disconnected leave cancelled futures behind
+                if not future.done():
+                    future.set_result(result)
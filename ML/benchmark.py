@@ -0,0 +1,361 @@
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from ML.numpy_backend import _save
+from ML.scaler import DEFAULT_SCALER_FILENAME, FEATURE_COLUMNS, FeatureScaler
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+CONCURRENCY = (1, 8, 32, 64)
+
+# Metric -> direction; only these are checked against a baseline
+TRACKED = {
+    'median_us': 'lower',
+    'per_item_us': 'lower',
+    'p50_ms': 'lower',
+    'p99_ms': 'lower',
+    'requests_per_s': 'higher'
+}
+
+
+def measure(fn, repeat=30, min_round_seconds=0.005):
+    """
+    Time ``fn()`` and summarise per-call latency
+
+    Fast calls are repeated within a round until it lasts about
+    ``min_round_seconds`` so timer overhead doesn't dominate; percentiles
+    are taken over rounds. One untimed call warms up first.
+
+    Returns:
+        dict: calls, median_us, p99_us, min_us
+    """
+    start = time.perf_counter()
+    fn()
+    once = time.perf_counter() - start
+    number = max(1, min(1000, int(min_round_seconds / max(once, 1e-9))))
+
+    rounds = np.empty(repeat, dtype=np.float64)
+    for i in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds[i] = (time.perf_counter() - start) / number
+
+    return {
+        'calls': repeat * number,
+        'median_us': round(float(np.median(rounds)) * 1e6, 3),
+        'p99_us': round(float(np.percentile(rounds, 99)) * 1e6, 3),
+        'min_us': round(float(rounds.min()) * 1e6, 3)
+    }
+
+
+def environment_info():
+    """What a result depends on besides the code: interpreter, libraries, machine, commit"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=5, cwd=ML_DIR).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit,
+        'threads': {name: os.getenv(name) for name in ('OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS',
+                                                        'TF_NUM_INTEROP_THREADS')}
+    }
+
+
+def random_readings(n, seed=0):
+    """Plausible sensor readings at upload resolution, as an (n, features) array"""
+    rng = np.random.default_rng(seed)
+    low = np.array([400, 0, 0, 15, 20], dtype=np.float64)
+    high = np.array([2000, 150, 30, 35, 90], dtype=np.float64)
+    return np.round(rng.uniform(low, high, (n, len(FEATURE_COLUMNS))), 2)
+
+
+def serving_model(directory, units=64, seed=0):
+    """
+    Write seeded random weights for the serving architecture and return its .h5 path
+
+    Same shape as the predictor's fallback model (LSTM(units) -> Dense(5)
+    on (1, 5) inputs), so results don't depend on which trained artifact
+    happens to be on disk. Only the .npz export is written: the numpy
+    backend loads it, and the keras backend builds the same architecture
+    because the .h5 file is missing. The scaler next to it spans the
+    physical sensor ranges, as nothing was fitted.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(FEATURE_COLUMNS)
+
+    def glorot(rows, cols):
+        limit = np.sqrt(6 / (rows + cols))
+        return rng.uniform(-limit, limit, (rows, cols))
+
+    specs = [
+        {'type': 'LSTM', 'name': 'lstm', 'activation': 'tanh', 'recurrent_activation': 'sigmoid',
+         'return_sequences': False},
+        {'type': 'Dense', 'name': 'dense', 'activation': 'linear'}
+    ]
+    weights = [
+        {'kernel': glorot(n, 4 * units), 'recurrent_kernel': glorot(units, 4 * units),
+         'bias': np.zeros(4 * units)},
+        {'kernel': glorot(units, n), 'bias': np.zeros(n)}
+    ]
+    model_path = os.path.join(directory, 'benchmark_model.h5')
+    _save(specs, weights, [1, n], os.path.splitext(model_path)[0] + '.npz')
+    FeatureScaler.from_ranges().save(os.path.join(directory, DEFAULT_SCALER_FILENAME))
+    return model_path
+
+
+def bench_predictor(model_path=None, backend=None, batch_sizes=BATCH_SIZES, repeat=30, seed=0):
+    """
+    preprocess_data(), predict() and predict_batch() across batch sizes, cache disabled
+
+    Without ``model_path`` a seeded serving-shape model is used (see serving_model()).
+    """
+    from ML.predictor import AirQualityPredictor
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = model_path or serving_model(tmp_dir, seed=seed)
+        predictor = AirQualityPredictor(model_path, backend=backend, cache_size=0)
+        cached = AirQualityPredictor(model_path, backend=backend)
+
+    features = random_readings(max(batch_sizes), seed)
+    records = [dict(zip(FEATURE_COLUMNS, row)) for row in features.tolist()]
+
+    results = {'predictor.predict': measure(lambda: predictor.predict(records[0]), repeat)}
+    for size in batch_sizes:
+        for name, fn, data in (('preprocess_data', predictor.preprocess_data, features[:size]),
+                               ('predict_batch', predictor.predict_batch, records[:size])):
+            result = measure(lambda: fn(data), repeat)
+            result['per_item_us'] = round(result['median_us'] / size, 4)
+            results[f'predictor.{name}.{size}'] = result
+
+    # Steady-state sensors: every row served from the prediction cache
+    hot = records[:64]
+    result = measure(lambda: cached.predict_batch(hot), repeat)
+    result['per_item_us'] = round(result['median_us'] / len(hot), 4)
+    results['predictor.predict_batch.cached.64'] = result
+
+    return results, predictor.backend
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(model_path, app='ML.main:app', timeout=180):
+    """Start the API for ``model_path`` under uvicorn in a subprocess and wait until it is ready"""
+    import requests
+
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', app, '--host', '127.0.0.1', '--port', str(port),
+         '--log-level', 'warning'],
+        cwd=os.path.dirname(ML_DIR),
+        env={**os.environ, 'ML_MODEL_PATH': model_path}
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode}")
+        try:
+            response = requests.get(url + '/health/ready', timeout=1)
+            if response.ok:
+                return process, url
+            if response.json().get('status') == 'failed':
+                process.terminate()
+                raise RuntimeError(f"API server could not load the model: {response.json()['detail']}")
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError(f"API server did not start within {timeout} s")
+
+
+def load_test(url, concurrency, requests_per_client, seed=0, path='/predict'):
+    """
+    POST distinct readings from ``concurrency`` clients at once
+
+    Each client thread keeps its own connection and sends its requests
+    back to back, so the server always has ``concurrency`` requests in
+    flight. Readings are random so the prediction cache mostly misses.
+    """
+    import requests
+
+    total = concurrency * requests_per_client
+    payloads = [dict(zip(FEATURE_COLUMNS, row)) for row in random_readings(total, seed).tolist()]
+    latencies = np.full(total, np.nan)
+    errors = [0] * concurrency
+    barrier = threading.Barrier(concurrency + 1)
+
+    def client(index):
+        session = requests.Session()
+        barrier.wait()
+        for i in range(index * requests_per_client, (index + 1) * requests_per_client):
+            start = time.perf_counter()
+            try:
+                response = session.post(url + path, json=payloads[i], timeout=30)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            if ok:
+                latencies[i] = time.perf_counter() - start
+            else:
+                errors[index] += 1
+        session.close()
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    ok = latencies[np.isfinite(latencies)] * 1000
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'errors': sum(errors),
+        'requests_per_s': round(len(ok) / elapsed, 1),
+        'p50_ms': round(float(np.percentile(ok, 50)), 3) if ok.size else None,
+        'p90_ms': round(float(np.percentile(ok, 90)), 3) if ok.size else None,
+        'p99_ms': round(float(np.percentile(ok, 99)), 3) if ok.size else None,
+        'max_ms': round(float(ok.max()), 3) if ok.size else None
+    }
+
+
+def bench_api(url=None, model_path=None, concurrency=CONCURRENCY, requests_per_client=50, seed=0):
+    """
+    /predict throughput and latency percentiles at each concurrency level
+
+    Without ``url`` a server is started for ``model_path`` (default: the
+    seeded serving-shape model, as in bench_predictor()).
+    """
+    process = None
+    tmp_dir = None
+    if url is None:
+        if model_path is None:
+            tmp_dir = tempfile.TemporaryDirectory()
+            model_path = serving_model(tmp_dir.name, seed=seed)
+        process, url = start_server(model_path)
+    try:
+        # Untimed warm-up: first requests load lazily initialised state
+        load_test(url, 1, 20, seed + 1)
+        return {f'api.predict.c{level}': load_test(url, level, requests_per_client, seed + level)
+                for level in concurrency}
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+
+def run_benchmarks(model_path=None, backend=None, batch_sizes=BATCH_SIZES,
+                   concurrency=CONCURRENCY, requests_per_client=50, repeat=30, url=None,
+                   seed=0, only=None):
+    """Run the suite and return the JSON-serialisable report"""
+    results = {}
+    used_backend = None
+    if only in (None, 'predictor'):
+        predictor_results, used_backend = bench_predictor(model_path, backend, batch_sizes, repeat, seed)
+        results.update(predictor_results)
+    if only in (None, 'api'):
+        results.update(bench_api(url, model_path, concurrency, requests_per_client, seed))
+
+    return {
+        'suite': 'ml',
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'environment': environment_info(),
+        'parameters': {'model_path': model_path, 'backend': used_backend, 'repeat': repeat,
+                       'requests_per_client': requests_per_client, 'url': url, 'seed': seed},
+        'results': results
+    }
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Tracked metrics that got worse than the baseline by more than ``tolerance``
+
+    Returns:
+        list: (benchmark, metric, baseline value, current value) per regression
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        for metric, direction in TRACKED.items():
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old if direction == 'lower' else (old - new) / old
+            if change > tolerance:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def _int_list(value):
+    return tuple(int(item) for item in value.split(','))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the predictor and the prediction API")
+    parser.add_argument('--only', choices=('predictor', 'api'))
+    parser.add_argument('--model', help="Model .h5 path (default: seeded serving-shape weights)")
+    parser.add_argument('--backend', choices=('auto', 'numpy', 'keras'))
+    parser.add_argument('--batch-sizes', type=_int_list, default=BATCH_SIZES, help="e.g. 1,8,64")
+    parser.add_argument('--concurrency', type=_int_list, default=CONCURRENCY, help="e.g. 1,16,64")
+    parser.add_argument('--requests', type=int, default=50, help="Requests per client per level")
+    parser.add_argument('--repeat', type=int, default=30, help="Timed rounds per predictor benchmark")
+    parser.add_argument('--url', help="Benchmark a running API instead of starting ML.main:app")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Write the report to this file")
+    parser.add_argument('--compare', help="Baseline report; exit 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed slowdown before a metric counts as a regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        model_path=args.model, backend=args.backend, batch_sizes=args.batch_sizes,
+        concurrency=args.concurrency, requests_per_client=args.requests, repeat=args.repeat,
+        url=args.url, seed=args.seed, only=args.only
+    )
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.json:
+        with open(args.json, 'w') as f:
+            f.write(output + '\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old} -> {new}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
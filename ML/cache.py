@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Prediction cache configuration (size 0 disables caching)
+CACHE_MAX_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '4096'))
+CACHE_TTL_SECONDS = float(os.getenv('PREDICTION_CACHE_TTL', '60'))
+# Matches the 2-decimal rounding SensorHandler applies before upload
+CACHE_DECIMALS = int(os.getenv('PREDICTION_CACHE_DECIMALS', '2'))
+
+
+class PredictionCache:
+    """
+    LRU cache with per-entry expiry for prediction results.
+
+    Keys are input rows quantized to ``decimals`` places, so readings that
+    differ only below the sensor resolution share one entry.
+    """
+
+    def __init__(self, max_size=CACHE_MAX_SIZE, ttl_seconds=CACHE_TTL_SECONDS, decimals=CACHE_DECIMALS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def quantize(self, features):
+        """Round a 2D feature array to the cache resolution"""
+        return np.round(np.asarray(features, dtype=np.float64), self.decimals)
+
+    def keys_for(self, quantized):
+        """Hashable cache keys for each row of a quantized array"""
+        return [tuple(row) for row in quantized.tolist()]
+
+    def get(self, key):
+        """Return the cached value or None, counting the hit or miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds
+            }
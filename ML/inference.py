@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ML.metrics import INFERENCE_PENDING, REJECTED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Threads running model calls. Each call already uses the intra-op pool, so
+# a couple of workers keep the model busy without oversubscribing cores
+INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', '2'))
+# Calls running or waiting before new requests get 503 + Retry-After
+INFERENCE_MAX_PENDING = int(os.getenv('INFERENCE_MAX_PENDING', '64'))
+
+
+class Overloaded(Exception):
+    """The inference queue is full; the client should retry after ``retry_after`` seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Inference queue full, retry after {retry_after} s")
+        self.retry_after = retry_after
+
+
+class InferencePool:
+    """
+    Bounded thread pool for blocking model calls, with admission control.
+
+    Model calls never run on the event loop, so health checks and cheap
+    routes stay responsive while the model is busy. At most
+    ``max_pending`` calls may be running or queued; beyond that run()
+    raises Overloaded straight away instead of letting latency grow
+    without bound. The Retry-After estimate comes from the moving average
+    call duration and the current queue depth.
+
+    run() must be called from the event loop thread (the pending count is
+    not locked).
+    """
+
+    def __init__(self, max_workers=INFERENCE_WORKERS, max_pending=INFERENCE_MAX_PENDING):
+        if max_workers < 1 or max_pending < 1:
+            raise ValueError("max_workers and max_pending must be at least 1")
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self.avg_seconds = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='inference')
+        INFERENCE_PENDING.set_function(lambda: self.pending)
+
+    def retry_after(self, depth=None):
+        """Seconds until ``depth`` queued calls (default: the current queue) should have cleared"""
+        depth = self.pending if depth is None else depth
+        per_call = self.avg_seconds if self.avg_seconds is not None else 0.1
+        return min(60, max(1, math.ceil(depth * per_call / self.max_workers)))
+
+    async def run(self, fn, *args, admit=True):
+        """
+        Run ``fn(*args)`` on a worker thread and await the result
+
+        Args:
+            admit (bool): Apply the max_pending limit; the micro-batchers pass
+                False because they bound their own queues
+
+        Raises:
+            Overloaded: If the pool is full
+        """
+        if admit and self.pending >= self.max_pending:
+            self.rejected += 1
+            REJECTED_REQUESTS.inc()
+            raise Overloaded(self.retry_after())
+
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+            elapsed = time.perf_counter() - start
+            self.avg_seconds = (elapsed if self.avg_seconds is None
+                                else 0.9 * self.avg_seconds + 0.1 * elapsed)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {
+            'workers': self.max_workers,
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'rejected': self.rejected,
+            'avg_call_ms': round(self.avg_seconds * 1000, 3) if self.avg_seconds is not None else None
+        }
@@ -1,9 +1,100 @@
-from fastapi import FastAPI
-from ML.predictor import AirQualityPredictor
-from pydantic import BaseModel
+import asyncio
+import gc
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import List
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from ML.predictor import DEFAULT_MODEL_PATH, AirQualityPredictor, resolve_backend
+from ML.batching import BATCH_MAX_SIZE, MicroBatcher
+from ML.inference import InferencePool, Overloaded
+from ML.metrics import (CACHE_ENTRIES, CACHE_HITS, CACHE_MISSES, CONTENT_TYPE, MODEL_SWAPS, REGISTRY,
+                        REQUEST_SECONDS)
+from ML.registry import REGISTRY_DIR, ModelRegistry
+from ML.scaler import FEATURE_COLUMNS
+from ML.shadow import ShadowRunner
+from ML.window_store import DeviceWindowStore
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+# Forecasting configuration
+FORECAST_WINDOW_SIZE = int(os.getenv('FORECAST_WINDOW_SIZE', '10'))
+FORECAST_MAX_HORIZON = int(os.getenv('FORECAST_MAX_HORIZON', '24'))
+FORECAST_MAX_DEVICES = int(os.getenv('FORECAST_MAX_DEVICES', '10000'))
+
+# Load and warm the model while the app is created, i.e. in the master
+# process of a pre-forking server, so every worker shares the weights
+ML_PRELOAD_MODEL = os.getenv('ML_PRELOAD_MODEL', '0') == '1'
+# Retry-After for requests that arrive while the model is still loading
+LOADING_RETRY_AFTER = 5
+# How often each worker checks the registry manifest for a new active or shadow version
+REGISTRY_POLL_SECONDS = float(os.getenv('ML_REGISTRY_POLL_SECONDS', '10'))
+
+# (model path, backend) -> warmed predictor, one per process
+_predictors = {}
+_predictors_lock = threading.Lock()
+
+
+class ModelNotReady(Exception):
+    """The model is still loading, or failed to load with ``error``"""
+
+    def __init__(self, error=None):
+        super().__init__(error or "Model is loading")
+        self.error = error
+
+
+def check_model(model_path, backend=None):
+    """
+    Fail fast if ``model_path`` can never serve this API
+
+    Returns:
+        str: The backend that will load it
+
+    Raises:
+        RuntimeError: If the model doesn't take and predict the API's features
+    """
+    try:
+        return resolve_backend(model_path, backend)
+    except ValueError as e:
+        raise RuntimeError(
+            f"{model_path} can't serve this API: {e}. Set ML_MODEL_PATH (or ML_REGISTRY_DIR) "
+            f"to a model trained on {FEATURE_COLUMNS}"
+        )
+
+
+def load_predictor(model_path=None, backend=None):
+    """
+    The process-wide predictor for ``model_path``, loaded and warmed on first use
+
+    Concurrent callers wait for the first load instead of loading the
+    model again. Processes forked after a load inherit the cached
+    predictor.
+    """
+    model_path = os.path.abspath(model_path or DEFAULT_MODEL_PATH)
+    backend = check_model(model_path, backend)
+
+    with _predictors_lock:
+        predictor = _predictors.get((model_path, backend))
+        if predictor is None:
+            start = time.perf_counter()
+            predictor = AirQualityPredictor(model_path, backend=backend)
+            predictor.warm_up(BATCH_MAX_SIZE, FORECAST_WINDOW_SIZE)
+            _predictors[(model_path, backend)] = predictor
+            logger.info(f"Loaded and warmed {model_path} ({backend}) in {time.perf_counter() - start:.2f} s")
+    return predictor
+
+
+def _forget_predictor(predictor):
+    """Drop a swapped-out predictor from the process cache so it can be freed"""
+    with _predictors_lock:
+        for key in [key for key, value in _predictors.items() if value is predictor]:
+            del _predictors[key]
 
-app = FastAPI()
-predictor = AirQualityPredictor()
 
 class SensorData(BaseModel):
     co2: float
@@ -12,11 +103,403 @@ class SensorData(BaseModel):
     temperature: float
     humidity: float
 
-@app.post("/predict")
-async def predict(data: SensorData):
-    prediction = predictor.predict(data.dict())
-    return prediction
+class DeviceReading(SensorData):
+    device_id: str
+    horizon: int = Field(default=1, ge=1, le=FORECAST_MAX_HORIZON)
+
+
+class PredictionService:
+    """
+    A warmed predictor with its micro-batchers and per-device forecast windows
+
+    swap() replaces the predictor by rebinding one attribute. Each call
+    reads the reference once, so calls already running finish on the model
+    they started with and later ones use the new model. Nothing is
+    dropped or paused.
+    """
+
+    def __init__(self, predictor, pool, version=None):
+        self.predictor = predictor
+        self.version = version
+        self.shadow = None
+        self.pool = pool
+        # Every model call runs on the bounded pool, never on the event loop
+        self.batcher = MicroBatcher(self.predict_batch, pool=pool)
+        self.forecast_batcher = MicroBatcher(self.forecast_devices, name='forecast', pool=pool)
+
+        # Models trained on a fixed sequence length dictate the window size
+        self.window_store = DeviceWindowStore(
+            predictor.input_steps or FORECAST_WINDOW_SIZE,
+            len(FEATURE_COLUMNS),
+            max_devices=FORECAST_MAX_DEVICES
+        )
+
+        # Read from the serving predictor's cache counters at scrape time
+        if predictor.cache is not None:
+            CACHE_HITS.set_function(lambda: self.predictor.cache.hits)
+            CACHE_MISSES.set_function(lambda: self.predictor.cache.misses)
+            CACHE_ENTRIES.set_function(lambda: len(self.predictor.cache))
+
+    async def start(self):
+        await self.batcher.start()
+        await self.forecast_batcher.start()
+
+    async def stop(self):
+        await self.batcher.stop()
+        await self.forecast_batcher.stop()
+        self.set_shadow(None)
+
+    def swap(self, predictor, version):
+        """Serve ``predictor`` from now on and return the one it replaces"""
+        window_size = predictor.input_steps or FORECAST_WINDOW_SIZE
+        if window_size != self.window_store.window_size:
+            raise ValueError(
+                f"Model version {version} expects {window_size} time steps, "
+                f"the forecast windows hold {self.window_store.window_size}; restart to change it"
+            )
+
+        previous = self.predictor
+        self.predictor, self.version = predictor, version
+        MODEL_SWAPS.inc()
+        logger.info(f"Now serving model version {version}")
+        return previous
+
+    def set_shadow(self, runner):
+        """Mirror sampled traffic to ``runner``'s candidate, or stop with None"""
+        previous, self.shadow = self.shadow, runner
+        if previous is not None:
+            previous.shutdown()
+
+    def predict_batch(self, records):
+        # One read of each reference, so a swap mid-call can't mix two models
+        predictor, shadow = self.predictor, self.shadow
+        results = predictor.predict_batch(records)
+        if shadow is not None:
+            shadow.offer(predictor, records)
+        return results
+
+    def forecast_devices(self, requests):
+        """Forecast for (device_id, horizon) pairs with one batched model pass"""
+        predictor = self.predictor
+        device_ids = [device_id for device_id, _ in requests]
+        windows, counts = self.window_store.get_windows(device_ids)
+        steps = predictor.forecast(windows, max(horizon for _, horizon in requests))
+
+        return [
+            {
+                "device_id": device_id,
+                "horizon": horizon,
+                "window_fill": int(count),
+                "forecast": [predictor.format_prediction(row) for row in device_steps[:horizon]]
+            }
+            for (device_id, horizon), count, device_steps in zip(requests, counts, steps)
+        ]
+
+    def record_reading(self, reading):
+        self.window_store.append(reading.device_id, [getattr(reading, col) for col in FEATURE_COLUMNS])
+
+
+def create_app(model_path=None, backend=None, preload=ML_PRELOAD_MODEL, registry_dir=REGISTRY_DIR):
+    """
+    Build the prediction API
+
+    The model is loaded once per process (see load_predictor()) and warmed
+    with dummy batches before /health/ready reports ready; until then the
+    prediction routes answer 503 with Retry-After, so no request pays for
+    the first model call. Without ``preload`` each worker loads the model
+    in the background after startup. With ``preload`` it is loaded here,
+    so under ``gunicorn --preload -k uvicorn.workers.UvicornWorker
+    ML.main:app`` the master loads it once and the forked workers share
+    the read-only weights copy-on-write. TensorFlow isn't fork-safe, so
+    the keras backend always loads per worker. A model whose shapes don't
+    fit the API's features (see check_model()) is never loaded: the app
+    still starts, and /health/ready reports it failed with the reason.
+
+    With a model registry, the manifest's active version is served and
+    each worker polls the manifest: a newly activated version is loaded
+    and warmed in the background, then swapped in (see
+    PredictionService.swap()), and a shadow candidate is run on sampled
+    traffic (see ShadowRunner). Stats are at GET /models.
+
+    Args:
+        model_path (str): Model .h5 path (default: the registry's active version,
+            else ML_MODEL_PATH or the packaged model)
+        backend (str): 'auto', 'numpy' or 'keras' (default: ML_BACKEND)
+        preload (bool): Load and warm the model before returning
+        registry_dir (str): Model registry to serve from (default: ML_REGISTRY_DIR)
+    """
+    registry = ModelRegistry(registry_dir) if registry_dir else None
+    version = None
+    if registry is not None and model_path is None:
+        version = registry.manifest()['active']
+        model_path = registry.model_path(version)
+    model_path = os.path.abspath(model_path or DEFAULT_MODEL_PATH)
+
+    pool = InferencePool()
+    state = {'service': None, 'error': None, 'loader': None, 'poller': None, 'sync_error': None}
+    # Version -> why it couldn't be served; retried only on an explicit POST /models/sync
+    failed_versions = {}
+    sync_lock = asyncio.Lock()
+
+    try:
+        model_backend = check_model(model_path, backend)
+    except RuntimeError as e:
+        # Keep serving the health routes, readiness says what to fix
+        logger.error(str(e))
+        model_backend, state['error'] = None, str(e)
+
+    if preload and model_backend is not None:
+        if model_backend == 'keras':
+            logger.warning("Not preloading: the keras backend can't be shared with forked workers")
+        else:
+            load_predictor(model_path, backend)
+            # Keep the collector from writing to the inherited objects'
+            # headers in every worker, which would un-share their pages
+            gc.freeze()
+
+    def load():
+        try:
+            return load_predictor(model_path, backend), None
+        except Exception as e:
+            logger.error(f"Failed to load ML model: {e}")
+            return None, str(e)
+
+    def load_version(name):
+        registry.verify(name)
+        predictor = AirQualityPredictor(registry.model_path(name), backend=backend)
+        predictor.warm_up(BATCH_MAX_SIZE, FORECAST_WINDOW_SIZE)
+        return predictor
+
+    async def sync_registry(force=False):
+        """Swap to the manifest's active version and start or stop the shadow to match it"""
+        service = state['service']
+        if registry is None or service is None:
+            return
+
+        def retry(name):
+            return force or name not in failed_versions
+
+        async def try_load(name):
+            try:
+                predictor = await asyncio.to_thread(load_version, name)
+            except Exception as e:
+                logger.error(f"Could not load model version {name}: {e}")
+                failed_versions[name] = str(e)
+                return None
+            failed_versions.pop(name, None)
+            return predictor
+
+        async with sync_lock:
+            try:
+                manifest = await asyncio.to_thread(registry.manifest)
+            except Exception as e:
+                logger.error(f"Could not read the model registry manifest: {e}")
+                state['sync_error'] = str(e)
+                return
+            active, wanted = manifest['active'], manifest['shadow'] or {}
+
+            if active and active != service.version and retry(active):
+                shadow = service.shadow
+                # Promotion: the shadow candidate is loaded and warm already
+                predictor = (shadow.candidate if shadow is not None and shadow.version == active
+                             else await try_load(active))
+                if predictor is not None:
+                    try:
+                        _forget_predictor(service.swap(predictor, active))
+                    except ValueError as e:
+                        logger.error(str(e))
+                        failed_versions[active] = str(e)
+
+            shadow = service.shadow
+            current = (shadow.version, shadow.sample_rate) if shadow is not None else None
+            target = (wanted['version'], wanted['sample_rate']) if wanted else None
+            if target == current:
+                pass
+            elif target is None or target[0] == service.version:
+                service.set_shadow(None)
+            elif retry(target[0]):
+                candidate = (shadow.candidate if shadow is not None and shadow.version == target[0]
+                             else await try_load(target[0]))
+                if candidate is not None:
+                    service.set_shadow(ShadowRunner(candidate, *target))
+                    logger.info(f"Shadowing model version {target[0]} on {target[1]:.0%} of calls")
+
+            # Failed versions stay reported until the manifest moves on or a retry succeeds
+            errors = [f"{name}: {failed_versions[name]}" for name in (active, target and target[0])
+                      if name in failed_versions]
+            state['sync_error'] = '; '.join(errors) or None
+
+    async def poll_registry():
+        while True:
+            await asyncio.sleep(REGISTRY_POLL_SECONDS)
+            await sync_registry()
+
+    async def start_service():
+        predictor, state['error'] = await asyncio.to_thread(load)
+        if predictor is None:
+            return
+        service = PredictionService(predictor, pool, version)
+        await service.start()
+        state['service'] = service
+
+        if registry is not None:
+            await sync_registry()
+            state['poller'] = asyncio.create_task(poll_registry())
+
+    def ready_service():
+        if state['service'] is None:
+            raise ModelNotReady(state['error'])
+        return state['service']
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # Load off the event loop, so liveness probes are answered meanwhile
+        if state['error'] is None:
+            state['loader'] = asyncio.create_task(start_service())
+        yield
+        for task in (state['loader'], state['poller']):
+            if task is not None:
+                task.cancel()
+        if state['service'] is not None:
+            await state['service'].stop()
+        pool.shutdown()
+
+    app = FastAPI(title="AIRIS ML Predictions API", lifespan=lifespan)
+
+    @app.middleware("http")
+    async def record_request_time(request: Request, call_next):
+        if not REGISTRY.enabled:
+            return await call_next(request)
+
+        start = time.perf_counter()
+        response = await call_next(request)
+        # Label by route template, not raw path, to keep the series count bounded
+        route = request.scope.get("route")
+        REQUEST_SECONDS.labels(request.method, route.path if route else "unmatched",
+                               response.status_code).observe(time.perf_counter() - start)
+        return response
+
+    @app.exception_handler(Overloaded)
+    async def overloaded(request: Request, exc: Overloaded):
+        # Shed load early instead of letting every request's latency grow
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Inference queue full, retry later"},
+            headers={"Retry-After": str(exc.retry_after)}
+        )
+
+    @app.exception_handler(ModelNotReady)
+    async def model_not_ready(request: Request, exc: ModelNotReady):
+        if exc.error:
+            # Retrying won't help until the deployment is fixed
+            return JSONResponse(status_code=503, content={"detail": f"Model failed to load: {exc.error}"})
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Model is loading, retry later"},
+            headers={"Retry-After": str(LOADING_RETRY_AFTER)}
+        )
+
+    @app.get("/health/live")
+    async def live():
+        return {"status": "alive"}
+
+    @app.get("/health/ready")
+    async def ready():
+        service = state['service']
+        if service is None:
+            status = "failed" if state['error'] else "loading"
+            return JSONResponse(status_code=503, content={"status": status, "detail": state['error']})
+        return {"status": "ready", "version": service.version, "backend": service.predictor.backend}
+
+    @app.post("/predict")
+    async def predict(data: SensorData):
+        service = ready_service()
+        # Concurrent requests are coalesced into one model call
+        try:
+            return await service.batcher.submit(data.model_dump())
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    @app.post("/predict/batch")
+    async def predict_batch(data: List[SensorData]):
+        service = ready_service()
+        records = [item.model_dump() for item in data]
+        try:
+            return await pool.run(service.predict_batch, records)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    @app.post("/forecast")
+    async def forecast(reading: DeviceReading):
+        service = ready_service()
+        # The service keeps the history, clients only send the latest reading
+        service.record_reading(reading)
+        try:
+            return await service.forecast_batcher.submit((reading.device_id, reading.horizon))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    @app.post("/forecast/batch")
+    async def forecast_batch(readings: List[DeviceReading]):
+        service = ready_service()
+        for reading in readings:
+            service.record_reading(reading)
+
+        # Only the latest entry per device is forecast
+        requests = list({reading.device_id: (reading.device_id, reading.horizon) for reading in readings}.values())
+        if not requests:
+            return []
+
+        try:
+            return await pool.run(service.forecast_devices, requests)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    @app.get("/cache/stats")
+    async def cache_stats():
+        cache = ready_service().predictor.cache
+        if cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **cache.stats()}
+
+    def models_status():
+        service = ready_service()
+        manifest = registry.manifest()
+        return {
+            "serving": service.version,
+            "active": manifest['active'],
+            "versions": sorted(manifest['versions']),
+            "shadow": service.shadow.stats() if service.shadow is not None else None,
+            "sync_error": state['sync_error']
+        }
+
+    @app.get("/models")
+    async def models():
+        if registry is None:
+            raise HTTPException(status_code=404, detail="No model registry configured (ML_REGISTRY_DIR)")
+        return await asyncio.to_thread(models_status)
+
+    @app.post("/models/sync")
+    async def models_sync():
+        # Apply manifest changes now instead of on the next poll, retrying failed versions
+        if registry is None:
+            raise HTTPException(status_code=404, detail="No model registry configured (ML_REGISTRY_DIR)")
+        await sync_registry(force=True)
+        return await asyncio.to_thread(models_status)
+
+    @app.get("/inference/stats")
+    async def inference_stats():
+        return pool.stats()
+
+    @app.get("/metrics")
+    async def metrics():
+        return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    @app.get("/")
+    async def root():
+        return {"message": "Air Quality Prediction API"}
+
+    return app
+
 
-@app.get("/")
-async def root():
-    return {"message": "Air Quality Prediction API"}
\ No newline at end of file
+app = create_app()
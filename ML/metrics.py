@@ -0,0 +1,31 @@
+import os
+
+# CONTENT_TYPE is re-exported for the /metrics route
+from IOT.metrics_registry import CONTENT_TYPE, MetricsRegistry
+
+# Collection can be switched off per deployment; the instrumentation then costs ~nothing
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+
+# Seconds; from cached lookups to large batched forward passes
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+REGISTRY = MetricsRegistry(enabled=METRICS_ENABLED, buckets=DEFAULT_BUCKETS)
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'ml_stage_seconds', 'Duration of a prediction stage (preprocess, inference, postprocess, forecast)',
+    ('stage',))
+BATCH_SIZE = REGISTRY.histogram(
+    'ml_batch_size', 'Rows per model call from the micro-batcher', ('batcher',),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024))
+REQUEST_SECONDS = REGISTRY.histogram(
+    'ml_http_request_seconds', 'HTTP request duration by route', ('method', 'route', 'status'))
+INFERENCE_PENDING = REGISTRY.gauge('ml_inference_pending', 'Model calls running or queued')
+REJECTED_REQUESTS = REGISTRY.counter('ml_rejected_requests_total', 'Requests refused with 503 (queue full)')
+CACHE_HITS = REGISTRY.counter('ml_prediction_cache_hits_total', 'Predictions served from the cache')
+CACHE_MISSES = REGISTRY.counter('ml_prediction_cache_misses_total', 'Predictions that ran the model')
+CACHE_ENTRIES = REGISTRY.gauge('ml_prediction_cache_entries', 'Entries in the prediction cache')
+MODEL_SWAPS = REGISTRY.counter('ml_model_swaps_total', 'Serving model replaced without a restart')
+SHADOW_SECONDS = REGISTRY.histogram(
+    'ml_shadow_seconds', 'Model call duration on shadow-sampled traffic', ('model',))
+SHADOW_COMPARISONS = REGISTRY.counter('ml_shadow_comparisons_total', 'Calls compared against the shadow candidate')
+SHADOW_SKIPPED = REGISTRY.counter('ml_shadow_skipped_total', 'Sampled calls dropped because the shadow queue was full')
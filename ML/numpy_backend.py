@@ -0,0 +1,332 @@
+import argparse
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_LAYERS = ('InputLayer', 'LSTM', 'Dense', 'Dropout')
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _hard_sigmoid(x):
+    # Keras 3 definition: relu6(x + 3) / 6
+    return np.clip(x / 6.0 + 0.5, 0.0, 1.0)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'tanh': np.tanh,
+    'sigmoid': _sigmoid,
+    'hard_sigmoid': _hard_sigmoid
+}
+
+
+def _activation(name):
+    try:
+        return ACTIVATIONS[name or 'linear']
+    except KeyError:
+        raise ValueError(f"Unsupported activation for NumPy backend: {name}")
+
+
+def default_export_path(model_path):
+    """Exported weights live next to the .h5 file with an .npz extension"""
+    return os.path.splitext(model_path)[0] + '.npz'
+
+
+class NumpyLSTMModel:
+    """
+    Inference-only forward pass for the Sequential LSTM/Dense models we train.
+
+    Loads the weights written by export_h5()/export_keras_model() and
+    exposes the same predict() call as a Keras model, using nothing but
+    NumPy. Dropout layers are identity at inference time and are skipped.
+    """
+
+    def __init__(self, layers, input_shape=None):
+        self.layers = layers
+        # Keras-style shape with a leading batch dimension
+        self.input_shape = (None, *input_shape) if input_shape else None
+
+    @classmethod
+    def load(cls, path):
+        """Load an exported .npz weights file"""
+        with np.load(path, allow_pickle=False) as archive:
+            spec = json.loads(str(archive['config']))
+            layers = []
+            for index, layer in enumerate(spec['layers']):
+                weights = {
+                    name: archive[f"layer{index}_{name}"].astype(np.float32)
+                    for name in layer['weights']
+                }
+                layers.append(dict(layer, **weights))
+
+        return cls(layers, spec.get('input_shape'))
+
+    @property
+    def feature_counts(self):
+        """(features per input step, outputs) of the model"""
+        return _feature_counts(self.layers)
+
+    def check_features(self, n_features):
+        """Raise ValueError unless the model maps ``n_features`` inputs per step to ``n_features`` outputs"""
+        _check_feature_counts(self.feature_counts, n_features)
+
+    def _run_lstm(self, layer, x):
+        kernel = layer['kernel']
+        recurrent_kernel = layer['recurrent_kernel']
+        bias = layer.get('bias')
+        units = recurrent_kernel.shape[0]
+        activation = _activation(layer['activation'])
+        recurrent_activation = _activation(layer['recurrent_activation'])
+
+        batch, steps, _ = x.shape
+        # Input projection for every time step in one matmul
+        projected = x @ kernel
+        if bias is not None:
+            projected += bias
+
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = []
+
+        for t in range(steps):
+            z = projected[:, t, :] + h @ recurrent_kernel
+            # Keras gate order: input, forget, cell, output
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            g = activation(z[:, 2 * units:3 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * activation(c)
+            if layer['return_sequences']:
+                outputs.append(h)
+
+        if layer['return_sequences']:
+            return np.stack(outputs, axis=1)
+        return h
+
+    def _run_dense(self, layer, x):
+        out = x @ layer['kernel']
+        if layer.get('bias') is not None:
+            out += layer['bias']
+        return _activation(layer['activation'])(out)
+
+    def predict(self, x, batch_size=None, verbose=0):
+        """Run the forward pass; extra Keras-style arguments are ignored"""
+        out = np.asarray(x, dtype=np.float32)
+        for layer in self.layers:
+            if layer['type'] == 'LSTM':
+                out = self._run_lstm(layer, out)
+            elif layer['type'] == 'Dense':
+                out = self._run_dense(layer, out)
+        return out
+
+
+def _feature_counts(layers):
+    """(input features, outputs) from layers holding 'kernel' (and 'recurrent_kernel') arrays"""
+    first, last = layers[0], layers[-1]
+    outputs = last['recurrent_kernel'].shape[0] if last['type'] == 'LSTM' else last['kernel'].shape[1]
+    return first['kernel'].shape[0], outputs
+
+
+def _check_feature_counts(counts, n_features):
+    inputs, outputs = counts
+    if inputs != n_features or outputs != n_features:
+        raise ValueError(
+            f"Model maps {inputs} input features to {outputs} outputs, "
+            f"expected {n_features} -> {n_features}"
+        )
+
+
+def check_export(path, n_features):
+    """
+    Raise ValueError unless the exported model at ``path`` maps ``n_features``
+    inputs per step to ``n_features`` outputs
+
+    Only the config and the first and last kernels are read, so this is
+    cheap enough to run before loading the model.
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        specs = json.loads(str(archive['config']))['layers']
+        layers = []
+        for index in sorted({0, len(specs) - 1}):
+            names = [name for name in ('kernel', 'recurrent_kernel') if name in specs[index]['weights']]
+            layers.append(dict(specs[index], **{name: archive[f"layer{index}_{name}"] for name in names}))
+    _check_feature_counts(_feature_counts([layers[0], layers[-1]]), n_features)
+
+
+def check_h5(h5_path, n_features):
+    """Same check as check_export() for a Keras .h5 model, from its config (h5py only)"""
+    import h5py
+
+    with h5py.File(h5_path, 'r') as f:
+        model_config = f.attrs['model_config']
+    if isinstance(model_config, bytes):
+        model_config = model_config.decode('utf-8')
+    layers_config = json.loads(model_config)['config']['layers']
+
+    input_shape = _input_shape(layers_config)
+    units = [layer['config']['units'] for layer in layers_config if 'units' in layer['config']]
+    if not input_shape or not units:
+        raise ValueError(f"Could not read the input and output shape of {h5_path}")
+    _check_feature_counts((input_shape[-1], units[-1]), n_features)
+
+
+def _layer_spec(class_name, config):
+    """Keep only the config keys the NumPy forward pass needs"""
+    if class_name == 'LSTM':
+        return {
+            'type': 'LSTM',
+            'name': config['name'],
+            'activation': config.get('activation', 'tanh'),
+            'recurrent_activation': config.get('recurrent_activation', 'sigmoid'),
+            'return_sequences': bool(config.get('return_sequences', False))
+        }
+    if class_name == 'Dense':
+        return {
+            'type': 'Dense',
+            'name': config['name'],
+            'activation': config.get('activation', 'linear')
+        }
+    return None
+
+
+def _input_shape(layers_config):
+    for layer in layers_config:
+        config = layer['config']
+        shape = config.get('batch_shape') or config.get('batch_input_shape')
+        if shape:
+            return list(shape[1:])
+    return None
+
+
+def _save(specs, weights, input_shape, out_path):
+    arrays = {}
+    for index, (spec, layer_weights) in enumerate(zip(specs, weights)):
+        spec['weights'] = sorted(layer_weights)
+        for name, value in layer_weights.items():
+            arrays[f"layer{index}_{name}"] = np.asarray(value, dtype=np.float32)
+
+    config = json.dumps({'layers': specs, 'input_shape': input_shape})
+    np.savez(out_path, config=np.array(config), **arrays)
+    logger.info(f"Exported {len(specs)} layers to {out_path}")
+
+
+def export_h5(h5_path, out_path=None):
+    """
+    Convert a Keras .h5 Sequential model into NumPy weights.
+
+    Reads the file with h5py only, so TensorFlow does not need to be
+    installed on the machine doing the export.
+    """
+    import h5py
+
+    out_path = out_path or default_export_path(h5_path)
+
+    with h5py.File(h5_path, 'r') as f:
+        model_config = f.attrs['model_config']
+        if isinstance(model_config, bytes):
+            model_config = model_config.decode('utf-8')
+        model_config = json.loads(model_config)
+
+        if model_config['class_name'] != 'Sequential':
+            raise ValueError("Only Sequential models can be exported")
+
+        layers_config = model_config['config']['layers']
+        weights_group = f['model_weights']
+        specs, weights = [], []
+
+        for layer in layers_config:
+            class_name = layer['class_name']
+            if class_name not in SUPPORTED_LAYERS:
+                raise ValueError(f"Unsupported layer for NumPy backend: {class_name}")
+
+            spec = _layer_spec(class_name, layer['config'])
+            if spec is None:
+                continue
+
+            # Dataset nesting differs between Keras versions, match on leaf name
+            layer_weights = {}
+
+            def collect(name, obj):
+                if isinstance(obj, h5py.Dataset):
+                    layer_weights[name.rsplit('/', 1)[-1].split(':')[0]] = obj[()]
+
+            weights_group[spec['name']].visititems(collect)
+            specs.append(spec)
+            weights.append(layer_weights)
+
+    _save(specs, weights, _input_shape(layers_config), out_path)
+    return out_path
+
+
+def export_keras_model(model, out_path):
+    """Convert an in-memory Keras Sequential model into NumPy weights"""
+    specs, weights = [], []
+
+    for layer in model.layers:
+        class_name = layer.__class__.__name__
+        if class_name not in SUPPORTED_LAYERS:
+            raise ValueError(f"Unsupported layer for NumPy backend: {class_name}")
+
+        spec = _layer_spec(class_name, layer.get_config())
+        if spec is None:
+            continue
+
+        names = ['kernel', 'recurrent_kernel', 'bias'] if class_name == 'LSTM' else ['kernel', 'bias']
+        specs.append(spec)
+        weights.append(dict(zip(names, layer.get_weights())))
+
+    input_shape = list(model.input_shape[1:]) if getattr(model, 'input_shape', None) else None
+    _save(specs, weights, input_shape, out_path)
+    return out_path
+
+
+def check_parity(h5_path, npz_path, samples=32, atol=1e-4):
+    """
+    Compare the exported NumPy model against Keras on random inputs.
+
+    Returns the maximum absolute difference; raises AssertionError when it
+    exceeds ``atol``. Needs TensorFlow, so run it where the model is trained.
+    """
+    import tensorflow as tf
+
+    keras_model = tf.keras.models.load_model(h5_path, compile=False)
+    numpy_model = NumpyLSTMModel.load(npz_path)
+
+    shape = [dim or 1 for dim in keras_model.input_shape[1:]]
+    x = np.random.default_rng(0).random((samples, *shape), dtype=np.float32)
+
+    expected = keras_model.predict(x, verbose=0)
+    actual = numpy_model.predict(x)
+    max_diff = float(np.max(np.abs(expected - actual)))
+
+    assert max_diff <= atol, f"NumPy backend differs from Keras by {max_diff}"
+    return max_diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a Keras .h5 model for the NumPy backend")
+    parser.add_argument('model_path', help="Path to the .h5 model")
+    parser.add_argument('-o', '--output', help="Output .npz path (defaults to next to the model)")
+    parser.add_argument('--check', action='store_true', help="Verify the export against Keras")
+    args = parser.parse_args()
+
+    out_path = export_h5(args.model_path, args.output)
+    print(f"Exported {args.model_path} -> {out_path}")
+
+    if args.check:
+        max_diff = check_parity(args.model_path, out_path)
+        print(f"Parity check passed (max abs diff {max_diff:.2e})")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
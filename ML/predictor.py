@@ -1,66 +1,140 @@
-import numpy as np
-import tensorflow as tf
-from sklearn.preprocessing import MinMaxScaler
-import pandas as pd
+import logging
 import os
 
+import numpy as np
+
+from ML.cache import CACHE_MAX_SIZE, PredictionCache
+from ML.metrics import STAGE_SECONDS
+from ML.numpy_backend import NumpyLSTMModel, check_export, check_h5, default_export_path
+from ML.scaler import FEATURE_COLUMNS, default_scaler_path, load_scaler
+
+logger = logging.getLogger(__name__)
+
+# 'numpy' serves from exported weights without importing TensorFlow,
+# 'keras' loads the .h5 model, 'auto' prefers numpy when an export exists
+BACKENDS = ('auto', 'numpy', 'keras')
+DEFAULT_BACKEND = os.getenv('ML_BACKEND', 'auto')
+# The trained artifact ships next to this package
+DEFAULT_MODEL_PATH = os.getenv(
+    'ML_MODEL_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'air_quality_lstm_model.h5')
+)
+
+PREPROCESS_SECONDS = STAGE_SECONDS.labels('preprocess')
+INFERENCE_SECONDS = STAGE_SECONDS.labels('inference')
+POSTPROCESS_SECONDS = STAGE_SECONDS.labels('postprocess')
+FORECAST_SECONDS = STAGE_SECONDS.labels('forecast')
+
+def resolve_backend(model_path, backend=None):
+    """
+    The backend ('numpy' or 'keras') a predictor for ``model_path`` would use
+
+    Raises:
+        ValueError: If the artifact that backend would load doesn't map the
+            API's features to the same outputs (read from its shapes, without
+            loading the model)
+    """
+    backend = (backend or DEFAULT_BACKEND).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Expected one of {BACKENDS}")
+    numpy_path = default_export_path(model_path)
+    if backend == 'auto':
+        backend = 'numpy' if os.path.exists(numpy_path) else 'keras'
+
+    if backend == 'numpy' and os.path.exists(numpy_path):
+        check_export(numpy_path, len(FEATURE_COLUMNS))
+    elif backend == 'keras' and os.path.exists(model_path):
+        check_h5(model_path, len(FEATURE_COLUMNS))
+    return backend
+
 class AirQualityPredictor:
-    def __init__(self, model_path='ML/models/air_quality_lstm_model.h5'):
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, scaler_path=None, backend=None,
+                 cache_size=CACHE_MAX_SIZE):
+        backend = resolve_backend(model_path, backend)
+        numpy_path = default_export_path(model_path)
+
+        if backend == 'numpy':
+            if not os.path.exists(numpy_path):
+                raise RuntimeError(
+                    f"Exported weights not found at {numpy_path}. "
+                    f"Run: python -m ML.numpy_backend {model_path}"
+                )
+            self.model = NumpyLSTMModel.load(numpy_path)
+            # A model trained on other features would fail (or be wrong) on every request
+            self.model.check_features(len(FEATURE_COLUMNS))
+        else:
+            self.model = self._load_keras_model(model_path)
+
+        self.backend = backend
+        logger.info(f"Predictor using {backend} backend")
+
+        # Scaler is fitted offline and saved next to the model
+        self.scaler = load_scaler(scaler_path or default_scaler_path(model_path))
+
+        # Steady-state sensors repeat the same readings, skip the model for those
+        self.cache = PredictionCache(max_size=cache_size) if cache_size > 0 else None
+
+    @staticmethod
+    def _load_keras_model(model_path):
+        """Load the .h5 model with TensorFlow (imported lazily, it is slow and large)"""
+        import tensorflow as tf
+
         # Create a dummy model if the trained model doesn't exist
         if not os.path.exists(model_path):
-            print("Warning: Model file not found. Creating a dummy model for testing.")
-            self.model = tf.keras.Sequential([
-                tf.keras.layers.LSTM(64, input_shape=(1, 5)),
+            logger.warning(f"Model file not found at {model_path}. Creating an untrained dummy model for testing.")
+            return tf.keras.Sequential([
+                tf.keras.layers.Input(shape=(1, 5)),
+                tf.keras.layers.LSTM(64),
                 tf.keras.layers.Dense(5)
             ])
-            self.model.compile(
-                optimizer='adam',
-                loss=tf.keras.losses.MeanSquaredError(),
-                metrics=['mse']
+
+        try:
+            # Update custom objects to use MeanSquaredError class
+            custom_objects = {
+                'mse': tf.keras.losses.MeanSquaredError(),
+                'mean_squared_error': tf.keras.losses.MeanSquaredError()
+            }
+
+            # Inference only, so there is no need to compile
+            return tf.keras.models.load_model(
+                model_path,
+                custom_objects=custom_objects,
+                compile=False
             )
-        else:
+
+        except Exception as e:
+            raise RuntimeError(f"Error loading model: {str(e)}")
+
+    def to_feature_array(self, data):
+        """Convert readings (dict, list of dicts, DataFrame or array) to a 2D float array"""
+        if isinstance(data, dict):
+            data = [data]
+
+        if isinstance(data, list):
             try:
-                # Update custom objects to use MeanSquaredError class
-                custom_objects = {
-                    'mse': tf.keras.losses.MeanSquaredError(),
-                    'mean_squared_error': tf.keras.losses.MeanSquaredError()
-                }
-                
-                # Load model with custom objects
-                self.model = tf.keras.models.load_model(
-                    model_path,
-                    custom_objects=custom_objects,
-                    compile=False  # Load without compilation
-                )
-                
-                # Recompile the model
-                self.model.compile(
-                    optimizer='adam',
-                    loss=tf.keras.losses.MeanSquaredError(),
-                    metrics=['mse']
+                return np.array(
+                    [[record[col] for col in FEATURE_COLUMNS] for record in data],
+                    dtype=np.float32
                 )
-                
-            except Exception as e:
-                raise RuntimeError(f"Error loading model: {str(e)}")
-            
-        self.scaler = MinMaxScaler()
+            except KeyError:
+                raise ValueError(f"Missing required columns. Required: {FEATURE_COLUMNS}")
+
+        if hasattr(data, 'columns'):
+            # DataFrame input is still accepted, without importing pandas here
+            if not all(col in data.columns for col in FEATURE_COLUMNS):
+                raise ValueError(f"Missing required columns. Required: {FEATURE_COLUMNS}")
+            return data[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+
+        features = np.asarray(data, dtype=np.float32)
+        if features.ndim != 2 or features.shape[1] != len(FEATURE_COLUMNS):
+            raise ValueError(f"Expected an array of shape (n, {len(FEATURE_COLUMNS)})")
+        return features
 
     def preprocess_data(self, data):
         """Preprocess input data for prediction"""
         try:
-            # Convert to DataFrame if necessary
-            if isinstance(data, dict):
-                data = pd.DataFrame([data])
-            elif isinstance(data, list):
-                data = pd.DataFrame(data)
-                
-            # Ensure correct columns are present
-            required_columns = ['co2', 'pm25', 'co', 'temperature', 'humidity']
-            if not all(col in data.columns for col in required_columns):
-                raise ValueError(f"Missing required columns. Required: {required_columns}")
-                
-            # Scale the data
-            scaled_data = self.scaler.fit_transform(data[required_columns])
+            # Scale the data with the persisted fit
+            scaled_data = self.scaler.transform(self.to_feature_array(data))
             
             # Reshape for LSTM [samples, time steps, features]
             return np.reshape(scaled_data, (scaled_data.shape[0], 1, scaled_data.shape[1]))
@@ -71,25 +145,129 @@ class AirQualityPredictor:
     def predict(self, input_data):
         """Make predictions using the loaded model"""
         try:
-            # Preprocess the data
-            processed_data = self.preprocess_data(input_data)
-            
-            # Make prediction
-            predictions = self.model.predict(processed_data)
-            
-            # Inverse transform predictions
-            predictions = self.scaler.inverse_transform(predictions.reshape(-1, predictions.shape[-1]))
-            
             # Return predictions as a dictionary
-            prediction_dict = {
-                'co2_prediction': float(predictions[0][0]),
-                'pm25_prediction': float(predictions[0][1]),
-                'co_prediction': float(predictions[0][2]),
-                'temperature_prediction': float(predictions[0][3]),
-                'humidity_prediction': float(predictions[0][4])
-            }
-            
-            return prediction_dict
+            return self.predict_features(self.to_feature_array(input_data))[0]
             
         except Exception as e:
-            raise ValueError(f"Error making prediction: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Error making prediction: {str(e)}")
+
+    def predict_batch(self, records):
+        """Make predictions for a list of readings with a single model call"""
+        if not records:
+            return []
+
+        try:
+            return self.predict_features(self.to_feature_array(list(records)))
+
+        except Exception as e:
+            raise ValueError(f"Error making batch prediction: {str(e)}")
+
+    def predict_features(self, features):
+        """Predict for a 2D array of raw readings, serving repeats from the cache"""
+        if self.cache is None:
+            return self.run_model(features)
+
+        # Inputs are quantized so near-identical readings share an entry
+        quantized = self.cache.quantize(features)
+        keys = self.cache.keys_for(quantized)
+        results = [self.cache.get(key) for key in keys]
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            for i, prediction in zip(missing, self.run_model(quantized[missing])):
+                self.cache.put(keys[i], prediction)
+                results[i] = prediction
+
+        # Hand out copies so callers can't modify cached entries
+        return [dict(result) for result in results]
+
+    def run_model(self, features):
+        """Predict for a 2D array of raw readings, always running the model"""
+        with PREPROCESS_SECONDS.time():
+            processed_data = self.preprocess_data(features)
+
+        # One forward pass for the whole batch
+        with INFERENCE_SECONDS.time():
+            predictions = self.model.predict(processed_data, batch_size=len(processed_data), verbose=0)
+
+        # Inverse transform predictions
+        with POSTPROCESS_SECONDS.time():
+            predictions = self.scaler.inverse_transform(predictions.reshape(-1, predictions.shape[-1]))
+            return [self.format_prediction(row) for row in predictions]
+
+    @staticmethod
+    def format_prediction(row):
+        """Map one row of model output to the API response fields"""
+        return {
+            'co2_prediction': float(row[0]),
+            'pm25_prediction': float(row[1]),
+            'co_prediction': float(row[2]),
+            'temperature_prediction': float(row[3]),
+            'humidity_prediction': float(row[4])
+        }
+
+    def warm_up(self, batch_size=64, window_size=10):
+        """
+        Run dummy batches through the model, bypassing the cache, so the
+        first real requests don't pay for lazy initialisation (graph
+        tracing, buffer allocation)
+
+        Raises:
+            RuntimeError: If the model can't serve readings of the API's shape
+        """
+        # Mid-range readings, so the scaled inputs look like real traffic
+        features = self.scaler.inverse_transform(np.full((batch_size, len(FEATURE_COLUMNS)), 0.5))
+        windows = np.repeat(features[:1, None, :], self.input_steps or window_size, axis=1)
+
+        try:
+            for rows in sorted({1, batch_size}):
+                results = self.run_model(features[:rows])
+                if len(results) != rows:
+                    raise ValueError(f"expected {rows} predictions, got {len(results)}")
+            self.forecast(windows, 1)
+        except Exception as e:
+            raise RuntimeError(
+                f"Model warm-up failed; the model must map (n, steps, {len(FEATURE_COLUMNS)}) "
+                f"inputs to {len(FEATURE_COLUMNS)} outputs ({FEATURE_COLUMNS}): {e}"
+            )
+
+    @property
+    def input_steps(self):
+        """Time steps the model expects per sample, or None if it accepts any length"""
+        shape = getattr(self.model, 'input_shape', None)
+        return shape[1] if shape else None
+
+    def forecast(self, windows, horizon):
+        """
+        Forecast ``horizon`` steps ahead for a batch of reading windows.
+
+        Each step feeds the model's prediction back in as the newest
+        reading, and all windows are advanced together in one model call
+        per step.
+
+        Args:
+            windows (np.ndarray): Raw readings, shape (devices, steps, features)
+            horizon (int): Number of future steps to predict
+
+        Returns:
+            np.ndarray: Forecast in sensor units, shape (devices, horizon, features)
+        """
+        try:
+            with FORECAST_SECONDS.time():
+                windows = np.asarray(windows, dtype=np.float32)
+                if windows.ndim != 3 or windows.shape[2] != len(FEATURE_COLUMNS):
+                    raise ValueError(f"Expected windows of shape (devices, steps, {len(FEATURE_COLUMNS)})")
+
+                current = self.scaler.transform(windows)
+                steps = np.empty((windows.shape[0], horizon, windows.shape[2]), dtype=np.float32)
+
+                for step in range(horizon):
+                    next_values = self.model.predict(current, batch_size=len(current), verbose=0)
+                    steps[:, step, :] = next_values
+                    # Slide the window forward by one reading
+                    current = np.concatenate([current[:, 1:, :], next_values[:, None, :]], axis=1)
+
+                return self.scaler.inverse_transform(steps)
+
+        except Exception as e:
+            raise ValueError(f"Error making forecast: {str(e)}")
@@ -0,0 +1,234 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+from ML.numpy_backend import default_export_path
+from ML.scaler import DEFAULT_SCALER_FILENAME, FeatureScaler, default_scaler_path
+
+logger = logging.getLogger(__name__)
+
+# Registry served by the API; unset serves ML_MODEL_PATH directly
+REGISTRY_DIR = os.getenv('ML_REGISTRY_DIR')
+MANIFEST_FILENAME = 'manifest.json'
+# Fraction of prediction calls mirrored to a shadow candidate
+SHADOW_SAMPLE_RATE = float(os.getenv('SHADOW_SAMPLE_RATE', '0.05'))
+
+_VERSION_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*$')
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Versioned model + scaler artifacts in a local directory.
+
+    Layout::
+
+        <root>/manifest.json
+        <root>/<version>/<model>.h5, <model>.npz, air_quality_scaler.json
+
+    The manifest lists every version with its files' SHA-256, the
+    ``active`` version the API serves and an optional ``shadow``
+    candidate ({"version", "sample_rate"}). Version directories are
+    immutable once registered. Every write goes to a temporary file or
+    directory that is renamed into place, so readers (API workers polling
+    the manifest) never see a half-written version. Writes assume a
+    single writer at a time, e.g. a deploy script.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.manifest_path = os.path.join(self.root, MANIFEST_FILENAME)
+
+    def manifest(self):
+        """The current manifest (read fresh from disk)"""
+        if not os.path.exists(self.manifest_path):
+            return {'active': None, 'shadow': None, 'versions': {}}
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+        manifest.setdefault('active', None)
+        manifest.setdefault('shadow', None)
+        manifest.setdefault('versions', {})
+        return manifest
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.manifest-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp creates the file owner-only; API workers may run as another user
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.manifest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def versions(self):
+        return self.manifest()['versions']
+
+    def _entry(self, version, manifest=None):
+        entry = (manifest or self.manifest())['versions'].get(version)
+        if entry is None:
+            raise KeyError(f"Unknown model version '{version}'")
+        return entry
+
+    def model_path(self, version=None):
+        """Model path of ``version`` (default: the active one) for AirQualityPredictor"""
+        manifest = self.manifest()
+        version = version or manifest['active']
+        if version is None:
+            raise KeyError(f"No active model version in {self.manifest_path}")
+        return os.path.join(self.root, self._entry(version, manifest)['model'])
+
+    def verify(self, version):
+        """Raise ValueError if a file of ``version`` is missing or differs from the manifest"""
+        directory = os.path.join(self.root, version)
+        for name, checksum in self._entry(version)['files'].items():
+            path = os.path.join(directory, name)
+            if not os.path.exists(path):
+                raise ValueError(f"Model version '{version}' is missing {name}")
+            if _sha256(path) != checksum:
+                raise ValueError(f"Model version '{version}': {name} does not match its checksum")
+
+    def _next_version(self, versions):
+        numbers = [int(name[1:]) for name in versions if re.fullmatch(r'v\d+', name)]
+        return f"v{max(numbers, default=0) + 1}"
+
+    def register(self, model_path, version=None, scaler_path=None, notes=None, activate=False):
+        """
+        Copy a model (its .h5 and/or .npz export) and scaler in as a new version
+
+        Args:
+            model_path (str): Model .h5 path; the .npz export next to it is copied too
+            version (str): Version name (default: the next "vN")
+            scaler_path (str): Scaler JSON (default: the one next to the model)
+            notes (str): Free text kept in the manifest
+            activate (bool): Make it the active version straight away
+
+        Returns:
+            str: The version name
+        """
+        manifest = self.manifest()
+        version = version or self._next_version(manifest['versions'])
+        if not _VERSION_PATTERN.match(version):
+            raise ValueError(f"Invalid version name '{version}'")
+        if version in manifest['versions'] or os.path.exists(os.path.join(self.root, version)):
+            raise ValueError(f"Model version '{version}' already exists")
+
+        sources = [path for path in (model_path, default_export_path(model_path)) if os.path.exists(path)]
+        if not sources:
+            raise FileNotFoundError(f"Neither {model_path} nor its .npz export exists")
+        scaler_path = scaler_path or default_scaler_path(model_path)
+        if not os.path.exists(scaler_path):
+            raise FileNotFoundError(f"Scaler artifact not found at {scaler_path}")
+        # Fail here rather than when a worker loads the version
+        FeatureScaler.load(scaler_path)
+
+        # The scaler is stored under its default name, so the predictor finds it next to the model
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.root, prefix=f'.{version}-')
+        try:
+            for source in sources:
+                shutil.copy2(source, staging)
+            shutil.copy2(scaler_path, os.path.join(staging, DEFAULT_SCALER_FILENAME))
+            files = {name: _sha256(os.path.join(staging, name)) for name in sorted(os.listdir(staging))}
+            os.chmod(staging, 0o755)
+            os.rename(staging, os.path.join(self.root, version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        manifest['versions'][version] = {
+            'model': os.path.join(version, os.path.basename(model_path)),
+            'files': files,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'notes': notes
+        }
+        if activate:
+            manifest['active'] = version
+        self._write_manifest(manifest)
+        logger.info(f"Registered model version {version}")
+        return version
+
+    def activate(self, version):
+        """Serve ``version``; running API workers swap to it on their next poll"""
+        manifest = self.manifest()
+        self._entry(version, manifest)
+        manifest['active'] = version
+        # Promoting the shadow candidate ends the comparison
+        if (manifest['shadow'] or {}).get('version') == version:
+            manifest['shadow'] = None
+        self._write_manifest(manifest)
+
+    def set_shadow(self, version, sample_rate=SHADOW_SAMPLE_RATE):
+        """Mirror ``sample_rate`` of prediction calls to ``version``, or stop with version=None"""
+        manifest = self.manifest()
+        if version is None:
+            manifest['shadow'] = None
+        else:
+            self._entry(version, manifest)
+            if not 0 < sample_rate <= 1:
+                raise ValueError("sample_rate must be in (0, 1]")
+            manifest['shadow'] = {'version': version, 'sample_rate': sample_rate}
+        self._write_manifest(manifest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local model registry")
+    parser.add_argument('--root', default=REGISTRY_DIR, required=REGISTRY_DIR is None,
+                        help="Registry directory (default: ML_REGISTRY_DIR)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help="Show versions, the active one and the shadow candidate")
+
+    register = commands.add_parser('register', help="Add a model + scaler as a new version")
+    register.add_argument('model_path', help="Model .h5 path (its .npz export is copied too)")
+    register.add_argument('--version', help="Version name (default: next vN)")
+    register.add_argument('--scaler', help="Scaler JSON (default: next to the model)")
+    register.add_argument('--notes')
+    register.add_argument('--activate', action='store_true')
+
+    activate = commands.add_parser('activate', help="Serve a version (promotes a shadow candidate)")
+    activate.add_argument('version')
+
+    shadow = commands.add_parser('shadow', help="Shadow a candidate version on sampled traffic")
+    shadow.add_argument('version', nargs='?', help="Omit to stop shadowing")
+    shadow.add_argument('--sample-rate', type=float, default=SHADOW_SAMPLE_RATE)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'register':
+        version = registry.register(args.model_path, args.version, args.scaler, args.notes, args.activate)
+        print(f"Registered {version}")
+    elif args.command == 'activate':
+        registry.verify(args.version)
+        registry.activate(args.version)
+        print(f"Activated {args.version}")
+    elif args.command == 'shadow':
+        if args.version:
+            registry.verify(args.version)
+        registry.set_shadow(args.version, args.sample_rate)
+        print(f"Shadowing {args.version}" if args.version else "Shadow mode off")
+    else:
+        print(json.dumps(registry.manifest(), indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
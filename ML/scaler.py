@@ -0,0 +1,174 @@
+import argparse
+import csv
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Model input/output feature order
+FEATURE_COLUMNS = ['co2', 'pm25', 'co', 'temperature', 'humidity']
+
+# Physical sensor ranges (see IOT/config.py SENSOR_THRESHOLDS), used when
+# no fitted scaler artifact is available
+DEFAULT_FEATURE_RANGES = {
+    'co2': (400.0, 5000.0),
+    'pm25': (0.0, 500.0),
+    'co': (0.0, 100.0),
+    'temperature': (-20.0, 50.0),
+    'humidity': (0.0, 100.0)
+}
+
+DEFAULT_SCALER_FILENAME = 'air_quality_scaler.json'
+
+
+class FeatureScaler:
+    """
+    Min-max scaler fitted once and persisted next to the model.
+
+    Equivalent to sklearn's MinMaxScaler but transform/inverse_transform
+    are plain NumPy expressions on precomputed arrays, so the serving
+    path needs neither sklearn nor pandas.
+    """
+
+    def __init__(self, data_min, data_max, feature_range=(0.0, 1.0), columns=FEATURE_COLUMNS,
+                 n_samples=None):
+        self.columns = list(columns)
+        # Training rows the bounds were fitted on (None for fixed ranges)
+        self.n_samples = n_samples
+        self.data_min = np.asarray(data_min, dtype=np.float64)
+        self.data_max = np.asarray(data_max, dtype=np.float64)
+        self.feature_range = (float(feature_range[0]), float(feature_range[1]))
+
+        if self.data_min.shape != (len(self.columns),) or self.data_max.shape != (len(self.columns),):
+            raise ValueError(f"Scaler bounds must have one value per column: {self.columns}")
+
+        data_range = self.data_max - self.data_min
+        # Constant features map to the lower bound instead of dividing by zero
+        data_range[data_range == 0.0] = 1.0
+
+        low, high = self.feature_range
+        self.scale_ = (high - low) / data_range
+        self.min_ = low - self.data_min * self.scale_
+
+        # float32 copies for the model-facing side
+        self._scale32 = self.scale_.astype(np.float32)
+        self._min32 = self.min_.astype(np.float32)
+
+    @classmethod
+    def fit(cls, data, feature_range=(0.0, 1.0), columns=FEATURE_COLUMNS):
+        """Fit bounds from a 2D array of training readings"""
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim != 2 or data.shape[1] != len(columns):
+            raise ValueError(f"Expected an array of shape (n, {len(columns)})")
+        if data.shape[0] < 2:
+            raise ValueError("At least two rows are required to fit the scaler")
+
+        return cls(np.nanmin(data, axis=0), np.nanmax(data, axis=0), feature_range, columns,
+                   n_samples=data.shape[0])
+
+    @classmethod
+    def from_ranges(cls, ranges=DEFAULT_FEATURE_RANGES, columns=FEATURE_COLUMNS):
+        """Build a scaler from known per-feature (min, max) bounds"""
+        return cls(
+            [ranges[col][0] for col in columns],
+            [ranges[col][1] for col in columns],
+            columns=columns
+        )
+
+    def transform(self, data):
+        """Scale raw readings into the model's feature range"""
+        return np.asarray(data, dtype=np.float32) * self._scale32 + self._min32
+
+    def inverse_transform(self, data):
+        """Map model outputs back to sensor units"""
+        return (np.asarray(data, dtype=np.float32) - self._min32) / self._scale32
+
+    def to_dict(self):
+        return {
+            'columns': self.columns,
+            'data_min': self.data_min.tolist(),
+            'data_max': self.data_max.tolist(),
+            'feature_range': list(self.feature_range),
+            'n_samples': self.n_samples
+        }
+
+    def save(self, path):
+        """Persist the fitted bounds as JSON"""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        logger.info(f"Scaler saved to {path}")
+
+    @classmethod
+    def load(cls, path, columns=FEATURE_COLUMNS):
+        """
+        Load a scaler previously written by save()
+
+        Raises:
+            ValueError: If it was fitted on other columns (or in another order)
+                than ``columns``
+        """
+        with open(path) as f:
+            params = json.load(f)
+
+        if params.get('columns') != list(columns):
+            raise ValueError(
+                f"Scaler {path} was fitted on columns {params.get('columns')}, expected {list(columns)}"
+            )
+
+        return cls(
+            params['data_min'],
+            params['data_max'],
+            params.get('feature_range', (0.0, 1.0)),
+            columns,
+            params.get('n_samples')
+        )
+
+
+def default_scaler_path(model_path):
+    """Scaler artifact location for a given model file"""
+    return os.path.join(os.path.dirname(os.path.abspath(model_path)), DEFAULT_SCALER_FILENAME)
+
+
+def load_scaler(path):
+    """Load the fitted scaler, falling back to the physical sensor ranges"""
+    if os.path.exists(path):
+        return FeatureScaler.load(path)
+
+    logger.warning(f"Scaler artifact not found at {path}. Using default sensor ranges.")
+    return FeatureScaler.from_ranges()
+
+
+def read_training_csv(path, columns=FEATURE_COLUMNS):
+    """Read the feature columns of a training CSV into a float array"""
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        missing = [col for col in columns if col not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+
+        rows = [[float(row[col]) for col in columns] for row in reader]
+
+    return np.array(rows, dtype=np.float64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit and save the AIRIS feature scaler")
+    parser.add_argument('training_csv', help="CSV with co2, pm25, co, temperature, humidity columns")
+    parser.add_argument(
+        '-o', '--output',
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), DEFAULT_SCALER_FILENAME),
+        help="Where to write the scaler artifact"
+    )
+    args = parser.parse_args()
+
+    scaler = FeatureScaler.fit(read_training_csv(args.training_csv))
+    scaler.save(args.output)
+    print(f"Scaler fitted on {scaler.n_samples} rows of {args.training_csv} and saved to {args.output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
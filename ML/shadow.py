@@ -0,0 +1,137 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ML.metrics import SHADOW_COMPARISONS, SHADOW_SECONDS, SHADOW_SKIPPED
+
+logger = logging.getLogger(__name__)
+
+# Sampled calls waiting for the shadow thread before new samples are dropped
+SHADOW_MAX_PENDING = int(os.getenv('SHADOW_MAX_PENDING', '4'))
+# Latest comparisons kept for the latency percentiles
+SHADOW_WINDOW = 1000
+
+PRIMARY_SECONDS = SHADOW_SECONDS.labels('primary')
+CANDIDATE_SECONDS = SHADOW_SECONDS.labels('candidate')
+
+
+def _as_array(predictions):
+    return np.array([list(prediction.values()) for prediction in predictions], dtype=np.float64)
+
+
+class ShadowRunner:
+    """
+    Run a candidate predictor on a sample of live traffic next to the serving one
+
+    offer() is called with the readings of each prediction call after it
+    has been answered. A ``sample_rate`` fraction of calls is queued for
+    one background thread, which runs both models uncached on the same
+    readings, back to back, and records their latencies and how far the
+    candidate's outputs drift from the serving model's. Clients only ever
+    see the serving model's results, and once ``max_pending`` samples are
+    waiting new ones are dropped rather than slowing serving down.
+    """
+
+    def __init__(self, candidate, version, sample_rate, max_pending=SHADOW_MAX_PENDING, seed=None):
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+
+        self.candidate = candidate
+        self.version = version
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self._random = random.Random(seed)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shadow')
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.skipped = 0
+        self.errors = 0
+        self.calls = 0
+        self.rows = 0
+        self._fields = None
+        self._abs_diff_sum = None
+        self._max_abs_diff = None
+        self._relative_diff_sum = 0.0
+        self._latencies = {'primary': deque(maxlen=SHADOW_WINDOW), 'candidate': deque(maxlen=SHADOW_WINDOW)}
+
+    def offer(self, primary, records):
+        """Maybe compare ``primary`` and the candidate on ``records`` (called from worker threads)"""
+        with self._lock:
+            if self._random.random() >= self.sample_rate:
+                return
+            if self.pending >= self.max_pending:
+                self.skipped += 1
+                SHADOW_SKIPPED.inc()
+                return
+            self.pending += 1
+        self._executor.submit(self._compare, primary, list(records))
+
+    def _compare(self, primary, records):
+        try:
+            features = primary.to_feature_array(records)
+            start = time.perf_counter()
+            expected = primary.run_model(features)
+            middle = time.perf_counter()
+            actual = self.candidate.run_model(features)
+            end = time.perf_counter()
+            self._record(expected, actual, middle - start, end - middle)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.warning(f"Shadow comparison with {self.version} failed: {e}")
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def _record(self, expected, actual, primary_seconds, candidate_seconds):
+        PRIMARY_SECONDS.observe(primary_seconds)
+        CANDIDATE_SECONDS.observe(candidate_seconds)
+        SHADOW_COMPARISONS.inc()
+
+        expected_values, actual_values = _as_array(expected), _as_array(actual)
+        abs_diff = np.abs(actual_values - expected_values)
+        relative_diff = abs_diff / np.maximum(np.abs(expected_values), 1e-6)
+
+        with self._lock:
+            if self._fields is None:
+                self._fields = list(expected[0])
+                self._abs_diff_sum = np.zeros(len(self._fields))
+                self._max_abs_diff = np.zeros(len(self._fields))
+            self.calls += 1
+            self.rows += len(expected)
+            self._abs_diff_sum += abs_diff.sum(axis=0)
+            self._max_abs_diff = np.maximum(self._max_abs_diff, abs_diff.max(axis=0))
+            self._relative_diff_sum += float(relative_diff.mean(axis=1).sum())
+            self._latencies['primary'].append(primary_seconds)
+            self._latencies['candidate'].append(candidate_seconds)
+
+    def stats(self):
+        """Latency percentiles (ms) per model and output drift per field so far"""
+        with self._lock:
+            stats = {
+                'version': self.version,
+                'sample_rate': self.sample_rate,
+                'calls': self.calls,
+                'rows': self.rows,
+                'pending': self.pending,
+                'skipped': self.skipped,
+                'errors': self.errors
+            }
+            for model, values in self._latencies.items():
+                values = np.array(values) * 1000
+                stats[f'{model}_p50_ms'] = round(float(np.percentile(values, 50)), 3) if values.size else None
+                stats[f'{model}_p99_ms'] = round(float(np.percentile(values, 99)), 3) if values.size else None
+            if self.rows:
+                stats['mean_abs_diff'] = dict(zip(self._fields, np.round(self._abs_diff_sum / self.rows, 6).tolist()))
+                stats['max_abs_diff'] = dict(zip(self._fields, np.round(self._max_abs_diff, 6).tolist()))
+                stats['mean_relative_diff'] = round(self._relative_diff_sum / self.rows, 6)
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,31 @@
+from fastapi.testclient import TestClient
+
+from ML import main
+from ML.api import app
+
+READING = {"co2": 450.0, "pm25": 12.5, "co": 1.2, "temperature": 25.0, "humidity": 60.0}
+
+def test_default_app_starts_and_reports_why_it_is_not_ready():
+    # The packaged model was trained on 10 features, the API sends 5
+    with TestClient(app) as client:
+        assert client.get("/health/live").status_code == 200
+
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "failed"
+        assert "10 input features" in response.json()["detail"]
+        assert "ML_MODEL_PATH" in response.json()["detail"]
+
+        response = client.post("/predict", json=READING)
+        assert response.status_code == 503
+        assert "Retry-After" not in response.headers
+        assert response.json()["detail"].startswith("Model failed to load")
+
+def test_preloading_an_unservable_model_still_starts():
+    preloaded = main.create_app(preload=True, registry_dir=None)
+    with TestClient(preloaded) as client:
+        assert client.get("/health/ready").json()["status"] == "failed"
+
+if __name__ == "__main__":
+    test_default_app_starts_and_reports_why_it_is_not_ready()
+    test_preloading_an_unservable_model_still_starts()
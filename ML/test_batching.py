@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+import pytest
+
+from ML.batching import MicroBatcher
+from ML.inference import InferencePool, Overloaded
+
+def test_micro_batcher_coalesces_concurrent_requests():
+    batches = []
+
+    def double(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    async def run():
+        pool = InferencePool(max_workers=1)
+        batcher = MicroBatcher(double, max_batch_size=4, max_wait_ms=50, pool=pool)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+        finally:
+            await batcher.stop()
+            pool.shutdown()
+
+    results = asyncio.run(run())
+
+    # Every caller gets the result at its own position, from a few full batches
+    assert results == [i * 2 for i in range(10)]
+    assert sorted(item for batch in batches for item in batch) == list(range(10))
+    assert max(len(batch) for batch in batches) <= 4
+    assert len(batches) <= 3
+
+def test_micro_batcher_rejects_when_queue_is_full():
+    release = threading.Event()
+
+    def blocked(items):
+        release.wait(5)
+        return items
+
+    async def run():
+        pool = InferencePool(max_workers=1)
+        batcher = MicroBatcher(blocked, max_batch_size=1, max_wait_ms=0, pool=pool, max_queue=2)
+        await batcher.start()
+        try:
+            # The first request occupies the model, the next two fill the queue
+            running = asyncio.create_task(batcher.submit('a'))
+            await asyncio.sleep(0.05)
+            queued = [asyncio.create_task(batcher.submit(item)) for item in ('b', 'c')]
+            await asyncio.sleep(0.05)
+
+            with pytest.raises(Overloaded) as excinfo:
+                await batcher.submit('d')
+
+            release.set()
+            return excinfo.value, await asyncio.gather(running, *queued)
+        finally:
+            release.set()
+            await batcher.stop()
+            pool.shutdown()
+
+    error, results = asyncio.run(run())
+
+    assert error.retry_after >= 1
+    # Requests admitted before the overflow still complete
+    assert results == ['a', 'b', 'c']
+
+if __name__ == "__main__":
+    test_micro_batcher_coalesces_concurrent_requests()
+    test_micro_batcher_rejects_when_queue_is_full()
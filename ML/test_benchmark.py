@@ -0,0 +1,22 @@
+from ML import benchmark
+
+def test_suite_runs_predictor_and_api_benchmarks():
+    report = benchmark.run_benchmarks(batch_sizes=(1, 4), concurrency=(2,), requests_per_client=3, repeat=2)
+    results = report['results']
+
+    assert report['suite'] == 'ml' and report['parameters']['backend'] == 'numpy'
+    assert {'predictor.predict', 'predictor.predict_batch.4', 'predictor.predict_batch.cached.64'} <= set(results)
+    assert results['predictor.predict_batch.4']['per_item_us'] > 0
+    api = results['api.predict.c2']
+    assert (api['requests'], api['errors']) == (6, 0)
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {'results': {'predict': {'median_us': 10.0}, 'api': {'p99_ms': 5.0}}}
+    report = {'results': {'predict': {'median_us': 11.5}, 'api': {'p99_ms': 7.5}, 'new': {'median_us': 1.0}}}
+
+    # +15 % is within tolerance, +50 % is not; benchmarks missing from the baseline are skipped
+    assert benchmark.compare(report, baseline, tolerance=0.2) == [('api', 'p99_ms', 5.0, 7.5)]
+
+if __name__ == "__main__":
+    test_suite_runs_predictor_and_api_benchmarks()
+    test_compare_flags_only_regressions_beyond_tolerance()
@@ -0,0 +1,40 @@
+import types
+
+import numpy as np
+
+from ML import cache as cache_module
+from ML.cache import PredictionCache
+
+def test_cache_evicts_least_recently_used():
+    cache = PredictionCache(max_size=2, ttl_seconds=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'a' is now the most recently used
+
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert len(cache) == 2
+    assert cache.stats()['hits'] == 3 and cache.stats()['misses'] == 1
+
+def test_cache_expires_entries_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module, 'time', types.SimpleNamespace(monotonic=lambda: now[0]))
+    cache = PredictionCache(max_size=10, ttl_seconds=5)
+    cache.put('a', 1)
+
+    now[0] += 4.9
+    assert cache.get('a') == 1
+    now[0] += 0.2
+    assert cache.get('a') is None
+    # Expired entries are dropped on lookup
+    assert len(cache) == 0
+
+def test_cache_keys_share_readings_below_resolution():
+    cache = PredictionCache(decimals=2)
+    keys = cache.keys_for(cache.quantize(np.array([[450.001, 12.5], [450.004, 12.5], [450.01, 12.5]])))
+    assert keys[0] == keys[1] != keys[2]
+
+if __name__ == "__main__":
+    test_cache_evicts_least_recently_used()
+    test_cache_keys_share_readings_below_resolution()
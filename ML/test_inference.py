@@ -0,0 +1,69 @@
+import asyncio
+import tempfile
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ML import main
+from ML.benchmark import serving_model
+from ML.inference import InferencePool, Overloaded
+
+READING = {"co2": 450.0, "pm25": 12.5, "co": 1.2, "temperature": 25.0, "humidity": 60.0}
+
+def wait_ready(client, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/health/ready")
+        if response.status_code == 200:
+            return response.json()
+        time.sleep(0.05)
+    raise AssertionError(f"API not ready: {response.json()}")
+
+def test_pool_rejects_calls_beyond_max_pending():
+    release = threading.Event()
+
+    async def run():
+        pool = InferencePool(max_workers=1, max_pending=1)
+        try:
+            running = asyncio.create_task(pool.run(release.wait, 5))
+            await asyncio.sleep(0.05)
+            with pytest.raises(Overloaded) as excinfo:
+                await pool.run(time.sleep, 0)
+            release.set()
+            await running
+            # Room again once the running call finished
+            await pool.run(time.sleep, 0)
+            return excinfo.value, pool.stats()
+        finally:
+            release.set()
+            pool.shutdown()
+
+    error, stats = asyncio.run(run())
+
+    assert 1 <= error.retry_after <= 60
+    assert stats['rejected'] == 1 and stats['pending'] == 0
+
+def test_api_sheds_load_with_503_and_retry_after(monkeypatch):
+    class FullPool(InferencePool):
+        async def run(self, fn, *args, admit=True):
+            if admit:
+                raise Overloaded(7)
+            return await super().run(fn, *args, admit=admit)
+
+    monkeypatch.setattr(main, 'InferencePool', FullPool)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = main.create_app(model_path=serving_model(tmp_dir), backend='numpy', registry_dir=None)
+        with TestClient(app) as client:
+            wait_ready(client)
+
+            response = client.post("/predict/batch", json=[READING])
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "7"
+
+            # Micro-batched calls bound their own queue and still go through
+            assert client.post("/predict", json=READING).status_code == 200
+
+if __name__ == "__main__":
+    test_pool_rejects_calls_beyond_max_pending()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+
+import numpy as np
+from ML.numpy_backend import NumpyLSTMModel, check_export, check_parity, export_h5, export_keras_model
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'air_quality_lstm_model.h5')
+
+def test_numpy_backend_parity():
+    # Export the trained model and compare against Keras on random inputs
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        npz_path = export_h5(MODEL_PATH, os.path.join(tmp_dir, 'model.npz'))
+        max_diff = check_parity(MODEL_PATH, npz_path)
+
+    assert max_diff <= 1e-4, f"NumPy backend differs from Keras by {max_diff}"
+
+def test_numpy_backend_matches_serving_shape():
+    import tensorflow as tf
+
+    # Same architecture as the predictor's fallback model, (samples, 1, 5) input
+    model = tf.keras.Sequential([
+        tf.keras.layers.Input(shape=(1, 5)),
+        tf.keras.layers.LSTM(64),
+        tf.keras.layers.Dense(5)
+    ])
+    x = np.random.default_rng(1).random((16, 1, 5), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        npz_path = export_keras_model(model, os.path.join(tmp_dir, 'model.npz'))
+        numpy_model = NumpyLSTMModel.load(npz_path)
+        # The API's five features in and out
+        check_export(npz_path, 5)
+
+    max_diff = float(np.max(np.abs(model.predict(x, verbose=0) - numpy_model.predict(x))))
+    assert max_diff <= 1e-4, f"NumPy backend differs from Keras by {max_diff}"
+    numpy_model.check_features(5)
+
+def test_exported_serving_model_matches_keras():
+    import tensorflow as tf
+
+    from ML.predictor import AirQualityPredictor
+    from ML.scaler import FEATURE_COLUMNS
+
+    # A 5 -> 5 model saved and exported the way a deploy would, served by both backends
+    model = tf.keras.Sequential([
+        tf.keras.layers.Input(shape=(1, 5)),
+        tf.keras.layers.LSTM(32),
+        tf.keras.layers.Dense(5)
+    ])
+    records = [
+        {'co2': 400 + 150 * i, 'pm25': 5.0 * i, 'co': 0.5 * i, 'temperature': 15 + i, 'humidity': 30 + 4 * i}
+        for i in range(12)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, 'serving_model.h5')
+        model.save(model_path)
+        export_h5(model_path)
+        keras_predictor = AirQualityPredictor(model_path, backend='keras', cache_size=0)
+        numpy_predictor = AirQualityPredictor(model_path, backend='numpy', cache_size=0)
+
+    assert (keras_predictor.backend, numpy_predictor.backend) == ('keras', 'numpy')
+    keras_rows = [list(row.values()) for row in keras_predictor.predict_batch(records)]
+    numpy_rows = [list(row.values()) for row in numpy_predictor.predict_batch(records)]
+    # Compared on the model's own scale, before the scaler spreads it over each sensor's range
+    scale = keras_predictor.scaler.data_max - keras_predictor.scaler.data_min
+    max_diff = float(np.max(np.abs(np.array(keras_rows) - np.array(numpy_rows)) / scale))
+    assert len(keras_rows) == len(records) and len(keras_rows[0]) == len(FEATURE_COLUMNS)
+    assert max_diff <= 1e-4, f"NumPy backend differs from Keras by {max_diff}"
+
+if __name__ == "__main__":
+    test_numpy_backend_parity()
+    test_numpy_backend_matches_serving_shape()
+    test_exported_serving_model_matches_keras()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ML import main
+from ML.benchmark import serving_model
+from ML.predictor import AirQualityPredictor
+from ML.registry import ModelRegistry
+from ML.shadow import ShadowRunner
+
+READING = {"co2": 450.0, "pm25": 12.5, "co": 1.2, "temperature": 25.0, "humidity": 60.0}
+
+def write_serving_model(directory, seed=0):
+    """A model the API can serve, with its scaler, in a new directory"""
+    os.makedirs(directory)
+    return serving_model(directory, seed=seed)
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.05)
+    raise AssertionError("Timed out waiting for the API")
+
+def test_registry_versions_and_checksums():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        registry = ModelRegistry(os.path.join(tmp_dir, 'registry'))
+        v1 = registry.register(write_serving_model(os.path.join(tmp_dir, 'a'), seed=1), activate=True)
+        v2 = registry.register(write_serving_model(os.path.join(tmp_dir, 'b'), seed=2), notes="retrained")
+
+        manifest = registry.manifest()
+        assert (v1, v2) == ('v1', 'v2')
+        assert manifest['active'] == 'v1'
+        assert sorted(manifest['versions']['v2']['files']) == ['air_quality_scaler.json', 'benchmark_model.npz']
+        with pytest.raises(ValueError, match="already exists"):
+            registry.register(write_serving_model(os.path.join(tmp_dir, 'c')), version='v1')
+
+        registry.verify('v2')
+        with open(os.path.join(registry.root, 'v2', 'benchmark_model.npz'), 'ab') as f:
+            f.write(b'corrupt')
+        with pytest.raises(ValueError, match="checksum"):
+            registry.verify('v2')
+
+        # Promoting the shadow candidate ends the comparison
+        registry.set_shadow('v1', sample_rate=0.5)
+        registry.activate('v1')
+        assert registry.manifest()['shadow'] is None
+
+def test_shadow_runner_compares_candidate_with_serving_model():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        primary = AirQualityPredictor(write_serving_model(os.path.join(tmp_dir, 'a'), seed=1), backend='numpy')
+        same = AirQualityPredictor(write_serving_model(os.path.join(tmp_dir, 'b'), seed=1), backend='numpy')
+        other = AirQualityPredictor(write_serving_model(os.path.join(tmp_dir, 'c'), seed=2), backend='numpy')
+
+    for candidate, drifts in ((same, False), (other, True)):
+        runner = ShadowRunner(candidate, 'candidate', sample_rate=1.0, seed=0)
+        runner.offer(primary, [READING] * 3)
+        stats = wait_for(lambda: runner.stats() if runner.stats()['calls'] else None)
+        runner.shutdown()
+
+        assert stats['rows'] == 3 and stats['errors'] == 0
+        assert (max(stats['max_abs_diff'].values()) > 0) == drifts
+
+def test_api_hot_swaps_and_shadows_registry_versions():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        registry = ModelRegistry(os.path.join(tmp_dir, 'registry'))
+        registry.register(write_serving_model(os.path.join(tmp_dir, 'a'), seed=1), activate=True)
+        registry.register(write_serving_model(os.path.join(tmp_dir, 'b'), seed=2))
+
+        app = main.create_app(backend='numpy', registry_dir=registry.root)
+        with TestClient(app) as client:
+            ready = wait_for(lambda: client.get("/health/ready").json().get('status') == 'ready'
+                             and client.get("/health/ready").json())
+            assert ready['version'] == 'v1'
+            before = client.post("/predict", json=READING).json()
+
+            # Shadow v2 on every call; clients keep getting v1's answers
+            registry.set_shadow('v2', sample_rate=1.0)
+            status = client.post("/models/sync").json()
+            assert status['shadow']['version'] == 'v2'
+            assert client.post("/predict/batch", json=[READING, READING]).json() == [before, before]
+            shadow = wait_for(lambda: client.get("/models").json()['shadow']['calls'] and
+                              client.get("/models").json()['shadow'])
+            assert shadow['rows'] == 2 and shadow['mean_relative_diff'] > 0
+
+            # Activating the candidate swaps it in without a restart
+            registry.activate('v2')
+            status = client.post("/models/sync").json()
+            assert (status['serving'], status['shadow'], status['sync_error']) == ('v2', None, None)
+            assert client.post("/predict", json=READING).json() != before
+
+if __name__ == "__main__":
+    test_registry_versions_and_checksums()
+    test_shadow_runner_compares_candidate_with_serving_model()
+    test_api_hot_swaps_and_shadows_registry_versions()
@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from ML.scaler import FEATURE_COLUMNS, FeatureScaler, load_scaler, read_training_csv
+
+TRAINING_ROWS = [
+    [420.0, 3.5, 0.4, 18.0, 35.0],
+    [1250.0, 48.0, 6.2, 27.5, 71.0],
+    [780.0, 12.0, 1.9, 22.0, 55.0]
+]
+
+def write_training_csv(path):
+    with open(path, 'w') as f:
+        f.write(','.join(['timestamp'] + FEATURE_COLUMNS) + '\n')
+        for i, row in enumerate(TRAINING_ROWS):
+            f.write(','.join([str(i)] + [str(value) for value in row]) + '\n')
+
+def test_fitted_scaler_round_trips_through_save_and_load():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'training.csv')
+        scaler_path = os.path.join(tmp_dir, 'air_quality_scaler.json')
+        write_training_csv(csv_path)
+
+        fitted = FeatureScaler.fit(read_training_csv(csv_path))
+        fitted.save(scaler_path)
+        loaded = FeatureScaler.load(scaler_path)
+
+    # Bounds come from the training data, not the physical sensor ranges
+    assert loaded.data_min.tolist() == np.min(TRAINING_ROWS, axis=0).tolist()
+    assert loaded.data_max.tolist() == np.max(TRAINING_ROWS, axis=0).tolist()
+    assert loaded.n_samples == len(TRAINING_ROWS)
+
+    readings = np.array([[600.0, 20.0, 1.0, 25.0, 60.0]])
+    assert np.array_equal(loaded.transform(readings), fitted.transform(readings))
+    assert np.allclose(loaded.inverse_transform(loaded.transform(readings)), readings)
+    assert np.allclose(loaded.transform(TRAINING_ROWS).min(axis=0), 0.0)
+    assert np.allclose(loaded.transform(TRAINING_ROWS).max(axis=0), 1.0)
+
+def test_scaler_fitted_on_other_columns_is_rejected():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'air_quality_scaler.json')
+        # Same features in another order would silently scale the wrong inputs
+        swapped = ['pm25', 'co2', 'co', 'temperature', 'humidity']
+        FeatureScaler.fit(TRAINING_ROWS, columns=swapped).save(path)
+        with pytest.raises(ValueError, match="fitted on columns"):
+            load_scaler(path)
+
+        with open(path) as f:
+            params = json.load(f)
+        del params['columns']
+        with open(path, 'w') as f:
+            json.dump(params, f)
+        with pytest.raises(ValueError, match="fitted on columns"):
+            FeatureScaler.load(path)
+
+def test_missing_scaler_falls_back_to_sensor_ranges():
+    scaler = load_scaler(os.path.join(tempfile.gettempdir(), 'no-such-dir', 'air_quality_scaler.json'))
+
+    assert scaler.n_samples is None
+    assert scaler.transform([[400.0, 0.0, 0.0, -20.0, 0.0]]).tolist() == [[0.0] * 5]
+
+if __name__ == "__main__":
+    test_fitted_scaler_round_trips_through_save_and_load()
+    test_scaler_fitted_on_other_columns_is_rejected()
+    test_missing_scaler_falls_back_to_sensor_ranges()
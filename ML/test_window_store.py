@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from ML.window_store import DeviceWindowStore
+
+def test_window_store_keeps_latest_readings_in_order():
+    store = DeviceWindowStore(window_size=3, n_features=2, max_devices=4)
+
+    # The first reading fills the whole window
+    store.append('a', [1, 10])
+    windows, counts = store.get_windows(['a'])
+    np.testing.assert_array_equal(windows[0], [[1, 10], [1, 10], [1, 10]])
+    assert counts.tolist() == [1]
+
+    # Once full, the ring buffer wraps and drops the oldest reading
+    for i in range(2, 6):
+        store.append('a', [i, i * 10])
+    store.append('b', [7, 70])
+    windows, counts = store.get_windows(['b', 'a'])
+
+    np.testing.assert_array_equal(windows[1], [[3, 30], [4, 40], [5, 50]])
+    np.testing.assert_array_equal(windows[0], [[7, 70]] * 3)
+    assert counts.tolist() == [1, 3]
+
+def test_window_store_evicts_least_recently_updated_device():
+    store = DeviceWindowStore(window_size=2, n_features=1, max_devices=2)
+    store.append('a', [1])
+    store.append('b', [2])
+    store.append('a', [3])
+
+    # 'b' has gone longest without a reading and gives up its slot
+    store.append('c', [4])
+    assert 'a' in store and 'c' in store and 'b' not in store
+    assert len(store) == 2
+    with pytest.raises(KeyError, match="device b"):
+        store.get_windows(['b'])
+
+    windows, _ = store.get_windows(['c'])
+    np.testing.assert_array_equal(windows[0], [[4], [4]])
+
+    # A removed device frees its slot without evicting anyone
+    store.remove('a')
+    store.append('d', [5])
+    assert 'c' in store and 'd' in store
+
+if __name__ == "__main__":
+    test_window_store_keeps_latest_readings_in_order()
+    test_window_store_evicts_least_recently_updated_device()
@@ -0,0 +1,94 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class DeviceWindowStore:
+    """
+    Rolling window of the latest readings per device, in bounded memory.
+
+    All windows live in one preallocated ``(max_devices, window_size,
+    n_features)`` array used as a set of ring buffers, so appending a
+    reading and locating a device are O(1). When ``max_devices`` is
+    reached the least recently updated device gives up its slot.
+    """
+
+    def __init__(self, window_size, n_features, max_devices=10000):
+        if window_size < 1 or max_devices < 1:
+            raise ValueError("window_size and max_devices must be at least 1")
+
+        self.window_size = window_size
+        self.n_features = n_features
+        self.max_devices = max_devices
+
+        self._buffer = np.zeros((max_devices, window_size, n_features), dtype=np.float32)
+        self._heads = np.zeros(max_devices, dtype=np.int64)   # next write position
+        self._counts = np.zeros(max_devices, dtype=np.int64)  # readings seen, capped at window_size
+        self._slots = OrderedDict()                           # device_id -> slot, in LRU order
+        self._free = list(range(max_devices - 1, -1, -1))
+        self._offsets = np.arange(window_size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, device_id):
+        return device_id in self._slots
+
+    def _claim_slot(self, device_id):
+        if self._free:
+            slot = self._free.pop()
+        else:
+            # Evict the device that has gone longest without a reading
+            _, slot = self._slots.popitem(last=False)
+        self._slots[device_id] = slot
+        return slot
+
+    def append(self, device_id, values):
+        """Record one reading (sequence of n_features floats) for a device"""
+        values = np.asarray(values, dtype=np.float32)
+
+        with self._lock:
+            slot = self._slots.get(device_id)
+            if slot is None:
+                slot = self._claim_slot(device_id)
+                # Seed the whole window so it is usable from the first reading
+                self._buffer[slot] = values
+                self._heads[slot] = 0
+                self._counts[slot] = 0
+            else:
+                self._slots.move_to_end(device_id)
+
+            head = self._heads[slot]
+            self._buffer[slot, head] = values
+            self._heads[slot] = (head + 1) % self.window_size
+            self._counts[slot] = min(self._counts[slot] + 1, self.window_size)
+
+    def get_windows(self, device_ids):
+        """
+        Return windows for several devices, oldest reading first.
+
+        Returns:
+            tuple: (array of shape (len(device_ids), window_size, n_features),
+                    array of how many real readings each window holds)
+        """
+        with self._lock:
+            try:
+                slots = np.array([self._slots[device_id] for device_id in device_ids], dtype=np.int64)
+            except KeyError as e:
+                raise KeyError(f"No readings recorded for device {e.args[0]}")
+
+            # Unroll every ring buffer in one gather
+            positions = (self._heads[slots, None] + self._offsets) % self.window_size
+            windows = self._buffer[slots[:, None], positions]
+            counts = self._counts[slots].copy()
+
+        return windows, counts
+
+    def remove(self, device_id):
+        """Forget a device and free its slot"""
+        with self._lock:
+            slot = self._slots.pop(device_id, None)
+            if slot is not None:
+                self._free.append(slot)